@@ -0,0 +1,91 @@
+"""
+Benchmark the conversion of the manifest model into a JSON object.
+
+Compares `as_json_object` with the previous implementation which round-tripped the model
+through a JSON string, and fails if the two outputs differ.
+
+Usage:
+
+    python -m benchmarks.as_json_object
+"""
+
+import json
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+from komposer.core.config_map import generate_config_maps
+from komposer.core.deployment import generate_deployment
+from komposer.core.service import generate_services
+from komposer.types import docker_compose, kubernetes
+from komposer.types.cli import Context, DeploymentContext, IngressContext
+from komposer.utils import as_json_object
+
+SCALES = [(1, 10), (10, 100), (50, 1_000)]
+REPEAT = 5
+
+
+def make_manifest(services_count: int, env_vars_count: int) -> kubernetes.List:
+    environment: docker_compose.Environment = {
+        f"KEY_{index}": f"value-{index}" for index in range(env_vars_count)
+    }
+    compose = docker_compose.DockerCompose(
+        services={
+            f"service-{index}": docker_compose.Service(
+                image="my-image", ports=[str(8000 + index)], environment=environment
+            )
+            for index in range(services_count)
+        }
+    )
+    context = Context(
+        docker_compose_path=Path("docker-compose.yml"),
+        repository_name="benchmark",
+        branch_name="main",
+        default_image="${IMAGE}",
+        extra_manifest_paths=[],
+        ingress=IngressContext(domain="svc.cluster.local"),
+        deployment=DeploymentContext(),
+    )
+
+    return kubernetes.List(
+        items=[
+            *generate_config_maps(context, compose),
+            generate_deployment(context, compose.services),
+            *generate_services(context, compose.services),
+        ]
+    )
+
+
+def as_json_object_roundtrip(manifest: kubernetes.List) -> dict[str, Any]:
+    result: dict[str, Any] = json.loads(manifest.model_dump_json(by_alias=True))
+
+    return result
+
+
+def main() -> int:
+    print(f"{'services':>8} {'env vars':>8} {'round-trip':>12} {'direct':>12} {'speed-up':>8}")
+
+    for services_count, env_vars_count in SCALES:
+        manifest = make_manifest(services_count, env_vars_count)
+
+        if as_json_object(manifest) != as_json_object_roundtrip(manifest):
+            print(f"Output mismatch with {services_count} services", file=sys.stderr)
+            return 1
+
+        roundtrip_time = min(
+            timeit.repeat(lambda: as_json_object_roundtrip(manifest), number=1, repeat=REPEAT)
+        )
+        direct_time = min(timeit.repeat(lambda: as_json_object(manifest), number=1, repeat=REPEAT))
+
+        print(
+            f"{services_count:>8} {env_vars_count:>8} "
+            f"{roundtrip_time * 1000:>10.2f}ms {direct_time * 1000:>10.2f}ms "
+            f"{roundtrip_time / direct_time:>7.1f}x"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
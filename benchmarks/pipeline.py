@@ -0,0 +1,290 @@
+"""
+Benchmark each stage of the pipeline rendering a manifest from a Docker Compose file.
+
+Synthetic inputs are generated at multiple scales, varying one dimension at a time: the
+number of services, the number of keys of the env file and the size of the extra manifest.
+Each stage is timed on its own, taking the best of a few runs.
+
+The timings are compared with the baseline stored by a previous run with `--save-baseline`;
+a stage slower than the baseline by more than the threshold is flagged as a regression and
+the command fails.
+
+Usage:
+
+    python -m benchmarks.pipeline [--quick] [--save-baseline] [--baseline PATH]
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, NamedTuple
+
+from komposer.core.base import (
+    ensure_deployment_annotations_is_valid_yaml,
+    ensure_docker_compose_is_supported,
+    ensure_ingress_tls_is_valid_yaml,
+)
+from komposer.core.config_map import generate_config_maps
+from komposer.core.deployment import generate_deployment
+from komposer.core.env_file import EnvFileRegistry
+from komposer.core.env_vars import replace_komposer_env_variables
+from komposer.core.extra_manifest import load_extra_manifests
+from komposer.core.ingress import generate_ingress_from_services
+from komposer.core.service import generate_services
+from komposer.types import kubernetes
+from komposer.types.cli import Context, DeploymentContext, IngressContext
+from komposer.utils import as_json_object, dump_yaml, parse_docker_compose_file
+
+DEFAULT_BASELINE_PATH = Path(".benchmarks") / "pipeline.json"
+DEFAULT_THRESHOLD = 1.25
+# Ignore slowdowns smaller than this, they are just noise
+MIN_REGRESSION = 0.001
+DEFAULT_REPEAT = 3
+EXTRA_MANIFEST_ITEM_DATA_SIZE = 1_000
+
+
+class Scenario(NamedTuple):
+    name: str
+    services_count: int
+    env_vars_count: int
+    extra_manifest_size: int
+    # The largest scenarios are skipped by --quick and run only once
+    quick: bool = True
+
+    @property
+    def repeat(self) -> int:
+        return DEFAULT_REPEAT if self.quick else 1
+
+
+SCENARIOS = [
+    Scenario("services-1", 1, 10, 1_000),
+    Scenario("services-10", 10, 10, 1_000),
+    Scenario("services-100", 100, 10, 1_000),
+    Scenario("services-1000", 1_000, 10, 1_000, quick=False),
+    Scenario("env-vars-1000", 1, 1_000, 1_000),
+    Scenario("env-vars-50000", 1, 50_000, 1_000, quick=False),
+    Scenario("extra-manifest-1mb", 1, 10, 1_000_000),
+    Scenario("extra-manifest-20mb", 1, 10, 20_000_000, quick=False),
+]
+
+Timings = dict[str, dict[str, float]]
+
+
+def write_scenario(path: Path, scenario: Scenario) -> Context:
+    """
+    Write the Docker Compose file, the env file and the extra manifest of the scenario.
+    """
+    env_file_path = path / ".env"
+    env_file_path.write_text(
+        "".join(f"KEY_{index}=value-{index}\n" for index in range(scenario.env_vars_count))
+    )
+
+    compose = {
+        "services": {
+            f"service-{index}": {
+                "image": "my-image",
+                "command": "ping ${KOMPOSER_SERVICE_PREFIX}-service-0",
+                "ports": [str(8000 + index)],
+                "env_file": env_file_path.name,
+            }
+            for index in range(scenario.services_count)
+        }
+    }
+    compose_path = path / "docker-compose.yml"
+    compose_path.write_text(dump_yaml(compose))
+
+    items_count = max(1, scenario.extra_manifest_size // EXTRA_MANIFEST_ITEM_DATA_SIZE)
+    extra_manifest = {
+        "apiVersion": "v1",
+        "kind": "List",
+        "items": [
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {"name": f"extra-{index}"},
+                "data": {"value": "x" * EXTRA_MANIFEST_ITEM_DATA_SIZE},
+            }
+            for index in range(items_count)
+        ],
+    }
+    extra_manifest_path = path / "extra-manifest.yml"
+    extra_manifest_path.write_text(dump_yaml(extra_manifest))
+
+    return Context(
+        docker_compose_path=compose_path,
+        repository_name="benchmark",
+        branch_name="main",
+        default_image="${IMAGE}",
+        ingress_for_service="service-0",
+        extra_manifest_paths=[extra_manifest_path],
+        ingress=IngressContext(domain="svc.cluster.local"),
+        deployment=DeploymentContext(),
+    )
+
+
+def best_time(function: Callable[[], Any], repeat: int = DEFAULT_REPEAT) -> float:
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def time_stages(context: Context, repeat: int = DEFAULT_REPEAT) -> dict[str, float]:
+    """
+    Time each stage of the pipeline, feeding each one with the output of the previous stages.
+    """
+    compose_path = context.docker_compose_path
+    compose = parse_docker_compose_file(compose_path)
+
+    def validate() -> None:
+        ensure_deployment_annotations_is_valid_yaml(context)
+        ensure_ingress_tls_is_valid_yaml(context)
+        ensure_docker_compose_is_supported(compose)
+
+    def parse_env_files() -> EnvFileRegistry:
+        env_files = EnvFileRegistry(compose_path)
+
+        for service in compose.services.values():
+            if service.env_file:
+                env_files.get(service.env_file)
+
+        return env_files
+
+    # The env files are parsed once and shared by the ConfigMaps and the Deployment
+    env_files = parse_env_files()
+
+    timings = {
+        "parse": best_time(lambda: parse_docker_compose_file(compose_path), repeat),
+        "validation": best_time(validate, repeat),
+        "env_files": best_time(parse_env_files, repeat),
+        "config_maps": best_time(
+            lambda: list(generate_config_maps(context, compose, env_files)), repeat
+        ),
+        "deployment": best_time(
+            lambda: generate_deployment(context, compose.services, env_files), repeat
+        ),
+        "services": best_time(lambda: list(generate_services(context, compose.services)), repeat),
+        "ingress": best_time(
+            lambda: generate_ingress_from_services(context, compose.services), repeat
+        ),
+        "extra_manifests": best_time(lambda: load_extra_manifests(context), repeat),
+    }
+
+    ingress = generate_ingress_from_services(context, compose.services)
+    manifest = kubernetes.List(
+        items=[
+            *generate_config_maps(context, compose, env_files),
+            generate_deployment(context, compose.services, env_files),
+            *generate_services(context, compose.services),
+            *([ingress] if ingress else []),
+        ]
+    )
+    timings["as_json_object"] = best_time(lambda: as_json_object(manifest), repeat)
+
+    manifest_dict = as_json_object(manifest)
+    manifest_dict["items"].extend(load_extra_manifests(context))
+    timings["dump_yaml"] = best_time(lambda: dump_yaml(manifest_dict), repeat)
+
+    manifest_str = dump_yaml(manifest_dict)
+    timings["env_substitution"] = best_time(
+        lambda: replace_komposer_env_variables(context, manifest_str), repeat
+    )
+
+    return timings
+
+
+def run(scenarios: list[Scenario]) -> Timings:
+    timings: Timings = {}
+
+    for scenario in scenarios:
+        with TemporaryDirectory() as temporary_dir:
+            context = write_scenario(Path(temporary_dir), scenario)
+            timings[scenario.name] = time_stages(context, scenario.repeat)
+
+    return timings
+
+
+def find_regressions(
+    timings: Timings, baseline: Timings, threshold: float
+) -> set[tuple[str, str]]:
+    regressions = set()
+
+    for scenario_name, stage_timings in timings.items():
+        for stage, time in stage_timings.items():
+            baseline_time = baseline.get(scenario_name, {}).get(stage)
+
+            if baseline_time is None:
+                continue
+
+            if time > baseline_time * threshold and time - baseline_time > MIN_REGRESSION:
+                regressions.add((scenario_name, stage))
+
+    return regressions
+
+
+def print_report(timings: Timings, baseline: Timings, regressions: set[tuple[str, str]]) -> None:
+    print(f"{'scenario':<22} {'stage':<18} {'time':>12} {'baseline':>12} {'change':>8}")
+
+    for scenario_name, stage_timings in timings.items():
+        for stage, time in stage_timings.items():
+            baseline_time = baseline.get(scenario_name, {}).get(stage)
+
+            if baseline_time is None:
+                baseline_str = f"{'-':>12}"
+                change_str = f"{'-':>8}"
+            else:
+                baseline_str = f"{baseline_time * 1000:>10.2f}ms"
+                change_str = f"{(time / baseline_time - 1) * 100:>+7.0f}%"
+
+            flag = " REGRESSION" if (scenario_name, stage) in regressions else ""
+
+            print(
+                f"{scenario_name:<22} {stage:<18} {time * 1000:>10.2f}ms "
+                f"{baseline_str} {change_str}{flag}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE_PATH,
+        help=f"Path of the baseline timings. Default is {DEFAULT_BASELINE_PATH}",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store the timings as the new baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Slowdown ratio flagged as a regression. Default is {DEFAULT_THRESHOLD}",
+    )
+    parser.add_argument("--quick", action="store_true", help="Skip the largest scenarios")
+    args = parser.parse_args()
+
+    scenarios = [scenario for scenario in SCENARIOS if scenario.quick or not args.quick]
+    baseline: Timings = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+
+    timings = run(scenarios)
+    regressions = find_regressions(timings, baseline, args.threshold)
+
+    print_report(timings, baseline, regressions)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({**baseline, **timings}, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than the baseline", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from komposer.api import render, render_async
+    from komposer.types.cli import Context, DeploymentContext, IngressContext
+    from komposer.types.docker_compose import DockerCompose
+
+__all__ = [
+    "Context",
+    "DeploymentContext",
+    "DockerCompose",
+    "IngressContext",
+    "render",
+    "render_async",
+]
+
+# NOTE: the public API is imported on first access, importing the package from the CLI must
+# not pay for importing Pydantic, PyYAML and the Kubernetes models
+_lazy_attributes = {
+    "Context": "komposer.types.cli",
+    "DeploymentContext": "komposer.types.cli",
+    "DockerCompose": "komposer.types.docker_compose",
+    "IngressContext": "komposer.types.cli",
+    "render": "komposer.api",
+    "render_async": "komposer.api",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _lazy_attributes.get(name)
+
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(module_name), name)
@@ -0,0 +1,140 @@
+"""
+Render manifests from Python, without going through the CLI:
+
+>>> import komposer
+>>> context = komposer.Context(...)
+>>> manifest = komposer.render(context, compose={"services": {"web": {"image": "my-image"}}})
+>>> [item["kind"] for item in manifest["items"]]
+['Deployment']
+
+or from asyncio code, without blocking the event loop:
+
+>>> manifest = await komposer.render_async(context)
+"""
+
+import asyncio
+from collections.abc import Mapping
+from contextlib import suppress
+from typing import Any, Optional, Union
+
+from yaml import YAMLError
+
+from komposer.core.base import generate_manifest_from_docker_compose
+from komposer.core.env_file import EnvFileRegistry
+from komposer.core.env_vars import replace_komposer_env_variables_in_object
+from komposer.core.extra_manifest import load_extra_manifest_file
+from komposer.types import docker_compose
+from komposer.types.cli import Context
+from komposer.utils import parse_docker_compose_file
+
+Compose = Union[docker_compose.DockerCompose, Mapping[str, Any]]
+
+
+def parse_compose(compose: Compose) -> docker_compose.DockerCompose:
+    if isinstance(compose, docker_compose.DockerCompose):
+        return compose
+
+    return docker_compose.DockerCompose.model_validate(compose)
+
+
+def render(context: Context, compose: Optional[Compose] = None) -> dict:
+    """
+    Render the manifest of the context as a Kubernetes List JSON object, with the `KOMPOSER_*`
+    variables already substituted.
+
+    The variables are substituted in the strings of the object, so their values always stay
+    strings. The CLI substitutes them in the YAML output instead, where a value such as `123`,
+    `true` or an empty one is read back as a number, a boolean or null.
+
+    The Docker Compose file is read from `context.docker_compose_path` unless already parsed,
+    or given as a mapping, in `compose`. Only the files referenced by the context and by the
+    Docker Compose's services are read, i.e. the env files and the extra manifests; nothing is
+    written.
+    """
+    compose = None if compose is None else parse_compose(compose)
+    manifest: dict = replace_komposer_env_variables_in_object(
+        context, generate_manifest_from_docker_compose(context, compose)
+    )
+
+    return manifest
+
+
+def load_context_files(context: Context) -> None:
+    """
+    Load the Ingress' TLS and the Deployment's annotations files into the YAML files cache.
+    """
+    # The errors are raised by the validation when rendering, in the same order as `render()`
+    with suppress(YAMLError, OSError):
+        context.ingress.tls
+
+    with suppress(YAMLError, OSError):
+        context.deployment.annotations
+
+
+async def load_compose_async(
+    context: Context, compose: Optional[Compose]
+) -> docker_compose.DockerCompose:
+    if compose is not None:
+        return parse_compose(compose)
+
+    return await asyncio.to_thread(parse_docker_compose_file, context.docker_compose_path)
+
+
+async def load_env_files_async(
+    context: Context, compose: docker_compose.DockerCompose
+) -> EnvFileRegistry:
+    env_files = EnvFileRegistry(context.docker_compose_path)
+    # Different paths can point to the same file
+    env_file_paths = {
+        env_files.resolve(service.env_file): service.env_file
+        for service in compose.services.values()
+        if service.env_file
+    }
+
+    await asyncio.gather(
+        *(asyncio.to_thread(env_files.get, env_file) for env_file in env_file_paths.values())
+    )
+
+    return env_files
+
+
+async def render_async(context: Context, compose: Optional[Compose] = None) -> dict:
+    """
+    Same as `render()` for asyncio code: the files are read concurrently in threads and the
+    manifest is rendered in a thread, so that the event loop is never blocked and many
+    manifests can be rendered at once.
+
+    The Docker Compose file, the extra manifests, the Ingress' TLS and the Deployment's
+    annotations files are read all at once, then the env files once the Docker Compose file
+    has been parsed.
+    """
+
+    async def load_compose_and_env_files() -> tuple[docker_compose.DockerCompose, EnvFileRegistry]:
+        parsed_compose = await load_compose_async(context, compose)
+        env_files = await load_env_files_async(context, parsed_compose)
+
+        return parsed_compose, env_files
+
+    (parsed_compose, env_files), extra_manifests_documents, _ = await asyncio.gather(
+        load_compose_and_env_files(),
+        asyncio.gather(
+            *(
+                asyncio.to_thread(load_extra_manifest_file, path)
+                for path in context.extra_manifest_paths
+            )
+        ),
+        asyncio.to_thread(load_context_files, context),
+    )
+
+    manifest = await asyncio.to_thread(
+        generate_manifest_from_docker_compose,
+        context,
+        parsed_compose,
+        env_files,
+        extra_manifests_documents,
+    )
+    rendered_manifest: dict = await asyncio.to_thread(
+        replace_komposer_env_variables_in_object, context, manifest
+    )
+
+    return rendered_manifest
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from komposer.envsubst import KOMPOSER_VAR_PREFIX
+from komposer.types import docker_compose
+
+if TYPE_CHECKING:
+    from komposer.types.cli import Context
+
+DEFAULT_CACHE_MAX_SIZE = 64 * 1024 * 1024
+CACHE_ENTRY_SUFFIX = ".json"
+FILE_DIGEST_CHUNK_SIZE = 1024 * 1024
+
+# Variables interpolated by python-dotenv, i.e. `${NAME}` or `${NAME:-default}`
+env_file_variable_re = re.compile(r"\$\{([^}:]+)")
+
+
+@lru_cache(maxsize=None)
+def get_komposer_version() -> str:
+    try:
+        return version("komposer")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@lru_cache(maxsize=None)
+def get_code_version() -> str:
+    """
+    Identify the code producing the cache entries: the package's version is the same across
+    code changes in editable installs and checkouts, so the modification time and the size of
+    each source file are part of it too.
+    """
+    from komposer.utils import get_file_signature
+
+    package_path = Path(__file__).parent
+    digest = hashlib.sha256(get_komposer_version().encode())
+
+    for path in sorted(package_path.rglob("*.py")):
+        digest.update(b"\0")
+        digest.update(f"{path.relative_to(package_path)}:{get_file_signature(path)}".encode())
+
+    return digest.hexdigest()
+
+
+def get_cache_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(cache_home) / "komposer"
+
+
+class FileCache:
+    """
+    On-disk cache of entries keyed by a hash of their inputs and stored as one file each.
+
+    When the total size exceeds `max_size` the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Path, max_size: int = DEFAULT_CACHE_MAX_SIZE) -> None:
+        self.path = path
+        self.max_size = max_size
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / f"{key}{CACHE_ENTRY_SUFFIX}"
+
+    def read(self, key: str) -> Optional[bytes]:
+        entry_path = self._entry_path(key)
+
+        try:
+            data = entry_path.read_bytes()
+        except OSError:
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        return data
+
+    def write(self, key: str, data: str) -> None:
+        # A failure writing the cache must never fail the render
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            with NamedTemporaryFile(
+                "w", dir=self.path, suffix=".tmp", delete=False
+            ) as temporary_file:
+                temporary_file.write(data)
+
+            os.replace(temporary_file.name, self._entry_path(key))
+
+            self.evict()
+        except OSError:
+            pass
+
+    def discard(self, key: str) -> None:
+        self._entry_path(key).unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        entries = []
+
+        for entry_path in self.path.glob(f"*{CACHE_ENTRY_SUFFIX}"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        # Evict the least recently used entries first
+        for _, size, entry_path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+
+
+class ComposeCache(FileCache):
+    """
+    On-disk cache of the validated Docker Compose models.
+
+    Entries are keyed by the SHA-256 of the Docker Compose file's content and the Komposer
+    version and stored as JSON, which Pydantic validates much faster than PyYAML parses the
+    original file.
+    """
+
+    @staticmethod
+    def make_key(content: bytes) -> str:
+        digest = hashlib.sha256(get_code_version().encode())
+        digest.update(b"\0")
+        digest.update(content)
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[docker_compose.DockerCompose]:
+        data = self.read(key)
+
+        if data is None:
+            return None
+
+        try:
+            compose = docker_compose.DockerCompose.model_validate_json(data)
+        except ValidationError:
+            # Corrupted or stale entry, drop it
+            self.discard(key)
+            return None
+
+        return compose
+
+    def set(self, key: str, compose: docker_compose.DockerCompose) -> None:
+        self.write(key, compose.model_dump_json())
+
+
+def get_file_digest(path: Path) -> Optional[str]:
+    digest = hashlib.sha256()
+
+    try:
+        with path.open("rb") as file:
+            for chunk in iter(lambda: file.read(FILE_DIGEST_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+
+    return digest.hexdigest()
+
+
+def get_value_digest(value: Optional[str]) -> Optional[str]:
+    # Only the digest of the environment variables is stored, they can hold secrets
+    return None if value is None else hashlib.sha256(value.encode()).hexdigest()
+
+
+def get_env_file_variables(env_file_path: Path) -> set[str]:
+    """
+    Names of the environment variables interpolated into the values of the env file.
+    """
+    try:
+        content = env_file_path.read_text()
+    except OSError:
+        return set()
+
+    return set(env_file_variable_re.findall(content))
+
+
+class RenderEntry(BaseModel):
+    # The digest of each file, or environment variable, found while rendering
+    dependencies: dict[str, Optional[str]]
+    output: str
+
+
+class RenderCache(FileCache):
+    """
+    On-disk cache of the rendered manifests.
+
+    Entries are keyed by the SHA-256 of everything known before rendering: the Komposer
+    version, the output format, the context, the `KOMPOSER_*` environment variables and the
+    content of the Docker Compose file, the extra manifests, the Ingress' TLS file and the
+    Deployment's annotations file.
+
+    The env files are known only once the Docker Compose file is parsed, their digests and
+    the digests of the environment variables they interpolate are stored in the entry and
+    checked when reading it.
+    """
+
+    @staticmethod
+    def make_key(context: "Context", output_format: str) -> str:
+        paths = [
+            context.docker_compose_path,
+            *context.extra_manifest_paths,
+            context.ingress.tls_path,
+            context.deployment.annotations_path,
+        ]
+        komposer_env_variables = sorted(
+            (name, value)
+            for name, value in os.environ.items()
+            if name.startswith(KOMPOSER_VAR_PREFIX)
+        )
+
+        digest = hashlib.sha256(get_code_version().encode())
+
+        for part in [
+            output_format,
+            context.model_dump_json(),
+            json.dumps(komposer_env_variables),
+            *(path and get_file_digest(path) for path in paths),
+        ]:
+            digest.update(b"\0")
+            digest.update(str(part).encode())
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def get_dependencies(env_file_paths: Iterable[Path]) -> dict[str, Optional[str]]:
+        dependencies = {}
+
+        for env_file_path in env_file_paths:
+            dependencies[f"file:{env_file_path}"] = get_file_digest(env_file_path)
+
+            for name in get_env_file_variables(env_file_path):
+                dependencies[f"env:{name}"] = get_value_digest(os.environ.get(name))
+
+        return dependencies
+
+    def get(self, key: str) -> Optional[str]:
+        data = self.read(key)
+
+        if data is None:
+            return None
+
+        try:
+            entry = RenderEntry.model_validate_json(data)
+        except ValidationError:
+            # Corrupted or stale entry, drop it
+            self.discard(key)
+            return None
+
+        env_file_paths = [
+            Path(dependency.removeprefix("file:"))
+            for dependency in entry.dependencies
+            if dependency.startswith("file:")
+        ]
+
+        if self.get_dependencies(env_file_paths) != entry.dependencies:
+            return None
+
+        return entry.output
+
+    def set(self, key: str, output: str, env_file_paths: Iterable[Path]) -> None:
+        entry = RenderEntry(dependencies=self.get_dependencies(env_file_paths), output=output)
+
+        self.write(key, entry.model_dump_json())
+
+
+def get_compose_cache() -> ComposeCache:
+    return ComposeCache(get_cache_path() / "compose")
+
+
+def get_render_cache() -> RenderCache:
+    return RenderCache(get_cache_path() / "render")
@@ -1,93 +1,611 @@
-from collections.abc import Sequence
+from __future__ import annotations
+
+import json
+import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional, TextIO, TypeVar
 
 import click
 
-from komposer.core.base import generate_manifest_from_docker_compose
-from komposer.core.env_vars import replace_komposer_env_variables
-from komposer.types.cli import Context, DeploymentContext, IngressContext
-from komposer.utils import dump_yaml
+from komposer.core.render import (
+    DEFAULT_DOCKER_IMAGE,
+    DEFAULT_INGRESS_DOMAIN,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+    JSON_INDENT,
+    OUTPUT_FORMAT_JSON,
+    OUTPUT_FORMAT_NDJSON,
+    OUTPUT_FORMAT_YAML,
+    OUTPUT_FORMAT_YAML_STREAM,
+    OUTPUT_FORMATS,
+    OUTPUT_JSON_FORMATS,
+    OUTPUT_STREAM_FORMATS,
+    get_manifest_item_filename,
+    render_manifest_documents,
+    render_manifest_item,
+    render_raw_manifest,
+    resolve_output_variables,
+)
+
+if TYPE_CHECKING:
+    from komposer.types.cli import Context
+
+# NOTE: only click, the defaults and the output formats are imported at module level so that
+# `--help`, argument parsing and validation errors don't pay for importing Pydantic, PyYAML and
+# the Kubernetes models; the rest of Komposer is imported within the commands.
 
 DEFAULT_DOCKER_COMPOSE_FILENAME = Path("docker-compose.yml")
-DEFAULT_DOCKER_IMAGE = "${IMAGE}"
-DEFAULT_INGRESS_DOMAIN = "svc.cluster.local"
+DEFAULT_COMMAND = "render"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class DefaultCommandGroup(click.Group):
+    """
+    A click group which invokes the default command when the first argument is not the name
+    of a sub-command, so that `komposer -r ... -b ...` keeps working as before.
+    """
 
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        if not args or (args[0] not in self.commands and args[0] not in ctx.help_option_names):
+            args.insert(0, DEFAULT_COMMAND)
 
-def output_raw_manifest(context: Context, manifest: dict) -> None:
-    # Convert manifest to string
-    output = dump_yaml(manifest)
+        return super().parse_args(ctx, args)
 
-    # Render KOMPOSER_* vars
-    output = replace_komposer_env_variables(context, output)
 
+def output_raw_manifest(
+    context: Context, manifest: dict, output_format: str = OUTPUT_FORMAT_YAML
+) -> None:
     # Output manifest
-    print(output)
+    print(render_raw_manifest(context, manifest, output_format))
+
+
+def output_manifest(
+    context: Context,
+    manifest: dict,
+    output_format: str = OUTPUT_FORMAT_YAML,
+    output_path: Optional[Path] = None,
+) -> None:
+    if output_path is None:
+        output_raw_manifest(context, manifest, output_format)
+        return
+
+    from komposer.utils import write_file_atomically
+
+    write_file_atomically(
+        output_path, [render_raw_manifest(context, manifest, output_format), "\n"]
+    )
+
+
+def output_manifest_items(
+    context: Context,
+    items: Iterable[dict],
+    output_format: str = OUTPUT_FORMAT_YAML_STREAM,
+    output_path: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+) -> None:
+    """
+    Output each item as soon as it's generated, either as a document of the stream or as a
+    file in the output directory.
+    """
+    from komposer.utils import write_file_atomically
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        variables = resolve_output_variables(context, output_format)
+
+        for item in items:
+            write_file_atomically(
+                output_dir / get_manifest_item_filename(item, output_format),
+                [render_manifest_item(context, item, output_format, variables)],
+            )
+    elif output_path is not None:
+        write_file_atomically(
+            output_path, render_manifest_documents(context, items, output_format)
+        )
+    else:
+        sys.stdout.writelines(render_manifest_documents(context, items, output_format))
+
+
+def docker_compose_options(function: F) -> F:
+    """
+    Options shared by all the commands which render a manifest from a Docker Compose file.
+    """
+    options = [
+        click.option(
+            "--compose-file",
+            "-f",
+            default=DEFAULT_DOCKER_COMPOSE_FILENAME,
+            type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+            help=f"Path to the Docker compose file. Default is {DEFAULT_DOCKER_COMPOSE_FILENAME}.",
+        ),
+        click.option(
+            "--extra-manifest",
+            type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+            multiple=True,
+            help=(
+                "Path to an extra manifest file with custom items to be merged. "
+                "The manifest must be in a format where the root element is a Kubernetes List node. "  # noqa: E501
+                "The branch and repository labels will be added to each item; "
+                "each item's name will be prefixed with the computed prefix of the generated manifest"  # noqa: E501
+            ),
+        ),
+        click.option(
+            "--default-image",
+            default=DEFAULT_DOCKER_IMAGE,
+            help=(
+                "Default image to be used for those Docker Compose services whom don't have the image set. "  # noqa: E501
+                f"Default is {DEFAULT_DOCKER_IMAGE}"
+            ),
+        ),
+        click.option(
+            "--ingress-tls-file",
+            type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+            help=(
+                "Specify the filename containing the Ingress' TLS configuration as a YAML list. "
+                "It's your responsibility to make sure that it's a valid Kubernetes config fragment. "  # noqa: E501
+            ),
+        ),
+        click.option(
+            "--ingress-domain",
+            default=DEFAULT_INGRESS_DOMAIN,
+            help=(
+                "Specify the top level domain to be used for the Ingress. "
+                f"Default is {DEFAULT_INGRESS_DOMAIN}"
+            ),
+        ),
+        click.option(
+            "--deployment-annotations-file",
+            type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+            help=(
+                "Specify the filename containing the extra Deployment's annotaions as a YAML object. "  # noqa: E501
+                "It's your responsibility to make sure that it's a valid Kubernetes config fragment. "  # noqa: E501
+            ),
+        ),
+        click.option(
+            "--deployment-service-account-name",
+            help="Service account name to be used for the Deployment.",
+        ),
+    ]
+
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
+def context_options(function: F) -> F:
+    """
+    Options identifying the target of the commands which render a single manifest.
+    """
+    options = [
+        click.option("--project-name", "-p", help="Name of the project"),
+        click.option(
+            "--repository-name",
+            "-r",
+            required=True,
+            help="Name of the repository of this project",
+        ),
+        click.option(
+            "--branch-name", "-b", required=True, help="Name of the branch going to be deployed"
+        ),
+        click.option(
+            "--ingress-for-service",
+            "-i",
+            help="Name of the service to have an ingress associated to it",
+        ),
+    ]
+
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
+def output_options(function: F) -> F:
+    """
+    Options of the commands which output a single manifest.
+    """
+    options = [
+        click.option(
+            "--format",
+            "output_format",
+            type=click.Choice(OUTPUT_FORMATS),
+            default=OUTPUT_FORMAT_YAML,
+            help=(
+                f"Output format: `{OUTPUT_FORMAT_YAML}` or `{OUTPUT_FORMAT_JSON}` for a single "
+                f"Kubernetes List, `{OUTPUT_FORMAT_YAML_STREAM}` for one YAML document per item "
+                f"or `{OUTPUT_FORMAT_NDJSON}` for one JSON object per line, streamed as soon as "
+                f"each item is generated. Default is {OUTPUT_FORMAT_YAML}"
+            ),
+        ),
+        click.option(
+            "--output",
+            "output_path",
+            type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+            help=(
+                "Write the manifest into this file instead of the standard output; "
+                "the file is left untouched if its content is unchanged."
+            ),
+        ),
+    ]
+
+    for option in reversed(options):
+        function = option(function)
+
+    return function
+
+
+def make_context(
+    compose_file: Path,
+    project_name: Optional[str],
+    repository_name: str,
+    branch_name: str,
+    default_image: str,
+    ingress_domain: str,
+    extra_manifest: Sequence[Path],
+    ingress_for_service: Optional[str] = None,
+    ingress_tls_file: Optional[Path] = None,
+    deployment_annotations_file: Optional[Path] = None,
+    deployment_service_account_name: Optional[str] = None,
+) -> Context:
+    from komposer.types.cli import Context, DeploymentContext, IngressContext
+
+    return Context(
+        docker_compose_path=compose_file,
+        project_name=project_name,
+        branch_name=branch_name,
+        repository_name=repository_name,
+        default_image=default_image,
+        ingress_for_service=ingress_for_service,
+        extra_manifest_paths=list(extra_manifest),
+        ingress=IngressContext(domain=ingress_domain, tls_path=ingress_tls_file),
+        deployment=DeploymentContext(
+            annotations_path=deployment_annotations_file,
+            service_account_name=deployment_service_account_name,
+        ),
+    )
+
+
+@click.group(cls=DefaultCommandGroup)
+def main() -> None:
+    """
+    Convert a Docker Compose file into a Kubernetes manifest.
+
+    When no command is given the `render` command is invoked.
+    """
 
 
-@click.command()
+@main.command()
+@context_options
+@output_options
 @click.option(
-    "--compose-file",
-    "-f",
-    default=DEFAULT_DOCKER_COMPOSE_FILENAME,
-    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
-    help=f"Path to the Docker compose file. Default is {DEFAULT_DOCKER_COMPOSE_FILENAME}.",
+    "--output-dir",
+    type=click.Path(file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
+    help=(
+        "Write each item into its own `<kind>-<name>.yml` file in this directory; "
+        "the files whose content is unchanged are left untouched and the files of the items "
+        "no longer in the manifest are not removed."
+    ),
 )
-@click.option("--project-name", "-p", help="Name of the project")
 @click.option(
-    "--repository-name", "-r", required=True, help="Name of the repository of this project"
+    "--profile",
+    is_flag=True,
+    help=(
+        "Print the wall time, the CPU time and the peak of the allocated memory of each stage "
+        "of the rendering to the standard error."
+    ),
 )
-@click.option("--branch-name", "-b", required=True, help="Name of the branch going to be deployed")
 @click.option(
-    "--ingress-for-service", "-i", help="Name of the service to have an ingress associated to it"
+    "--profile-output",
+    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Write the profile of each stage into this file as JSON instead, implies --profile.",
 )
 @click.option(
-    "--extra-manifest",
-    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
-    multiple=True,
+    "--watch",
+    is_flag=True,
     help=(
-        "Path to an extra manifest file with custom items to be merged. "
-        "The manifest must be in a format where the root element is a Kubernetes List node. "
-        "The branch and repository labels will be added to each item; "
-        "each item's name will be prefixed with the computed prefix of the generated manifest"
+        "Watch the input files and render the manifest again each time one of them changes, "
+        "regenerating only the affected items."
     ),
 )
 @click.option(
-    "--default-image",
-    default=DEFAULT_DOCKER_IMAGE,
-    help=(
-        "Default image to be used for those Docker Compose services whom don't have the image set. "  # noqa: E501
-        f"Default is {DEFAULT_DOCKER_IMAGE}"
-    ),
+    "--no-cache",
+    is_flag=True,
+    help="Render the manifest from scratch instead of reusing the output of a previous render.",
 )
+@docker_compose_options
+def render(
+    compose_file: Path,
+    project_name: str,
+    repository_name: str,
+    branch_name: str,
+    default_image: str,
+    ingress_domain: str,
+    extra_manifest: Sequence[Path],
+    ingress_for_service: Optional[str] = None,
+    ingress_tls_file: Optional[Path] = None,
+    deployment_annotations_file: Optional[Path] = None,
+    deployment_service_account_name: Optional[str] = None,
+    watch: bool = False,
+    output_format: str = OUTPUT_FORMAT_YAML,
+    output_path: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+    profile: bool = False,
+    profile_output: Optional[Path] = None,
+    no_cache: bool = False,
+) -> None:
+    """
+    Render the Kubernetes manifest to the standard output.
+    """
+    if output_path is not None and output_dir is not None:
+        raise click.UsageError("--output and --output-dir are mutually exclusive")
+
+    if watch and (profile or profile_output is not None):
+        raise click.UsageError("--profile can't be used together with --watch")
+
+    context = make_context(
+        compose_file,
+        project_name,
+        repository_name,
+        branch_name,
+        default_image,
+        ingress_domain,
+        extra_manifest,
+        ingress_for_service,
+        ingress_tls_file,
+        deployment_annotations_file,
+        deployment_service_account_name,
+    )
+
+    if watch:
+        watch_manifest(context, output_format, output_path, output_dir)
+        return
+
+    if not profile and profile_output is None:
+        # Each item is written on its own file, not worth caching, and the stream formats would
+        # hold the whole manifest in memory to store it
+        if no_cache or output_dir is not None or output_format in OUTPUT_STREAM_FORMATS:
+            output_rendered_manifest(context, output_format, output_path, output_dir)
+        else:
+            output_cached_manifest(context, output_format, output_path)
+
+        return
+
+    # Profile the actual rendering
+    from komposer.profiling import profiling
+
+    with profiling() as profiler:
+        output_rendered_manifest(context, output_format, output_path, output_dir)
+
+    if profile_output is None:
+        click.echo(profiler.format_table(), err=True)
+    else:
+        profile_output.write_text(json.dumps(profiler.as_json(), indent=JSON_INDENT))
+
+
+def output_rendered_manifest(
+    context: Context,
+    output_format: str,
+    output_path: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+) -> None:
+    from komposer.cache import get_compose_cache
+    from komposer.core.base import (
+        generate_manifest_from_docker_compose,
+        iter_manifest_items,
+    )
+
+    if output_format in OUTPUT_STREAM_FORMATS or output_dir is not None:
+        output_manifest_items(
+            context,
+            iter_manifest_items(context, cache=get_compose_cache()),
+            output_format,
+            output_path,
+            output_dir,
+        )
+        return
+
+    manifest_data = generate_manifest_from_docker_compose(context, cache=get_compose_cache())
+
+    output_manifest(context, manifest_data, output_format, output_path)
+
+
+def iter_rendered_manifest_chunks(context: Context, output_format: str) -> Iterator[str]:
+    from komposer.cache import get_compose_cache
+    from komposer.core.base import (
+        generate_manifest_from_docker_compose,
+        iter_manifest_items,
+    )
+
+    if output_format in OUTPUT_STREAM_FORMATS:
+        yield from render_manifest_documents(
+            context, iter_manifest_items(context, cache=get_compose_cache()), output_format
+        )
+    else:
+        manifest_data = generate_manifest_from_docker_compose(context, cache=get_compose_cache())
+
+        yield render_raw_manifest(context, manifest_data, output_format)
+        yield "\n"
+
+
+def output_chunks(chunks: Iterable[str], output_path: Optional[Path] = None) -> None:
+    if output_path is None:
+        sys.stdout.writelines(chunks)
+        return
+
+    from komposer.utils import write_file_atomically
+
+    write_file_atomically(output_path, chunks)
+
+
+def output_cached_manifest(
+    context: Context, output_format: str, output_path: Optional[Path] = None
+) -> None:
+    """
+    Output the manifest rendered by a previous run if none of the inputs changed, otherwise
+    render it and store it into the render cache.
+    """
+    from komposer.cache import get_compose_cache, get_render_cache
+    from komposer.core.env_file import EnvFileRegistry
+    from komposer.utils import parse_docker_compose_file
+
+    render_cache = get_render_cache()
+    key = render_cache.make_key(context, output_format)
+    cached_output = render_cache.get(key)
+
+    if cached_output is not None:
+        output_chunks([cached_output], output_path)
+        return
+
+    chunks: list[str] = []
+
+    def collect(rendered_chunks: Iterable[str]) -> Iterator[str]:
+        # Stream the chunks while collecting them
+        for chunk in rendered_chunks:
+            chunks.append(chunk)
+            yield chunk
+
+    output_chunks(collect(iter_rendered_manifest_chunks(context, output_format)), output_path)
+
+    # The env files are known only once the Docker Compose file is parsed, which is cached by
+    # the render itself
+    try:
+        compose = parse_docker_compose_file(context.docker_compose_path, cache=get_compose_cache())
+    except OSError:
+        return
+
+    env_files = EnvFileRegistry(context.docker_compose_path)
+    env_file_paths = [
+        env_files.resolve(service.env_file)
+        for service in compose.services.values()
+        if service.env_file
+    ]
+
+    render_cache.set(key, "".join(chunks), env_file_paths)
+
+
+def watch_manifest(
+    context: Context,
+    output_format: str,
+    output_path: Optional[Path] = None,
+    output_dir: Optional[Path] = None,
+) -> None:
+    from komposer.core.watch import watch
+
+    def on_render(manifest: dict) -> None:
+        if output_format in OUTPUT_STREAM_FORMATS or output_dir is not None:
+            output_manifest_items(
+                context, manifest["items"], output_format, output_path, output_dir
+            )
+        else:
+            # Separate the renders as YAML documents, JSON documents are just concatenated
+            if output_path is None and output_format not in OUTPUT_JSON_FORMATS:
+                click.echo("---")
+
+            output_manifest(context, manifest, output_format, output_path)
+
+        sys.stdout.flush()
+
+    def on_error(error: Exception) -> None:
+        click.echo(f"Error: {error}", err=True)
+
+    try:
+        watch(context, on_render, on_error)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command()
+@click.argument("targets", type=click.File("r"), default="-")
 @click.option(
-    "--ingress-tls-file",
-    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
-    help=(
-        "Specify the filename containing the Ingress' TLS configuration as a YAML list. "
-        "It's your responsibility to make sure that it's a valid Kubernetes config fragment. "
-    ),
+    "--output-dir",
+    "-o",
+    required=True,
+    type=click.Path(file_okay=False, dir_okay=True, resolve_path=True, path_type=Path),
+    help="Directory where to write one manifest file for each target.",
 )
 @click.option(
-    "--ingress-domain",
-    default=DEFAULT_INGRESS_DOMAIN,
-    help=(
-        "Specify the top level domain to be used for the Ingress. "
-        f"Default is {DEFAULT_INGRESS_DOMAIN}"
-    ),
+    "--jobs",
+    "-j",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of processes rendering the manifests in parallel. Default is 1",
 )
+@docker_compose_options
+def batch(
+    targets: TextIO,
+    output_dir: Path,
+    jobs: int,
+    compose_file: Path,
+    default_image: str,
+    ingress_domain: str,
+    extra_manifest: Sequence[Path],
+    ingress_tls_file: Optional[Path] = None,
+    deployment_annotations_file: Optional[Path] = None,
+    deployment_service_account_name: Optional[str] = None,
+) -> None:
+    """
+    Render one Kubernetes manifest for each target listed in the TARGETS YAML file.
+
+    TARGETS is a YAML list of objects with the `repository_name`, `branch_name` and
+    optionally the `project_name` and `ingress_for_service` keys; reads from the standard
+    input if not given. Each manifest is written as `<manifest prefix>.yml` into the output
+    directory.
+    """
+    from komposer.core.batch import (
+        generate_manifests_from_docker_compose,
+        parse_batch_targets,
+        write_manifests_in_parallel,
+    )
+    from komposer.types.cli import Context, DeploymentContext, IngressContext
+    from komposer.utils import write_file_atomically
+
+    ingress = IngressContext(domain=ingress_domain, tls_path=ingress_tls_file)
+    deployment = DeploymentContext(
+        annotations_path=deployment_annotations_file,
+        service_account_name=deployment_service_account_name,
+    )
+    contexts = [
+        Context(
+            docker_compose_path=compose_file,
+            default_image=default_image,
+            extra_manifest_paths=list(extra_manifest),
+            ingress=ingress,
+            deployment=deployment,
+            **dict(target),
+        )
+        for target in parse_batch_targets(targets.read())
+    ]
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if jobs > 1 and len(contexts) > 1:
+        write_manifests_in_parallel(contexts, output_dir, jobs)
+        return
+
+    for context, manifest_data in generate_manifests_from_docker_compose(contexts):
+        output_path = output_dir / f"{context.manifest_prefix}.yml"
+        write_file_atomically(output_path, [render_raw_manifest(context, manifest_data)])
+
+
+@main.command()
 @click.option(
-    "--deployment-annotations-file",
-    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    "--against",
+    "previous_manifest",
+    required=True,
+    type=click.File("r"),
     help=(
-        "Specify the filename containing the extra Deployment's annotaions as a YAML object. "
-        "It's your responsibility to make sure that it's a valid Kubernetes config fragment. "
+        "Previously rendered manifest to compare with, in any of the output formats; "
+        "reads from the standard input if `-`."
     ),
 )
-@click.option(
-    "--deployment-service-account-name", help="Service account name to be used for the Deployment."
-)
-def main(
+@context_options
+@output_options
+@docker_compose_options
+def diff(
+    previous_manifest: TextIO,
     compose_file: Path,
     project_name: str,
     repository_name: str,
@@ -99,25 +617,133 @@ def main(
     ingress_tls_file: Optional[Path] = None,
     deployment_annotations_file: Optional[Path] = None,
     deployment_service_account_name: Optional[str] = None,
+    output_format: str = OUTPUT_FORMAT_YAML,
+    output_path: Optional[Path] = None,
 ) -> None:
-    context = Context(
-        docker_compose_path=compose_file,
-        project_name=project_name,
-        branch_name=branch_name,
-        repository_name=repository_name,
-        default_image=default_image,
-        ingress_for_service=ingress_for_service,
-        extra_manifest_paths=list(extra_manifest),
-        ingress=IngressContext(domain=ingress_domain, tls_path=ingress_tls_file),
-        deployment=DeploymentContext(
-            annotations_path=deployment_annotations_file,
-            service_account_name=deployment_service_account_name,
-        ),
+    """
+    Render the Kubernetes manifest and output only the items added or changed since the
+    previously rendered manifest.
+
+    The items are matched by their kind and name; the added, removed and changed items and
+    the changed fields are printed to the standard error.
+    """
+    from komposer.cache import get_compose_cache
+    from komposer.core.base import generate_manifest_from_docker_compose
+    from komposer.core.diff import (
+        diff_manifests,
+        format_diff,
+        get_manifest_items,
+        load_manifest_documents,
+    )
+    from komposer.core.render import dump_manifest, format_manifest_document
+
+    context = make_context(
+        compose_file,
+        project_name,
+        repository_name,
+        branch_name,
+        default_image,
+        ingress_domain,
+        extra_manifest,
+        ingress_for_service,
+        ingress_tls_file,
+        deployment_annotations_file,
+        deployment_service_account_name,
+    )
+
+    previous_items = get_manifest_items(load_manifest_documents(previous_manifest.read()))
+
+    # Compare with the manifest as it's output: the KOMPOSER_* variables are replaced in the
+    # text, which the YAML loader then re-types as the previous manifest's values
+    manifest = generate_manifest_from_docker_compose(context, cache=get_compose_cache())
+    current_items = get_manifest_items(
+        load_manifest_documents(render_raw_manifest(context, manifest, output_format))
     )
+    manifest_diff = diff_manifests(previous_items, current_items)
+
+    # The items have the KOMPOSER_* variables already replaced
+    chunks: Iterable[str]
+
+    if output_format in OUTPUT_STREAM_FORMATS:
+        chunks = (
+            format_manifest_document(dump_manifest(item, output_format), output_format)
+            for item in manifest_diff.applied_items
+        )
+    else:
+        chunks = [
+            dump_manifest({**manifest, "items": manifest_diff.applied_items}, output_format),
+            "\n",
+        ]
+
+    output_chunks(chunks, output_path)
+
+    diff_str = format_diff(manifest_diff)
+
+    if diff_str:
+        click.echo(diff_str, err=True)
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(file_okay=True, dir_okay=False, resolve_path=True, path_type=Path),
+    help="Listen on this Unix domain socket instead of a TCP port.",
+)
+@click.option(
+    "--host",
+    default=DEFAULT_SERVER_HOST,
+    help=f"Host to listen on. Default is {DEFAULT_SERVER_HOST}",
+)
+@click.option(
+    "--port",
+    default=DEFAULT_SERVER_PORT,
+    type=int,
+    help=f"TCP port to listen on. Default is {DEFAULT_SERVER_PORT}",
+)
+@click.option(
+    "--root",
+    type=click.Path(
+        exists=True, file_okay=False, dir_okay=True, resolve_path=True, path_type=Path
+    ),
+    help=(
+        "Render only the files within this directory, the requests for any other file are "
+        "refused. Default is the current working directory"
+    ),
+)
+def serve(
+    host: str, port: int, socket_path: Optional[Path] = None, root: Optional[Path] = None
+) -> None:
+    """
+    Run a render server which keeps the parsed Docker Compose files warm.
+
+    POST a JSON object with the same fields of the render context to `/render` to receive
+    the rendered manifest.
+    """
+    from contextlib import suppress
+
+    from komposer.server import make_server, remove_socket
+
+    try:
+        server = make_server(socket_path=socket_path, host=host, port=port, root=root)
+    except FileExistsError as e:
+        raise click.UsageError(str(e)) from e
+
+    address = socket_path or f"http://{host}:{port}"
+
+    click.echo(f"Listening on {address}", err=True)
 
-    manifest_data = generate_manifest_from_docker_compose(context)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
-    output_raw_manifest(context, manifest_data)
+        # Leave alone whatever replaced the socket meanwhile
+        if socket_path is not None:
+            with suppress(FileExistsError):
+                remove_socket(socket_path)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,15 @@
 import re
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
 
+from pydantic import BaseModel
 from yaml.parser import ParserError
 
+from komposer.cache import ComposeCache
 from komposer.core.config_map import generate_config_maps
 from komposer.core.deployment import generate_deployment
-from komposer.core.extra_manifest import load_extra_manifests
+from komposer.core.env_file import EnvFileRegistry
+from komposer.core.extra_manifest import iter_extra_manifests
 from komposer.core.ingress import generate_ingress_from_services
 from komposer.core.service import generate_services
 from komposer.exceptions import (
@@ -12,48 +17,92 @@ from komposer.exceptions import (
     ComposePortsNotUniqueError,
     DeploymentAnnotationsInvaliYamlError,
     DeploymentAnnotationsNotAMappingError,
+    DockerComposeNotSupportedError,
     IngressTlsInvalidYamlError,
     IngressTlsNotAListError,
     InvalidServiceNameError,
+    KomposerException,
 )
+from komposer.profiling import profile_stage
 from komposer.types import docker_compose, kubernetes
 from komposer.types.cli import Context
-from komposer.types.ports import Ports
 from komposer.utils import as_json_object, parse_docker_compose_file
 
 rfc_1123_re = re.compile(r"^[a-z0-9]([-a-z0-9]*[a-z0-9])?(\.[a-z0-9]([-a-z0-9]*[a-z0-9])?)*$")
 
 
-def ensure_service_name_lowercase_RFC_1123(compose: docker_compose.DockerCompose) -> None:
-    invalid_service_names = [
-        service_name
-        for service_name in compose.services.keys()
-        if not rfc_1123_re.match(service_name)
-    ]
-
-    if invalid_service_names:
-        raise InvalidServiceNameError(
-            f"Invalid lowercase RFC-4122 service names detected: {invalid_service_names}"
-        )
-
-
-def ensure_unique_ports_on_docker_compose(compose: docker_compose.DockerCompose) -> None:
-    non_unique_ports: dict[int, list[str]] = {}
+def find_docker_compose_errors(
+    compose: docker_compose.DockerCompose,
+) -> list[KomposerException]:
+    """
+    Check in a single pass over the services that the Docker Compose file is supported and
+    return all the violations found.
+    """
+    invalid_service_names = []
+    services_by_port: dict[int, list[str]] = {}
+    port_mapping_errors: list[KomposerException] = []
 
     for service_name, service in compose.services.items():
-        for port_str in service.ports:
-            port = Ports.from_string(port_str).container
+        if not rfc_1123_re.match(service_name):
+            invalid_service_names.append(service_name)
 
-            non_unique_ports.setdefault(port, []).append(service_name)
+        for ports_str, ports in service.ports_table:
+            services_by_port.setdefault(ports.container, []).append(service_name)
+
+            if not ports.same_ports():
+                port_mapping_errors.append(
+                    ComposePortsMappingNotSuportedError(
+                        f"Service {service_name} has a port mapping {ports_str} that is not supported"  # noqa: E501
+                    )
+                )
 
     non_unique_ports = {
         port: service_names
-        for port, service_names in non_unique_ports.items()
+        for port, service_names in services_by_port.items()
         if len(service_names) > 1
     }
 
+    errors: list[KomposerException] = []
+
     if non_unique_ports:
-        raise ComposePortsNotUniqueError(f"Non-unique ports detected: {non_unique_ports}")
+        errors.append(ComposePortsNotUniqueError(f"Non-unique ports detected: {non_unique_ports}"))
+
+    if invalid_service_names:
+        errors.append(
+            InvalidServiceNameError(
+                f"Invalid lowercase RFC-4122 service names detected: {invalid_service_names}"
+            )
+        )
+
+    errors.extend(port_mapping_errors)
+
+    return errors
+
+
+def _raise_docker_compose_error(
+    compose: docker_compose.DockerCompose, error_type: type[KomposerException]
+) -> None:
+    for error in find_docker_compose_errors(compose):
+        if isinstance(error, error_type):
+            raise error
+
+
+def ensure_docker_compose_is_supported(compose: docker_compose.DockerCompose) -> None:
+    errors = find_docker_compose_errors(compose)
+
+    if len(errors) == 1:
+        raise errors[0]
+
+    if errors:
+        raise DockerComposeNotSupportedError(errors)
+
+
+def ensure_service_name_lowercase_RFC_1123(compose: docker_compose.DockerCompose) -> None:
+    _raise_docker_compose_error(compose, InvalidServiceNameError)
+
+
+def ensure_unique_ports_on_docker_compose(compose: docker_compose.DockerCompose) -> None:
+    _raise_docker_compose_error(compose, ComposePortsNotUniqueError)
 
 
 def ensure_ingress_tls_is_valid_yaml(context: Context) -> None:
@@ -87,52 +136,79 @@ def ensure_deployment_annotations_is_valid_yaml(context: Context) -> None:
 
 
 def ensure_service_without_port_mapping(compose: docker_compose.DockerCompose) -> None:
-    for service_name, service in compose.services.items():
-        for ports_str in service.ports:
-            ports = Ports.from_string(ports_str)
-
-            if not ports.same_ports():
-                raise ComposePortsMappingNotSuportedError(
-                    f"Service {service_name} has a port mapping {ports_str} that is not supported"
-                )
-
-
-def generate_manifest_from_docker_compose(context: Context) -> dict:
-    # Parse docker compose file
-    compose = parse_docker_compose_file(context.docker_compose_path)
+    _raise_docker_compose_error(compose, ComposePortsMappingNotSuportedError)
+
+
+def iter_manifest_items(
+    context: Context,
+    compose: Optional[docker_compose.DockerCompose] = None,
+    env_files: Optional[EnvFileRegistry] = None,
+    extra_manifests_documents: Optional[Sequence[list[Any]]] = None,
+    cache: Optional[ComposeCache] = None,
+) -> Iterator[dict]:
+    """
+    Generate the manifest's items as JSON objects one at a time.
+
+    The inputs are validated before the first item is produced; the extra manifests are loaded
+    lazily one file at a time unless already loaded by the caller. The parsed Docker Compose
+    file is stored into `cache`, if given.
+    """
+    # Parse docker compose file unless already parsed by the caller
+    if compose is None:
+        with profile_stage("parse"):
+            compose = parse_docker_compose_file(context.docker_compose_path, cache=cache)
 
     # Ensures Docker Compose is supported
-    ensure_deployment_annotations_is_valid_yaml(context)
-    ensure_ingress_tls_is_valid_yaml(context)
-    ensure_unique_ports_on_docker_compose(compose)
-    ensure_service_name_lowercase_RFC_1123(compose)
-    ensure_service_without_port_mapping(compose)
+    with profile_stage("validation"):
+        ensure_deployment_annotations_is_valid_yaml(context)
+        ensure_ingress_tls_is_valid_yaml(context)
+        ensure_docker_compose_is_supported(compose)
+
+    # Parse each env file only once for both the configmaps and the containers
+    if env_files is None:
+        env_files = EnvFileRegistry(context.docker_compose_path)
 
     # Generate configmaps
-    config_maps = generate_config_maps(context, compose)
+    with profile_stage("config_maps"):
+        config_maps = generate_config_maps(context, compose, env_files)
 
     # Generate pod
-    deployment = generate_deployment(context, compose.services)
+    with profile_stage("deployment"):
+        deployment = generate_deployment(context, compose.services, env_files)
 
     # Generate services
-    services = generate_services(context, compose.services)
+    with profile_stage("services"):
+        services = generate_services(context, compose.services)
 
     # Generate ingress
-    ingress = generate_ingress_from_services(context, compose.services)
-
-    # Load external manifest
-    extra_manifest = load_extra_manifests(context)
+    with profile_stage("ingress"):
+        ingress = generate_ingress_from_services(context, compose.services)
 
-    # Return manifest
-    items = [*config_maps, deployment, *services]
+    items: list[BaseModel] = [*config_maps, deployment, *services]
 
     if ingress:
         items.append(ingress)
 
-    manifest = kubernetes.List(items=items)
+    with profile_stage("as_json_object"):
+        items_dicts = [as_json_object(item) for item in items]
+
+    yield from items_dicts
+
+    # Load external manifest
+    yield from iter_extra_manifests(context, extra_manifests_documents)
+
 
+def generate_manifest_from_docker_compose(
+    context: Context,
+    compose: Optional[docker_compose.DockerCompose] = None,
+    env_files: Optional[EnvFileRegistry] = None,
+    extra_manifests_documents: Optional[Sequence[list[Any]]] = None,
+    cache: Optional[ComposeCache] = None,
+) -> dict:
     # Convert to JSON object so that we can append the extra manifest as is
-    manifest_dict = as_json_object(manifest)
-    manifest_dict["items"].extend(extra_manifest)
+    manifest_dict = as_json_object(kubernetes.List())
+    manifest_dict["items"] = list(
+        iter_manifest_items(context, compose, env_files, extra_manifests_documents, cache)
+    )
 
     return manifest_dict
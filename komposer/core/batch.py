@@ -0,0 +1,143 @@
+import itertools
+import pickle
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from pydantic import ValidationError
+
+from komposer.cache import get_compose_cache
+from komposer.core.base import generate_manifest_from_docker_compose
+from komposer.core.extra_manifest import load_extra_manifest_file
+from komposer.core.render import render_raw_manifest
+from komposer.exceptions import BatchTargetsInvalidError
+from komposer.types import docker_compose
+from komposer.types.cli import BatchTarget, Context
+from komposer.utils import load_yaml, parse_docker_compose_file, write_file_atomically
+
+BATCH_CHUNKS_PER_JOB = 4
+
+
+def parse_batch_targets(source: Union[Path, str]) -> list[BatchTarget]:
+    content = load_yaml(source)
+
+    # Returns empty list if null
+    if content is None:
+        return []
+
+    if not isinstance(content, list):
+        raise BatchTargetsInvalidError("The batch targets must be a YAML list")
+
+    try:
+        targets = [BatchTarget.model_validate(item) for item in content]
+    except ValidationError as e:
+        raise BatchTargetsInvalidError(f"Invalid batch target: {e}") from e
+
+    return targets
+
+
+def generate_manifests_from_docker_compose(
+    contexts: Iterable[Context],
+) -> Iterator[tuple[Context, dict]]:
+    # Each Docker Compose file is parsed only once and shared between all the targets
+    composes: dict[Path, docker_compose.DockerCompose] = {}
+
+    for context in contexts:
+        compose = composes.get(context.docker_compose_path)
+
+        if compose is None:
+            compose = parse_docker_compose_file(
+                context.docker_compose_path, cache=get_compose_cache()
+            )
+            composes[context.docker_compose_path] = compose
+
+        yield context, generate_manifest_from_docker_compose(context, compose)
+
+
+class SharedInputs(NamedTuple):
+    """
+    The inputs shared by the targets, loaded once and sent once to each worker process.
+    """
+
+    composes: dict[Path, docker_compose.DockerCompose]
+    # Pickled, unpickling gives each target its own copy of the items to update cheaply
+    extra_manifests_documents: dict[Path, bytes]
+
+
+def load_shared_inputs(contexts: Iterable[Context]) -> SharedInputs:
+    composes: dict[Path, docker_compose.DockerCompose] = {}
+    extra_manifests_documents: dict[Path, bytes] = {}
+
+    for context in contexts:
+        if context.docker_compose_path not in composes:
+            composes[context.docker_compose_path] = parse_docker_compose_file(
+                context.docker_compose_path, cache=get_compose_cache()
+            )
+
+        for path in context.extra_manifest_paths:
+            if path not in extra_manifests_documents:
+                extra_manifests_documents[path] = pickle.dumps(load_extra_manifest_file(path))
+
+    return SharedInputs(composes, extra_manifests_documents)
+
+
+def write_manifest(context: Context, output_dir: Path, shared_inputs: SharedInputs) -> Path:
+    manifest = generate_manifest_from_docker_compose(
+        context,
+        shared_inputs.composes[context.docker_compose_path],
+        extra_manifests_documents=[
+            # Only what has been pickled by this process is unpickled
+            pickle.loads(shared_inputs.extra_manifests_documents[path])
+            for path in context.extra_manifest_paths
+        ],
+    )
+
+    output_path = output_dir / f"{context.manifest_prefix}.yml"
+    write_file_atomically(output_path, [render_raw_manifest(context, manifest)])
+
+    return output_path
+
+
+# Set in each worker process by `_init_worker()`
+_worker_shared_inputs: Optional[SharedInputs] = None
+
+
+def _init_worker(shared_inputs: SharedInputs) -> None:
+    global _worker_shared_inputs
+
+    _worker_shared_inputs = shared_inputs
+
+
+def _write_manifest_in_worker(context: Context, output_dir: Path) -> Path:
+    assert _worker_shared_inputs is not None, "Worker not initialised"
+
+    return write_manifest(context, output_dir, _worker_shared_inputs)
+
+
+def write_manifests_in_parallel(
+    contexts: Sequence[Context], output_dir: Path, jobs: int
+) -> list[Path]:
+    """
+    Render and write the manifests of the contexts in a pool of `jobs` processes, returning the
+    written files in the same order of the contexts.
+
+    The Docker Compose files and the extra manifests are parsed once in this process and
+    handed to each worker once, the workers write the manifests themselves so that only the
+    contexts and the paths go through the pool.
+    """
+    shared_inputs = load_shared_inputs(contexts)
+    # Big enough chunks to amortise the round-trips, small enough to balance the load
+    chunksize = max(1, len(contexts) // (jobs * BATCH_CHUNKS_PER_JOB))
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(shared_inputs,)
+    ) as executor:
+        return list(
+            executor.map(
+                _write_manifest_in_worker,
+                contexts,
+                itertools.repeat(output_dir),
+                chunksize=chunksize,
+            )
+        )
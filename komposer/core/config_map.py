@@ -5,9 +5,10 @@ from typing import Optional
 
 from dotenv import dotenv_values
 
+from komposer.core.env_file import EnvFileRegistry
 from komposer.types import docker_compose, kubernetes
 from komposer.types.cli import Context
-from komposer.utils import parse_env_file, to_kubernetes_name
+from komposer.utils import to_kubernetes_name
 
 
 def _generate_config_map_from_environment(
@@ -27,10 +28,9 @@ def _generate_config_map_from_environment(
 
 
 def _generate_config_map_from_env_file(
-    context: Context, env_file: Path
+    context: Context, env_file: Path, env_files: EnvFileRegistry
 ) -> Optional[kubernetes.ConfigMap]:
-    env_file_full_path = (context.docker_compose_path.parent / env_file).resolve()
-    env_vars = parse_env_file(env_file_full_path)
+    env_vars = env_files.get(env_file)
 
     if not env_vars:
         return None
@@ -44,20 +44,33 @@ def _generate_config_map_from_env_file(
     return config_map
 
 
+def generate_config_map(
+    context: Context,
+    service_name: str,
+    service: docker_compose.Service,
+    env_files: Optional[EnvFileRegistry] = None,
+) -> Optional[kubernetes.ConfigMap]:
+    if service.env_file:
+        env_files = env_files or EnvFileRegistry(context.docker_compose_path)
+
+        return _generate_config_map_from_env_file(context, service.env_file, env_files)
+
+    if service.environment:
+        return _generate_config_map_from_environment(context, service_name, service.environment)
+
+    return None
+
+
 def generate_config_maps(
-    context: Context, compose: docker_compose.DockerCompose
+    context: Context,
+    compose: docker_compose.DockerCompose,
+    env_files: Optional[EnvFileRegistry] = None,
 ) -> Iterable[kubernetes.ConfigMap]:
+    env_files = env_files or EnvFileRegistry(context.docker_compose_path)
     config_maps = {}
 
     for service_name, service in compose.services.items():
-        if service.env_file:
-            config_map = _generate_config_map_from_env_file(context, service.env_file)
-        elif service.environment:
-            config_map = _generate_config_map_from_environment(
-                context, service_name, service.environment
-            )
-        else:
-            config_map = None
+        config_map = generate_config_map(context, service_name, service, env_files)
 
         if config_map:
             config_maps[config_map.metadata.name] = config_map
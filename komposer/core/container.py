@@ -1,10 +1,12 @@
 import itertools
 from collections.abc import Iterable
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
+from komposer.core.env_file import EnvFileRegistry
 from komposer.types import docker_compose, kubernetes
 from komposer.types.cli import Context
+from komposer.types.ports import PortsTable
 from komposer.utils import command_to_args, to_kubernetes_name
 
 
@@ -20,47 +22,58 @@ def generate_container_environment_from_environment(
 
 
 def generate_container_environment_from_env_file(
-    context: Context, env_file: Path
+    context: Context, env_file: Path, env_files: EnvFileRegistry
 ) -> Iterable[kubernetes.ConfigMapEnvironmentVariable]:
-    env_vars = kubernetes.ConfigMapEnvironmentVariable.from_env_file(
-        context.manifest_prefix, context.docker_compose_path.parent, env_file
+    env_vars = kubernetes.ConfigMapEnvironmentVariable.from_env_vars(
+        context.manifest_prefix, env_file, env_files.get(env_file)
     )
 
     return env_vars
 
 
 def generate_container_environment(
-    context: Context, service: docker_compose.Service
+    context: Context,
+    service: docker_compose.Service,
+    env_files: Optional[EnvFileRegistry] = None,
 ) -> Iterable[Union[kubernetes.EnvironmentVariable, kubernetes.ConfigMapEnvironmentVariable]]:
     if service.environment:
         return generate_container_environment_from_environment(service.environment)
 
     if service.env_file:
-        return generate_container_environment_from_env_file(context, service.env_file)
+        env_files = env_files or EnvFileRegistry(context.docker_compose_path)
+
+        return generate_container_environment_from_env_file(context, service.env_file, env_files)
 
     return []
 
 
-def generate_containter_ports(ports: list[str]) -> list[kubernetes.ContainerPort]:
-    return [kubernetes.ContainerPort.from_string(port) for port in ports]
+def generate_containter_ports(ports_table: PortsTable) -> list[kubernetes.ContainerPort]:
+    return [kubernetes.ContainerPort.from_ports(ports) for _, ports in ports_table]
 
 
 def generate_container(
-    context: Context, service_name: str, service: docker_compose.Service
+    context: Context,
+    service_name: str,
+    service: docker_compose.Service,
+    env_files: Optional[EnvFileRegistry] = None,
 ) -> kubernetes.Container:
     return kubernetes.Container(
         image=service.image or context.default_image,
         name=to_kubernetes_name(service_name),
         args=command_to_args(service.command),
-        env=list(generate_container_environment(context, service)),
-        ports=generate_containter_ports(service.ports),
+        env=list(generate_container_environment(context, service, env_files)),
+        ports=generate_containter_ports(service.ports_table),
     )
 
 
 def generate_containers(
-    context: Context, services: docker_compose.Services
+    context: Context,
+    services: docker_compose.Services,
+    env_files: Optional[EnvFileRegistry] = None,
 ) -> list[kubernetes.Container]:
+    env_files = env_files or EnvFileRegistry(context.docker_compose_path)
+
     return [
-        generate_container(context, service_name, service)
+        generate_container(context, service_name, service, env_files)
         for service_name, service in services.items()
     ]
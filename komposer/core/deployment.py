@@ -1,6 +1,8 @@
 from ipaddress import IPv4Address
+from typing import Optional
 
 from komposer.core.container import generate_containers
+from komposer.core.env_file import EnvFileRegistry
 from komposer.types import docker_compose, kubernetes
 from komposer.types.cli import Context
 
@@ -18,10 +20,16 @@ def generate_host_aliases(services: docker_compose.Services) -> list[kubernetes.
 
 
 def generate_deployment(
-    context: Context, services: docker_compose.Services
+    context: Context,
+    services: docker_compose.Services,
+    env_files: Optional[EnvFileRegistry] = None,
+    containers: Optional[list[kubernetes.Container]] = None,
 ) -> kubernetes.Deployment:
     host_aliases = generate_host_aliases(services)
-    containers = generate_containers(context, services)
+
+    # The containers may have been generated already, one by one
+    if containers is None:
+        containers = generate_containers(context, services, env_files)
     metadata = kubernetes.Metadata.from_context_with_name(context, context.deployment.annotations)
 
     deployment = kubernetes.Deployment(
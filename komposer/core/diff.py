@@ -0,0 +1,132 @@
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any, NamedTuple
+
+import yaml
+
+from komposer.core.extra_manifest import get_items_from_extra_manifest
+from komposer.utils import YamlLoader
+
+# Placeholder for the values present only on one side of the diff
+MISSING: Any = object()
+
+ItemKey = tuple[str, str]
+
+
+class Change(NamedTuple):
+    path: str
+    previous: Any
+    current: Any
+
+
+class ManifestDiff(NamedTuple):
+    added: list[dict]
+    removed: list[dict]
+    changed: list[tuple[dict, list[Change]]]
+
+    @property
+    def applied_items(self) -> list[dict]:
+        """
+        The items to apply to bring the cluster from the previous manifest to the current one.
+        """
+        return [*self.added, *(item for item, _ in self.changed)]
+
+
+def get_item_key(item: dict) -> ItemKey:
+    return str(item.get("kind")), str(item.get("metadata", {}).get("name"))
+
+
+def load_manifest_documents(content: str) -> list[Any]:
+    """
+    Load the documents of a manifest rendered in any of the output formats: newline delimited
+    JSON has one document per line, the other formats are valid YAML.
+    """
+    lines = [line for line in content.splitlines() if line.strip()]
+
+    if lines and all(line.lstrip().startswith("{") for line in lines):
+        try:
+            return [json.loads(line) for line in lines]
+        except json.JSONDecodeError:
+            # An indented JSON object
+            pass
+
+    # Always a safe loader
+    return list(yaml.load_all(content, Loader=YamlLoader))
+
+
+def get_manifest_items(documents: Iterable[Any]) -> list[dict]:
+    """
+    Get the items of a manifest in any of the formats rendered by Komposer, i.e. a Kubernetes
+    List, a stream of YAML documents or newline delimited JSON.
+    """
+    return [item for document in documents for item in get_items_from_extra_manifest(document)]
+
+
+def iter_changes(previous: Any, current: Any, path: str = "") -> Iterator[Change]:
+    if isinstance(previous, dict) and isinstance(current, dict):
+        for key in [*previous, *(key for key in current if key not in previous)]:
+            yield from iter_changes(
+                previous.get(key, MISSING), current.get(key, MISSING), f"{path}.{key}"
+            )
+    elif isinstance(previous, list) and isinstance(current, list):
+        for index in range(max(len(previous), len(current))):
+            yield from iter_changes(
+                previous[index] if index < len(previous) else MISSING,
+                current[index] if index < len(current) else MISSING,
+                f"{path}[{index}]",
+            )
+    elif previous != current or type(previous) is not type(current):
+        yield Change(path.lstrip("."), previous, current)
+
+
+def diff_manifests(previous_items: Iterable[dict], current_items: Iterable[dict]) -> ManifestDiff:
+    """
+    Compare the items of two manifests by their kind and name, keeping the order of the current
+    manifest for the added and changed items.
+    """
+    previous_items_by_key = {get_item_key(item): item for item in previous_items}
+    current_keys = set()
+    diff = ManifestDiff(added=[], removed=[], changed=[])
+
+    for item in current_items:
+        key = get_item_key(item)
+        current_keys.add(key)
+        previous_item = previous_items_by_key.get(key)
+
+        if previous_item is None:
+            diff.added.append(item)
+            continue
+
+        changes = list(iter_changes(previous_item, item))
+
+        if changes:
+            diff.changed.append((item, changes))
+
+    diff.removed.extend(
+        item for key, item in previous_items_by_key.items() if key not in current_keys
+    )
+
+    return diff
+
+
+def format_value(value: Any) -> str:
+    return "(missing)" if value is MISSING else json.dumps(value)
+
+
+def format_diff(diff: ManifestDiff) -> str:
+    lines = []
+
+    for item in diff.added:
+        lines.append("+ {}/{}".format(*get_item_key(item)))
+
+    for item in diff.removed:
+        lines.append("- {}/{}".format(*get_item_key(item)))
+
+    for item, changes in diff.changed:
+        lines.append("~ {}/{}".format(*get_item_key(item)))
+        lines.extend(
+            f"    {change.path}: {format_value(change.previous)} -> {format_value(change.current)}"
+            for change in changes
+        )
+
+    return "\n".join(lines)
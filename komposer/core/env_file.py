@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from komposer.types import docker_compose
+from komposer.utils import parse_env_file
+
+
+class EnvFileRegistry:
+    """
+    Parses each env file referenced by the Docker Compose services only once per render, so
+    that the ConfigMaps and the containers' environments share the same parsed variables.
+    """
+
+    def __init__(self, docker_compose_path: Path) -> None:
+        self.base_path = docker_compose_path.parent
+        self._env_files: dict[Path, docker_compose.EnvironmentMap] = {}
+
+    def resolve(self, env_file: Path) -> Path:
+        return (self.base_path / env_file).resolve()
+
+    def get(self, env_file: Path) -> docker_compose.EnvironmentMap:
+        env_file_full_path = self.resolve(env_file)
+        env_vars = self._env_files.get(env_file_full_path)
+
+        if env_vars is None:
+            env_vars = parse_env_file(env_file_full_path)
+            self._env_files[env_file_full_path] = env_vars
+
+        return env_vars
@@ -1,6 +1,7 @@
-import os
+from collections.abc import Callable, Mapping
+from typing import Any, Optional
 
-from komposer.envsubst import envsubst
+from komposer.envsubst import envsubst, resolve_variables, substitute
 from komposer.types.cli import Context
 
 
@@ -18,22 +19,54 @@ komposer_env_variables_map = {
 }
 
 
-def replace_komposer_env_variables(context: Context, manifest_str: str) -> str:
-    # Store original values of the env variables
-    original_environ = os.environ.copy()
+def get_komposer_env_variables(context: Context) -> dict[str, str]:
+    return {env_name: env_fn(context) for env_name, env_fn in komposer_env_variables_map.items()}
 
-    try:
-        # Inject all the env variables
-        for env_name, env_fn in komposer_env_variables_map.items():
-            env_value = env_fn(context)
-            os.environ[env_name] = env_value
 
-        # Render the new manifest
-        manifest_str = envsubst(manifest_str)
+def resolve_komposer_env_variables(
+    context: Context, escape: Optional[Callable[[str], str]] = None
+) -> dict[str, str]:
+    """
+    Resolve the KOMPOSER_* variables once per render, the context's ones take precedence over
+    the process' environment.
+    """
+    return resolve_variables(get_komposer_env_variables(context), escape=escape)
 
-    finally:
-        # Restore original environment
-        os.environ.clear()
-        os.environ.update(original_environ)
 
-    return manifest_str
+def replace_komposer_env_variables(
+    context: Context,
+    manifest_str: str,
+    escape: Optional[Callable[[str], str]] = None,
+    resolved_variables: Optional[Mapping[str, str]] = None,
+) -> str:
+    """
+    Replace the KOMPOSER_* variables in the string, using the variables resolved by
+    `resolve_komposer_env_variables()` if given; they must have been escaped already.
+    """
+    # Render the new manifest without touching the process' environment
+    if resolved_variables is None:
+        return envsubst(manifest_str, get_komposer_env_variables(context), escape=escape)
+
+    return substitute(manifest_str, resolved_variables)
+
+
+def replace_komposer_env_variables_in_object(context: Context, data: Any) -> Any:
+    """
+    Same as `replace_komposer_env_variables()` but on the keys and values of a JSON object,
+    returning a copy of it.
+    """
+    variables = resolve_komposer_env_variables(context)
+
+    def replace(value: Any) -> Any:
+        if isinstance(value, str):
+            return substitute(value, variables)
+
+        if isinstance(value, dict):
+            return {replace(key): replace(item) for key, item in value.items()}
+
+        if isinstance(value, list):
+            return [replace(item) for item in value]
+
+        return value
+
+    return replace(data)
@@ -1,15 +1,34 @@
 import itertools
-from collections.abc import Mapping, Sequence
-from typing import Any, Union
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import Callable, Generator, Iterator, Mapping, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, closing
+from functools import partial
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import yaml
 
 from komposer.exceptions import (
     ExtraManifestInvalidYamlError,
     ExtraManifestMissingMetadataError,
     ExtraManifestMissingNameError,
 )
+from komposer.profiling import profile_stage
 from komposer.types import kubernetes
 from komposer.types.cli import Context
-from komposer.utils import load_yaml
+from komposer.utils import YamlLoader
+
+EXTRA_MANIFEST_MAX_WORKERS = 8
+# Files smaller than this are parsed faster than the cost of sending them to another process
+EXTRA_MANIFEST_PROCESS_POOL_MIN_SIZE = 4 * 1024 * 1024
+# Files larger than this are streamed one document at a time instead of being loaded at once
+EXTRA_MANIFEST_STREAM_MIN_SIZE = 16 * 1024 * 1024
+
+# Returns the parsed documents of an extra manifest file, or part of them
+DocumentsLoader = Callable[[], list[Any]]
 
 
 def update_item_metadata_labels(item: Mapping, labels: Mapping) -> None:
@@ -68,40 +87,142 @@ def ensure_metadata_is_present(extra_manifest_items: Sequence[Mapping[str, Any]]
             )
 
 
-def load_extra_manifests(context: Context) -> list[dict]:
-    # Skip if no extra manifest
-    if context.extra_manifest_paths is None:
-        return []
+def load_extra_manifest_file(extra_manifest_path: Path) -> list[Any]:
+    with extra_manifest_path.open("rb") as stream:
+        # Always a safe loader
+        return list(yaml.load_all(stream, Loader=YamlLoader))
+
+
+def iter_extra_manifest_file_documents(extra_manifest_path: Path) -> Iterator[DocumentsLoader]:
+    """
+    Stream the documents of the extra manifest file, yielding for each document a function
+    parsing it so the caller can account for the parsing. Only the document being parsed is kept
+    in memory.
+    """
+    with extra_manifest_path.open("rb") as stream:
+        loader = YamlLoader(stream)
+
+        try:
+            while loader.check_data():
+                yield lambda: [loader.get_data()]
+        finally:
+            loader.dispose()
+
+
+def iter_extra_manifest_documents(
+    extra_manifest_paths: Sequence[Path], max_workers: int = EXTRA_MANIFEST_MAX_WORKERS
+) -> Generator[DocumentsLoader, None, None]:
+    """
+    Load and parse the extra manifest files concurrently, yielding in the original order the
+    functions returning their documents.
+
+    The files are read in a thread pool while the large files, whose parsing is CPU bound and
+    holds the GIL, are parsed in a process pool when there are at least two of them. At most
+    `max_workers` files are loaded ahead of the consumer to bound the memory.
+
+    A single file, or a file too large to be kept in memory, is streamed one document at a time
+    once the consumer gets to it instead.
+    """
+    if len(extra_manifest_paths) <= 1:
+        for path in extra_manifest_paths:
+            yield from iter_extra_manifest_file_documents(path)
+
+        return
+
+    sizes = {path: path.stat().st_size for path in extra_manifest_paths}
+    large_paths = {
+        path
+        for path, size in sizes.items()
+        if EXTRA_MANIFEST_PROCESS_POOL_MIN_SIZE <= size < EXTRA_MANIFEST_STREAM_MIN_SIZE
+    }
+    use_processes = len(large_paths) > 1
+
+    with ExitStack() as stack:
+        threads = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+        processes: Optional[Executor] = None
+
+        if use_processes:
+            # Don't fork, the process may be running other threads, i.e. in server mode
+            processes = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=min(len(large_paths), os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            )
 
-    # Load manifest
-    extra_manifests_str = (
-        extra_manifest_path.read_text() for extra_manifest_path in context.extra_manifest_paths
-    )
+        def submit(path: Path) -> "tuple[Path, Optional[Future[list[Any]]]]":
+            # Streamed when the consumer gets to it
+            if sizes[path] >= EXTRA_MANIFEST_STREAM_MIN_SIZE:
+                return path, None
 
-    # Parse manifest
-    extra_manifests_raw = (
-        load_yaml(extra_manifest_str) for extra_manifest_str in extra_manifests_str
-    )
+            executor = processes if processes is not None and path in large_paths else threads
 
-    # Just validate that the format of the file
-    extra_manifest_items = list(
-        itertools.chain(
-            *(
-                get_items_from_extra_manifest(extra_manifest_raw)
-                for extra_manifest_raw in extra_manifests_raw
-            )
-        )
-    )
+            return path, executor.submit(load_extra_manifest_file, path)
+
+        paths = iter(extra_manifest_paths)
+        pending = deque(submit(path) for path in itertools.islice(paths, max_workers))
+
+        while pending:
+            path, future = pending.popleft()
+
+            next_path = next(paths, None)
 
-    ensure_metadata_is_present(extra_manifest_items)
+            if next_path is not None:
+                pending.append(submit(next_path))
+
+            if future is None:
+                yield from iter_extra_manifest_file_documents(path)
+            else:
+                yield future.result
+
+
+def iter_extra_manifests(
+    context: Context, extra_manifests_documents: Optional[Sequence[list[Any]]] = None
+) -> Iterator[dict]:
+    """
+    Load the extra manifests concurrently but process them one file, or one document of the
+    streamed files, at a time so that only a few files' items are in memory at once when the
+    items are consumed as they are produced.
+
+    The documents of each extra manifest file can be given if already loaded.
+    """
+    # Skip if no extra manifest
+    if context.extra_manifest_paths is None:
+        return
 
-    # Update metadata labels and names and env's configmap names
     labels = kubernetes.Metadata.labels_from_context(context)
     manifest_prefix = context.manifest_prefix
+    documents_loaders: Generator[DocumentsLoader, None, None]
+
+    if extra_manifests_documents is None:
+        documents_loaders = iter_extra_manifest_documents(context.extra_manifest_paths)
+    else:
+        documents_loaders = (partial(list, documents) for documents in extra_manifests_documents)
 
-    for item in extra_manifest_items:
-        update_item_metadata_labels(item, labels)
-        update_item_metadata_name(item, manifest_prefix)
-        update_item_env_configmapkeyref_name(item, manifest_prefix)
+    # Stop loading the files ahead if the consumer stops early
+    with closing(documents_loaders):
+        for load_documents in documents_loaders:
+            with profile_stage("extra_manifests"):
+                # Wait for the documents to be loaded and parsed
+                documents = load_documents()
 
-    return extra_manifest_items
+                # Just validate that the format of the file
+                extra_manifest_items = [
+                    item
+                    for document in documents
+                    for item in get_items_from_extra_manifest(document)
+                ]
+
+                ensure_metadata_is_present(extra_manifest_items)
+
+                # Update metadata labels and names and env's configmap names
+                for item in extra_manifest_items:
+                    update_item_metadata_labels(item, labels)
+                    update_item_metadata_name(item, manifest_prefix)
+                    update_item_env_configmapkeyref_name(item, manifest_prefix)
+
+            yield from extra_manifest_items
+
+
+def load_extra_manifests(context: Context) -> list[dict]:
+    return list(iter_extra_manifests(context))
@@ -4,6 +4,7 @@ from typing import Optional
 from komposer.exceptions import ServiceNotFoundError
 from komposer.types import docker_compose, kubernetes
 from komposer.types.cli import Context
+from komposer.types.ports import Ports
 from komposer.utils import to_kubernetes_name
 
 DEFAULT_INGRESS_ANNOTATIONS: kubernetes.Annotations = {
@@ -12,9 +13,9 @@ DEFAULT_INGRESS_ANNOTATIONS: kubernetes.Annotations = {
 
 
 def generate_ingress_path(
-    context: Context, service_name: str, service_port: str
+    context: Context, service_name: str, service_ports: Ports
 ) -> kubernetes.HttpPath:
-    service_ref_port = kubernetes.ServiceRefPort.from_string(service_port)
+    service_ref_port = kubernetes.ServiceRefPort.from_ports(service_ports)
     service_name_kubernetes = to_kubernetes_name(service_name)
 
     http_path = kubernetes.HttpPath(
@@ -59,7 +60,8 @@ def generate_ingress_from_services(
     )
     host = generate_ingress_host(context)
     paths = [
-        generate_ingress_path(context, context.ingress_for_service, port) for port in service.ports
+        generate_ingress_path(context, context.ingress_for_service, ports)
+        for _, ports in service.ports_table
     ]
 
     ingress = kubernetes.Ingress(
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from komposer.types.cli import Context
+
+# NOTE: the CLI imports the defaults and the output formats at module level, the serialisation
+# dependencies are imported within the functions to keep its start up fast.
+
+# Defaults shared by the CLI and the render server
+DEFAULT_DOCKER_IMAGE = "${IMAGE}"
+DEFAULT_INGRESS_DOMAIN = "svc.cluster.local"
+DEFAULT_SERVER_HOST = "127.0.0.1"
+DEFAULT_SERVER_PORT = 8000
+
+OUTPUT_FORMAT_YAML = "yaml"
+OUTPUT_FORMAT_YAML_STREAM = "yaml-stream"
+OUTPUT_FORMAT_JSON = "json"
+OUTPUT_FORMAT_NDJSON = "ndjson"
+OUTPUT_FORMATS = [
+    OUTPUT_FORMAT_YAML,
+    OUTPUT_FORMAT_YAML_STREAM,
+    OUTPUT_FORMAT_JSON,
+    OUTPUT_FORMAT_NDJSON,
+]
+OUTPUT_STREAM_FORMATS = [OUTPUT_FORMAT_YAML_STREAM, OUTPUT_FORMAT_NDJSON]
+OUTPUT_JSON_FORMATS = [OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_NDJSON]
+JSON_INDENT = 2
+
+
+def dump_manifest(manifest: dict, output_format: str = OUTPUT_FORMAT_YAML) -> str:
+    from komposer.profiling import profile_stage
+    from komposer.utils import dump_json, dump_yaml
+
+    if output_format in OUTPUT_JSON_FORMATS:
+        # Newline delimited JSON must stay on a single line
+        indent = JSON_INDENT if output_format == OUTPUT_FORMAT_JSON else None
+
+        with profile_stage("dump_json"):
+            return dump_json(manifest, indent=indent)
+
+    with profile_stage("dump_yaml"):
+        return dump_yaml(manifest)
+
+
+def resolve_output_variables(
+    context: Context, output_format: str = OUTPUT_FORMAT_YAML
+) -> dict[str, str]:
+    """
+    Resolve the KOMPOSER_* variables once for all the items rendered in the output format.
+    """
+    from komposer.core.env_vars import resolve_komposer_env_variables
+    from komposer.utils import escape_json_string
+
+    # Keep the JSON documents valid
+    escape = escape_json_string if output_format in OUTPUT_JSON_FORMATS else None
+
+    return resolve_komposer_env_variables(context, escape=escape)
+
+
+def render_raw_manifest(
+    context: Context,
+    manifest: dict,
+    output_format: str = OUTPUT_FORMAT_YAML,
+    variables: Optional[Mapping[str, str]] = None,
+) -> str:
+    from komposer.core.env_vars import replace_komposer_env_variables
+    from komposer.profiling import profile_stage
+
+    # Convert manifest to string and render KOMPOSER_* vars
+    output = dump_manifest(manifest, output_format)
+
+    with profile_stage("env_substitution"):
+        if variables is None:
+            variables = resolve_output_variables(context, output_format)
+
+        return replace_komposer_env_variables(context, output, resolved_variables=variables)
+
+
+def render_manifest_item(
+    context: Context,
+    item: dict,
+    output_format: str = OUTPUT_FORMAT_YAML,
+    variables: Optional[Mapping[str, str]] = None,
+) -> str:
+    # Render KOMPOSER_* vars of each item on its own
+    return render_raw_manifest(context, item, output_format, variables)
+
+
+def render_manifest_documents(
+    context: Context, items: Iterable[dict], output_format: str = OUTPUT_FORMAT_YAML_STREAM
+) -> Iterator[str]:
+    variables = resolve_output_variables(context, output_format)
+
+    for item in items:
+        yield format_manifest_document(
+            render_manifest_item(context, item, output_format, variables), output_format
+        )
+
+
+def format_manifest_document(document: str, output_format: str = OUTPUT_FORMAT_YAML_STREAM) -> str:
+    # One JSON object per line, or one YAML document each
+    if output_format in OUTPUT_JSON_FORMATS:
+        return f"{document}\n"
+
+    return f"---\n{document}"
+
+
+def get_manifest_item_filename(item: dict, output_format: str = OUTPUT_FORMAT_YAML) -> str:
+    kind = str(item.get("kind", "item")).lower()
+    extension = "json" if output_format in OUTPUT_JSON_FORMATS else "yml"
+
+    return f"{kind}-{item['metadata']['name']}.{extension}"
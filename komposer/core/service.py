@@ -1,9 +1,10 @@
 from komposer.types import docker_compose, kubernetes
 from komposer.types.cli import Context
+from komposer.types.ports import PortsTable
 
 
-def generate_service_ports(ports: list[str]) -> list[kubernetes.ServicePort]:
-    return [kubernetes.ServicePort.from_string(port) for port in ports]
+def generate_service_ports(ports_table: PortsTable) -> list[kubernetes.ServicePort]:
+    return [kubernetes.ServicePort.from_ports(port, ports) for port, ports in ports_table]
 
 
 def generate_service(
@@ -13,7 +14,7 @@ def generate_service(
     k8s_service = kubernetes.Service(
         metadata=metadata,
         spec=kubernetes.ServiceSpec(
-            ports=generate_service_ports(service.ports), selector=metadata.labels
+            ports=generate_service_ports(service.ports_table), selector=metadata.labels
         ),
     )
 
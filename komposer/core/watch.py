@@ -0,0 +1,264 @@
+import threading
+from collections.abc import Callable, Iterable
+from functools import partial
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel, ValidationError
+from yaml import YAMLError
+
+from komposer.core.base import (
+    ensure_deployment_annotations_is_valid_yaml,
+    ensure_docker_compose_is_supported,
+    ensure_ingress_tls_is_valid_yaml,
+)
+from komposer.core.config_map import generate_config_map
+from komposer.core.container import generate_container
+from komposer.core.deployment import generate_deployment
+from komposer.core.env_file import EnvFileRegistry
+from komposer.core.extra_manifest import load_extra_manifests
+from komposer.core.ingress import generate_ingress_from_services
+from komposer.core.service import generate_services
+from komposer.exceptions import KomposerException
+from komposer.types import docker_compose, kubernetes
+from komposer.types.cli import Context
+from komposer.utils import (
+    FileSignature,
+    as_json_object,
+    get_file_signature,
+    parse_docker_compose_file,
+)
+
+DEFAULT_WATCH_INTERVAL = 0.05
+
+# None when the file doesn't exist, it might be created later
+InputSignature = Optional[FileSignature]
+
+
+def get_input_signature(path: Path) -> InputSignature:
+    try:
+        return get_file_signature(path)
+    except OSError:
+        return None
+
+
+class IncrementalRenderer:
+    """
+    Renders the manifest of a context over and over, regenerating only the items whose
+    input files changed since the previous render.
+
+    The manifest is split in stages, each one depending on a known set of files:
+
+    - the ConfigMap and the container of each service depend on the Docker Compose file and
+      the service's env file, if any
+    - the Deployment depends on the Docker Compose file, the env files and the Deployment's
+      annotations file, it reuses the containers of the services whose files didn't change
+    - the Services depend on the Docker Compose file
+    - the Ingress depends on the Docker Compose file and the Ingress' TLS file
+    - the extra items depend on the extra manifest files
+
+    The returned manifest is the same `generate_manifest_from_docker_compose()` returns; its
+    items are shared between renders and must not be mutated.
+    """
+
+    def __init__(self, context: Context) -> None:
+        self.context = context
+        self.compose: Optional[docker_compose.DockerCompose] = None
+        self._stages: dict[str, tuple[tuple[InputSignature, ...], Any]] = {}
+        self._stage_names: set[str] = set()
+
+    @property
+    def env_file_paths(self) -> list[Path]:
+        if self.compose is None:
+            return []
+
+        env_files = EnvFileRegistry(self.context.docker_compose_path)
+
+        return [
+            env_files.resolve(service.env_file)
+            for service in self.compose.services.values()
+            if service.env_file
+        ]
+
+    @property
+    def input_paths(self) -> list[Path]:
+        """
+        All the files the manifest depends on, the env files are known only once the Docker
+        Compose file has been parsed.
+        """
+        return [
+            self.context.docker_compose_path,
+            *self.env_file_paths,
+            *self.context.extra_manifest_paths,
+            *self.ingress_tls_paths,
+            *self.deployment_annotations_paths,
+        ]
+
+    @property
+    def ingress_tls_paths(self) -> list[Path]:
+        tls_path = self.context.ingress.tls_path
+
+        return [] if tls_path is None else [tls_path]
+
+    @property
+    def deployment_annotations_paths(self) -> list[Path]:
+        annotations_path = self.context.deployment.annotations_path
+
+        return [] if annotations_path is None else [annotations_path]
+
+    def get_input_signatures(self) -> dict[Path, InputSignature]:
+        return {path: get_input_signature(path) for path in self.input_paths}
+
+    def _run_stage(self, name: str, paths: Iterable[Path], function: Callable[[], Any]) -> Any:
+        self._stage_names.add(name)
+        signatures = tuple(get_input_signature(path) for path in paths)
+        cached = self._stages.get(name)
+
+        if cached is not None and cached[0] == signatures:
+            return cached[1]
+
+        result = function()
+        self._stages[name] = (signatures, result)
+
+        return result
+
+    def _parse_docker_compose(self) -> docker_compose.DockerCompose:
+        compose = parse_docker_compose_file(self.context.docker_compose_path)
+        ensure_docker_compose_is_supported(compose)
+
+        return compose
+
+    def render(self) -> dict:
+        context = self.context
+        self._stage_names = set()
+
+        # The files are loaded only once until they change, validating them is cheap
+        ensure_deployment_annotations_is_valid_yaml(context)
+        ensure_ingress_tls_is_valid_yaml(context)
+
+        compose_path = context.docker_compose_path
+        compose: docker_compose.DockerCompose = self._run_stage(
+            "compose", [compose_path], self._parse_docker_compose
+        )
+        self.compose = compose
+
+        # Shared by the stages of all the services that need to be regenerated
+        env_files = EnvFileRegistry(compose_path)
+        env_file_paths = self.env_file_paths
+
+        def dump_items(items: Iterable[Optional[BaseModel]]) -> list[dict]:
+            return [as_json_object(item) for item in items if item]
+
+        def dump_config_map(service_name: str, service: docker_compose.Service) -> list[dict]:
+            return dump_items([generate_config_map(context, service_name, service, env_files)])
+
+        # Editing an env file regenerates only the items of the services using it
+        config_maps: dict[str, dict] = {}
+        containers = []
+
+        for service_name, service in compose.services.items():
+            service_paths = [compose_path]
+
+            if service.env_file:
+                service_paths.append(env_files.resolve(service.env_file))
+
+            for config_map in self._run_stage(
+                f"config_map:{service_name}",
+                service_paths,
+                partial(dump_config_map, service_name, service),
+            ):
+                # The services sharing an env file share its ConfigMap as well
+                config_maps[config_map["metadata"]["name"]] = config_map
+
+            containers.append(
+                self._run_stage(
+                    f"container:{service_name}",
+                    service_paths,
+                    partial(generate_container, context, service_name, service, env_files),
+                )
+            )
+
+        deployment = self._run_stage(
+            "deployment",
+            [compose_path, *env_file_paths, *self.deployment_annotations_paths],
+            lambda: dump_items(
+                [generate_deployment(context, compose.services, env_files, containers)]
+            ),
+        )
+        services = self._run_stage(
+            "services",
+            [compose_path],
+            lambda: dump_items(generate_services(context, compose.services)),
+        )
+        ingress = self._run_stage(
+            "ingress",
+            [compose_path, *self.ingress_tls_paths],
+            lambda: dump_items([generate_ingress_from_services(context, compose.services)]),
+        )
+        extra_manifest = self._run_stage(
+            "extra_manifest",
+            context.extra_manifest_paths,
+            lambda: load_extra_manifests(context),
+        )
+
+        # Forget the stages of the services removed from the Docker Compose file
+        self._stages = {
+            name: stage for name, stage in self._stages.items() if name in self._stage_names
+        }
+
+        manifest_dict = as_json_object(kubernetes.List())
+        manifest_dict["items"] = [
+            *config_maps.values(),
+            *deployment,
+            *services,
+            *ingress,
+            *extra_manifest,
+        ]
+
+        return manifest_dict
+
+
+def watch(
+    context: Context,
+    on_render: Callable[[dict], None],
+    on_error: Callable[[Exception], None],
+    interval: float = DEFAULT_WATCH_INTERVAL,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    """
+    Render the manifest and render it again every time one of its input files changes,
+    polling the files' modification time and size every `interval` seconds until `stop` is
+    set.
+
+    Errors in the input files are reported to `on_error` and the files are watched until they
+    are fixed.
+    """
+    stop = stop or threading.Event()
+    renderer = IncrementalRenderer(context)
+    signatures: Optional[dict[Path, InputSignature]] = None
+
+    while True:
+        current_signatures = renderer.get_input_signatures()
+
+        if current_signatures != signatures:
+            error: Optional[Exception] = None
+
+            try:
+                manifest = renderer.render()
+            except (KomposerException, ValidationError, YAMLError, OSError) as e:
+                error = e
+
+            # The env files are known only after parsing the Docker Compose file, take their
+            # signatures before the callbacks so that any change made meanwhile is not missed
+            signatures = {
+                path: current_signatures.get(path, get_input_signature(path))
+                for path in renderer.input_paths
+            }
+
+            if error is not None:
+                on_error(error)
+            else:
+                on_render(manifest)
+
+        if stop.wait(interval):
+            return
@@ -32,59 +32,95 @@ For more info:
 
 import os
 import re
-import sys
+from collections.abc import Callable, Mapping
+from functools import partial
+from typing import Optional
+
+KOMPOSER_VAR_PREFIX = "KOMPOSER_"
+SIMPLE_VAR_MARKER = "$" + KOMPOSER_VAR_PREFIX
+BRACKETED_VAR_MARKER = "${" + KOMPOSER_VAR_PREFIX
+
+simple_re = re.compile(r"\$(?<!\\\$)(KOMPOSER_[A-Za-z0-9_]+)")
+
+# Matches both the simple and the bracketed forms so that the value is scanned only once; the
+# literal `$` comes first so that the lookbehind is evaluated only where it can match
+komposer_var_re = re.compile(
+    r"\$(?<!\\\$)(?:"
+    r"(?P<simple>KOMPOSER_[A-Za-z0-9_]+)"
+    r"|\{(?P<name>KOMPOSER_[A-Za-z0-9_]+)(?:(?P<operator>:?-)(?P<default>[^}]+))?\}"
+    r")"
+)
+
+
+def resolve_variables(
+    variables: Optional[Mapping[str, str]] = None,
+    escape: Optional[Callable[[str], str]] = None,
+) -> dict[str, str]:
+    """
+    Resolve the table of the variables to substitute: the given mapping layered over the
+    KOMPOSER_* variables of the environment, with the optional `escape` function applied to
+    the values.
 
-simple_re = re.compile(r"(?<!\\)\$(KOMPOSER_[A-Za-z0-9_]+)")
-extended_re = re.compile(r"(?<!\\)\$\{(KOMPOSER_[A-Za-z0-9_]+)((:?-)([^}]+))?\}")
+    Resolve the table once and pass it to `substitute()` for each string to substitute, reading
+    the environment costs as much as its size.
+    """
+    resolved_variables = {
+        name: value for name, value in os.environ.items() if name.startswith(KOMPOSER_VAR_PREFIX)
+    }
 
+    if variables:
+        resolved_variables.update(variables)
 
-def _resolve_var(var_name: str, default: str = "") -> str:
-    try:
-        index = int(var_name)
+    if escape is not None:
+        resolved_variables = {name: escape(value) for name, value in resolved_variables.items()}
 
-        try:
-            return sys.argv[index]
-        except IndexError:
-            return default
-    except ValueError:
-        return os.environ.get(var_name, default)
+    return resolved_variables
 
 
-def _replace_simple_env_var(match: re.Match) -> str:
-    var_name = match.group(1)
-    return _resolve_var(var_name, "")
+def _replace_simple_var(variables: Mapping[str, str], match: re.Match) -> str:
+    return variables.get(match.group(1), "")
 
 
-def _replace_extended_env_var(match: re.Match) -> str:
-    var_name = match.group(1)
-    default_spec = match.group(2)
+def _replace_var(variables: Mapping[str, str], match: re.Match) -> str:
+    var_name = match.group("simple")
 
-    if default_spec:
-        default = str(match.group(4))
-        default = simple_re.sub(_replace_simple_env_var, default)
+    # handle simple un-bracketed vars like $FOO
+    if var_name is not None:
+        return variables.get(var_name, "")
 
-        if match.group(3) == ":-":
-            # use default if var is unset or empty
-            env_var = _resolve_var(var_name)
-            if env_var:
-                return env_var
+    # handle bracketed vars with optional default specification
+    var_name = match.group("name")
+    operator = match.group("operator")
 
-            return default
+    if operator is None:
+        return variables.get(var_name, "")
 
-        elif match.group(3) == "-":
-            # use default if var is unset
-            return _resolve_var(var_name, default)
+    default = simple_re.sub(partial(_replace_simple_var, variables), match.group("default"))
 
-        raise RuntimeError("unexpected string matched regex")
+    if operator == ":-":
+        # use default if var is unset or empty
+        return variables.get(var_name) or default
 
-    return _resolve_var(var_name, "")
+    # use default if var is unset
+    return variables.get(var_name, default)
 
 
-def envsubst(value: str, /) -> str:
+def envsubst(
+    value: str,
+    /,
+    variables: Optional[Mapping[str, str]] = None,
+    escape: Optional[Callable[[str], str]] = None,
+) -> str:
     """
     Substitute environment variables in the given string but only if they are
     prefixed with KOMPOSER_.
 
+    The optional `variables` mapping takes precedence over the environment, which is
+    only read; this makes the function safe to be called from multiple threads.
+
+    The optional `escape` function is applied to the variables' values before substituting
+    them, i.e. to keep the string a valid JSON document.
+
     The following forms are supported:
 
     Simple variables - will use an empty string if the variable is unset
@@ -98,10 +134,20 @@ def envsubst(value: str, /) -> str:
       ${FOO-somestring}
         uses "somestring" only if $FOO is unset
     """
-    # handle simple un-bracketed env vars like $FOO
-    value = simple_re.sub(_replace_simple_env_var, value)
+    # Skip the scan entirely if there's nothing to substitute
+    if SIMPLE_VAR_MARKER not in value and BRACKETED_VAR_MARKER not in value:
+        return value
 
-    # handle bracketed env vars with optional default specification
-    value = extended_re.sub(_replace_extended_env_var, value)
+    return substitute(value, resolve_variables(variables, escape))
+
+
+def substitute(value: str, /, resolved_variables: Mapping[str, str]) -> str:
+    """
+    Same as `envsubst()` but with a table of variables already resolved by
+    `resolve_variables()`, the environment is not read.
+    """
+    # Skip the scan entirely if there's nothing to substitute
+    if SIMPLE_VAR_MARKER not in value and BRACKETED_VAR_MARKER not in value:
+        return value
 
-    return value
+    return komposer_var_re.sub(partial(_replace_var, resolved_variables), value)
@@ -1,3 +1,6 @@
+from collections.abc import Sequence
+
+
 class KomposerException(Exception):
     pass
 
@@ -26,6 +29,18 @@ class InvalidServiceNameError(KomposerException):
     pass
 
 
+class DockerComposeNotSupportedError(KomposerException):
+    """
+    Aggregates all the violations found while checking that a Docker Compose file is
+    supported, so that they can be fixed at once.
+    """
+
+    def __init__(self, errors: Sequence[KomposerException]) -> None:
+        self.errors = list(errors)
+
+        super().__init__("\n".join(str(error) for error in self.errors))
+
+
 class IngressTlsInvalidYamlError(IngressTlsException):
     pass
 
@@ -56,3 +71,11 @@ class ExtraManifestMissingMetadataError(ExtraManifestException):
 
 class ExtraManifestMissingNameError(ExtraManifestException):
     pass
+
+
+class BatchTargetsInvalidError(KomposerException):
+    pass
+
+
+class RenderPathNotAllowedError(KomposerException):
+    pass
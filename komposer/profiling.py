@@ -0,0 +1,118 @@
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class StageProfile(BaseModel):
+    name: str
+    calls: int = 0
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_memory: Optional[int] = None
+
+
+class Profiler:
+    """
+    Collects the wall time, the CPU time and, if tracing the memory, the peak of the memory
+    allocated by each stage of the rendering.
+
+    A stage run many times, i.e. once for each extra manifest file, is reported once with
+    the total time and the highest peak.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.stages: dict[str, StageProfile] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+
+        start_wall_time = time.perf_counter()
+        start_cpu_time = time.process_time()
+
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_wall_time
+            cpu_time = time.process_time() - start_cpu_time
+
+            stage = self.stages.setdefault(name, StageProfile(name=name))
+            stage.calls += 1
+            stage.wall_time += wall_time
+            stage.cpu_time += cpu_time
+
+            if self.trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+                stage.peak_memory = max(stage.peak_memory or 0, peak_memory)
+
+    def as_json(self) -> list[dict[str, Any]]:
+        return [stage.model_dump() for stage in self.stages.values()]
+
+    def format_table(self) -> str:
+        lines = [f"{'stage':<18} {'calls':>6} {'wall':>12} {'cpu':>12} {'peak memory':>14}"]
+
+        for stage in self.stages.values():
+            peak_memory = (
+                "-" if stage.peak_memory is None else f"{stage.peak_memory / 1024:.1f}KiB"
+            )
+
+            lines.append(
+                f"{stage.name:<18} {stage.calls:>6} {stage.wall_time * 1000:>10.2f}ms "
+                f"{stage.cpu_time * 1000:>10.2f}ms {peak_memory:>14}"
+            )
+
+        return "\n".join(lines)
+
+
+_current_profiler: ContextVar[Optional[Profiler]] = ContextVar("current_profiler", default=None)
+
+
+@contextmanager
+def profiling(trace_memory: bool = True) -> Iterator[Profiler]:
+    """
+    Profile the stages of the renders run within the context:
+
+    >>> with profiling() as profiler:
+    ...     generate_manifest_from_docker_compose(context)
+    >>> print(profiler.format_table())
+
+    Tracing the memory allocations slows down the rendering, disable it when interested only
+    in the timings.
+    """
+    profiler = Profiler(trace_memory=trace_memory)
+    token = _current_profiler.set(profiler)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+
+    if started_tracing:
+        tracemalloc.start()
+
+    try:
+        yield profiler
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+        _current_profiler.reset(token)
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """
+    Profile the stage if within a `profiling()` context, otherwise do nothing.
+    """
+    profiler = _current_profiler.get()
+
+    if profiler is None:
+        yield
+        return
+
+    with profiler.stage(name):
+        yield
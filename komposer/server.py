@@ -0,0 +1,272 @@
+import json
+import os
+import socketserver
+import stat
+import threading
+from collections.abc import Mapping
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional, Union, cast
+
+from pydantic import ValidationError
+from yaml import YAMLError
+
+from komposer.cache import get_compose_cache
+from komposer.core.base import generate_manifest_from_docker_compose
+from komposer.core.env_file import EnvFileRegistry
+from komposer.core.render import (
+    DEFAULT_DOCKER_IMAGE,
+    DEFAULT_INGRESS_DOMAIN,
+    DEFAULT_SERVER_HOST,
+    DEFAULT_SERVER_PORT,
+    render_raw_manifest,
+)
+from komposer.exceptions import KomposerException, RenderPathNotAllowedError
+from komposer.types import docker_compose
+from komposer.types.cli import Context
+from komposer.utils import FileSignature, get_file_signature, parse_docker_compose_file
+
+RENDER_PATH = "/render"
+HEALTH_PATH = "/health"
+JSON_CONTENT_TYPE = "application/json"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+class ComposeMemo:
+    """
+    In-memory cache of the parsed Docker Compose files, invalidated when a file changes.
+    """
+
+    def __init__(self) -> None:
+        self._composes: dict[Path, tuple[FileSignature, docker_compose.DockerCompose]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, compose_path: Path) -> docker_compose.DockerCompose:
+        signature = get_file_signature(compose_path)
+
+        with self._lock:
+            cached = self._composes.get(compose_path)
+
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        compose = parse_docker_compose_file(compose_path, cache=get_compose_cache())
+
+        with self._lock:
+            self._composes[compose_path] = (signature, compose)
+
+        return compose
+
+
+def make_context(request: Mapping[str, Any]) -> Context:
+    ingress = request.get("ingress", {})
+
+    # Same defaults as the CLI for the fields which are not mandatory there, anything else than
+    # an object is left to be rejected by the validation
+    payload = {
+        "default_image": DEFAULT_DOCKER_IMAGE,
+        "extra_manifest_paths": [],
+        "deployment": {},
+        **request,
+        "ingress": (
+            {"domain": DEFAULT_INGRESS_DOMAIN, **ingress}
+            if isinstance(ingress, Mapping)
+            else ingress
+        ),
+    }
+
+    return Context.model_validate(payload)
+
+
+def ensure_path_is_allowed(path: Path, root: Path) -> None:
+    # Symbolic links are resolved so that they can't point outside of the root
+    if not path.resolve().is_relative_to(root):
+        raise RenderPathNotAllowedError(f"{path} is outside of {root}")
+
+
+def ensure_context_paths_are_allowed(context: Context, root: Path) -> None:
+    paths = [
+        context.docker_compose_path,
+        *context.extra_manifest_paths,
+        context.ingress.tls_path,
+        context.deployment.annotations_path,
+    ]
+
+    for path in paths:
+        if path is not None:
+            ensure_path_is_allowed(path, root)
+
+
+def render(request: Mapping[str, Any], composes: ComposeMemo, root: Path) -> str:
+    """
+    Render the manifest of the request, refusing to read any file outside of the root since
+    the files' content ends up in the response.
+    """
+    context = make_context(request)
+    ensure_context_paths_are_allowed(context, root)
+
+    compose = composes.get(context.docker_compose_path)
+
+    # The env files are known only after parsing the Docker Compose file
+    env_files = EnvFileRegistry(context.docker_compose_path)
+
+    for service in compose.services.values():
+        if service.env_file:
+            ensure_path_is_allowed(env_files.resolve(service.env_file), root)
+
+    manifest = generate_manifest_from_docker_compose(context, compose)
+
+    return render_raw_manifest(context, manifest)
+
+
+class RenderServerMixin:
+    composes: ComposeMemo
+    root: Path
+
+
+class RenderHTTPServer(RenderServerMixin, ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class RenderUnixHTTPServer(
+    RenderServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer
+):
+    daemon_threads = True
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    def address_string(self) -> str:
+        # Unix domain sockets don't have a client address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def _send(self, status: HTTPStatus, body: str, content_type: str) -> None:
+        data = body.encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: HTTPStatus, message: str) -> None:
+        self._send(status, json.dumps({"error": message}), "application/json")
+
+    def do_GET(self) -> None:
+        if self.path != HEALTH_PATH:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}")
+            return
+
+        self._send(HTTPStatus.OK, "ok", "text/plain")
+
+    def _is_allowed_host(self) -> bool:
+        # Reject the requests to other host names, i.e. from a web page after a DNS rebinding
+        if not isinstance(self.server, RenderHTTPServer):
+            return True
+
+        host = self.headers.get("Host", "").rsplit(":", 1)[0].strip("[]")
+
+        return host in LOCAL_HOSTS or host == self.server.server_address[0]
+
+    def do_POST(self) -> None:
+        if self.path != RENDER_PATH:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}")
+            return
+
+        if not self._is_allowed_host():
+            self._send_error(HTTPStatus.FORBIDDEN, "Host not allowed")
+            return
+
+        # A JSON content type can't be sent by a web page without a CORS preflight request
+        content_type = self.headers.get("Content-Type", "").split(";", 1)[0].strip()
+
+        if content_type != JSON_CONTENT_TYPE:
+            self._send_error(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE, f"The content type must be {JSON_CONTENT_TYPE}"
+            )
+            return
+
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+
+            if content_length < 0:
+                raise ValueError(f"Negative Content-Length {content_length}")
+        except ValueError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length: {e}")
+            return
+
+        try:
+            request = json.loads(self.rfile.read(content_length))
+        except json.JSONDecodeError as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, f"Invalid JSON: {e}")
+            return
+
+        if not isinstance(request, dict):
+            self._send_error(HTTPStatus.BAD_REQUEST, "The request must be a JSON object")
+            return
+
+        server = cast(RenderServerMixin, self.server)
+
+        try:
+            manifest = render(request, server.composes, server.root)
+        except RenderPathNotAllowedError as e:
+            self._send_error(HTTPStatus.FORBIDDEN, str(e))
+            return
+        except (KomposerException, ValidationError, YAMLError, OSError) as e:
+            self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except Exception as e:
+            # Keep serving the other requests
+            self.log_error("Unexpected error rendering %r: %r", request, e)
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e))
+            return
+
+        self._send(HTTPStatus.OK, manifest, "application/yaml")
+
+
+def remove_socket(socket_path: Path) -> None:
+    """
+    Remove the Unix domain socket at the given path if any, refusing to remove any other kind
+    of file.
+    """
+    try:
+        mode = socket_path.lstat().st_mode
+    except FileNotFoundError:
+        return
+
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} already exists and it's not a socket")
+
+    socket_path.unlink()
+
+
+def make_server(
+    socket_path: Optional[Path] = None,
+    host: str = DEFAULT_SERVER_HOST,
+    port: int = DEFAULT_SERVER_PORT,
+    root: Optional[Path] = None,
+) -> Union[RenderHTTPServer, RenderUnixHTTPServer]:
+    """
+    Make a render server reading only the files within the root, the current working directory
+    by default.
+    """
+    server: Union[RenderHTTPServer, RenderUnixHTTPServer]
+
+    if socket_path is not None:
+        # Remove the socket left behind by a previous server
+        remove_socket(socket_path)
+
+        # Only the user running the server can connect to the socket, even right after binding
+        previous_umask = os.umask(0o177)
+
+        try:
+            server = RenderUnixHTTPServer(str(socket_path), RenderRequestHandler)
+        finally:
+            os.umask(previous_umask)
+    else:
+        server = RenderHTTPServer((host, port), RenderRequestHandler)
+
+    server.composes = ComposeMemo()
+    server.root = (root or Path.cwd()).resolve()
+
+    return server
@@ -5,7 +5,7 @@ from typing import Any, Optional
 from pydantic import field_validator
 
 from komposer.types.base import ImmutableBaseModel
-from komposer.utils import load_yaml
+from komposer.utils import load_yaml_file
 
 lowercase_kebak_re = re.compile(r"^[a-z0-9][a-z\-0-9]*[a-z0-9]$")
 
@@ -21,7 +21,7 @@ class DeploymentContext(ImmutableBaseModel):
 
     @property
     def annotations(self) -> Optional[Any]:
-        return None if self.annotations_path is None else load_yaml(self.annotations_path)
+        return None if self.annotations_path is None else load_yaml_file(self.annotations_path)
 
 
 class IngressContext(ImmutableBaseModel):
@@ -30,7 +30,7 @@ class IngressContext(ImmutableBaseModel):
 
     @property
     def tls(self) -> Optional[Any]:
-        return None if self.tls_path is None else load_yaml(self.tls_path)
+        return None if self.tls_path is None else load_yaml_file(self.tls_path)
 
 
 class Context(ImmutableBaseModel):
@@ -74,3 +74,10 @@ class Context(ImmutableBaseModel):
         manifest_prefix = "-".join(fragments_filtered)
 
         return manifest_prefix
+
+
+class BatchTarget(ImmutableBaseModel):
+    repository_name: str
+    branch_name: str
+    project_name: Optional[str] = None
+    ingress_for_service: Optional[str] = None
@@ -1,7 +1,9 @@
+from functools import cached_property
 from pathlib import Path
 from typing import Optional, Union
 
 from komposer.types.base import ImmutableBaseModel
+from komposer.types.ports import Ports, PortsTable
 
 EnvironmentMap = dict[str, Optional[str]]
 
@@ -17,6 +19,11 @@ class Service(ImmutableBaseModel):
     env_file: Optional[Path] = None
     environment: Optional[Environment] = None
 
+    @cached_property
+    def ports_table(self) -> PortsTable:
+        # Parsed only once and shared by all the validators and generators
+        return tuple((port, Ports.from_string(port)) for port in self.ports)
+
 
 Services = dict[str, Service]
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping
 from enum import Enum, unique
 from io import StringIO
 from ipaddress import IPv4Address
@@ -106,6 +106,13 @@ class ConfigMapEnvironmentVariable(CamelCaseImmutableBaseModel):
     ) -> Iterable[ConfigMapEnvironmentVariable]:
         env_file = docker_compose_path / relative_env_file_path
         env_vars = dotenv_values(env_file)
+
+        return ConfigMapEnvironmentVariable.from_env_vars(prefix, relative_env_file_path, env_vars)
+
+    @staticmethod
+    def from_env_vars(
+        prefix: str, relative_env_file_path: Path, env_vars: Mapping[str, Optional[str]]
+    ) -> Iterable[ConfigMapEnvironmentVariable]:
         config_map_name = f"{prefix}-{to_kubernetes_name(str(relative_env_file_path))}"
         keys = sorted(env_vars.keys())
 
@@ -135,8 +142,10 @@ class ContainerPort(CamelCaseImmutableBaseModel):
 
     @staticmethod
     def from_string(string: str) -> ContainerPort:
-        ports = Ports.from_string(string)
+        return ContainerPort.from_ports(Ports.from_string(string))
 
+    @staticmethod
+    def from_ports(ports: Ports) -> ContainerPort:
         if ports.same_ports():
             return ContainerPort(containerPort=ports.container)
 
@@ -183,7 +192,10 @@ class ServicePort(CamelCaseImmutableBaseModel):
 
     @staticmethod
     def from_string(string: str) -> ServicePort:
-        ports = Ports.from_string(string)
+        return ServicePort.from_ports(string, Ports.from_string(string))
+
+    @staticmethod
+    def from_ports(string: str, ports: Ports) -> ServicePort:
         name = to_kubernetes_name(string)
 
         return ServicePort(name=name, targetPort=ports.container, port=ports.host)
@@ -211,8 +223,10 @@ class ServiceRefPort(CamelCaseImmutableBaseModel):
 
     @staticmethod
     def from_string(string: str) -> ServiceRefPort:
-        ports = Ports.from_string(string)
+        return ServiceRefPort.from_ports(Ports.from_string(string))
 
+    @staticmethod
+    def from_ports(ports: Ports) -> ServiceRefPort:
         return ServiceRefPort(number=ports.host)
 
 
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 import re
-
-from pydantic import BaseModel
+from typing import NamedTuple
 
 host_container_re = re.compile(r"^(?P<host>\d+):(?P<container>\d+)$")
 single_port_re = re.compile(r"^\d+$")
 
 
-class Ports(BaseModel):
+class Ports(NamedTuple):
     host: int
     container: int
 
@@ -23,3 +22,7 @@ class Ports(BaseModel):
 
     def same_ports(self) -> bool:
         return self.host == self.container
+
+
+# Docker Compose port strings paired with their parsed ports
+PortsTable = tuple[tuple[str, Ports], ...]
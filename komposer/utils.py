@@ -1,13 +1,21 @@
+import copy
+import filecmp
 import json
+import os
 import shlex
+import shutil
+from collections.abc import Iterable
 from pathlib import Path
-from typing import Any, Optional, Union, cast
+from tempfile import NamedTemporaryFile
+from typing import Any, Optional, Union
 
 import stringcase
 import yaml
 from dotenv import dotenv_values
 from pydantic import BaseModel
+from pydantic_core import to_json
 
+from komposer.cache import ComposeCache
 from komposer.types import docker_compose
 
 
@@ -19,6 +27,14 @@ def str_presenter(dumper: yaml.representer.SafeRepresenter, data: Any) -> yaml.n
 
 yaml.representer.SafeRepresenter.add_representer(str, str_presenter)
 
+# Use the libyaml bindings when PyYAML has been built against it, they are an order of magnitude
+# faster than the pure Python implementation. Both dumpers inherit from SafeRepresenter so the
+# multi-line string presenter above applies to either of them.
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+DEFAULT_FILE_MODE = 0o644
+
 
 def to_kubernetes_name(string: str) -> str:
     name: str = stringcase.spinalcase(string.strip().lower().replace("/", "-").replace(":", "-"))
@@ -33,20 +49,135 @@ def load_yaml(source: Union[Path, str]) -> Any:
     if isinstance(source, Path):
         source = source.read_text()
 
-    content = yaml.safe_load(source)
+    # Always a safe loader
+    content = yaml.load(source, Loader=YamlLoader)
+
+    return content
+
+
+FileSignature = tuple[int, int]
+
+
+def get_file_signature(path: Path) -> FileSignature:
+    """
+    Get the modification time and the size of a file, which change whenever the file is
+    written, far cheaper than hashing its content.
+    """
+    stat = path.stat()
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Loaded YAML files by path, with the file's signature and the loaded content or a copy of the
+# parsing error without its traceback, the least recently loaded files are dropped once full
+_yaml_files_cache: dict[Path, tuple[FileSignature, Any, Optional[yaml.YAMLError]]] = {}
+YAML_FILES_CACHE_MAX_SIZE = 128
+
+
+def load_yaml_file(path: Path) -> Any:
+    """
+    Load a YAML file once and reuse its content, or its parsing error, until the file changes.
+
+    The cache is shared by the whole process so files used by many contexts, i.e. when
+    rendering in batch, are parsed only once. The returned content must not be mutated.
+    """
+    signature = get_file_signature(path)
+    cached = _yaml_files_cache.get(path)
+
+    if cached is None or cached[0] != signature:
+        try:
+            cached = (signature, load_yaml(path), None)
+        except yaml.YAMLError as e:
+            cached = (signature, None, copy.copy(e))
+
+        _yaml_files_cache.pop(path, None)
+
+        if len(_yaml_files_cache) >= YAML_FILES_CACHE_MAX_SIZE:
+            del _yaml_files_cache[next(iter(_yaml_files_cache))]
+
+        _yaml_files_cache[path] = cached
+
+    _, content, error = cached
+
+    # A new exception each time, re-raising the same one would grow its traceback
+    if error is not None:
+        raise copy.copy(error)
 
     return content
 
 
 def dump_yaml(data: Any) -> str:
-    output: str = yaml.safe_dump(data)
+    output: str = yaml.dump(data, Dumper=YamlDumper)
 
     return output
 
 
-def parse_docker_compose_file(compose_path: Path) -> docker_compose.DockerCompose:
-    content = load_yaml(compose_path)
-    config = docker_compose.DockerCompose.parse_obj(content)
+def dump_json(data: Any, indent: Optional[int] = None) -> str:
+    # Pydantic's serializer is implemented in Rust and much faster than the json module
+    return to_json(data, indent=indent).decode()
+
+
+def escape_json_string(value: str) -> str:
+    """
+    Escape the value to be embedded into a JSON string, without the surrounding quotes.
+    """
+    return json.dumps(value)[1:-1]
+
+
+def write_file_atomically(path: Path, chunks: Iterable[str]) -> bool:
+    """
+    Write the chunks into a temporary file which is then renamed over the file, so that readers
+    never see a partially written file.
+
+    The file is left untouched, modification time included, when the content is unchanged.
+    Returns whether the file has been written.
+    """
+    with NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as temporary_file:
+        temporary_path = Path(temporary_file.name)
+
+        try:
+            temporary_file.writelines(chunks)
+        except BaseException:
+            temporary_file.close()
+            temporary_path.unlink(missing_ok=True)
+            raise
+
+    if path.is_file() and filecmp.cmp(temporary_path, path, shallow=False):
+        temporary_path.unlink()
+        return False
+
+    # Temporary files are only readable by the owner
+    if path.exists():
+        shutil.copymode(path, temporary_path)
+    else:
+        temporary_path.chmod(DEFAULT_FILE_MODE)
+
+    os.replace(temporary_path, path)
+
+    return True
+
+
+def parse_docker_compose_file(
+    compose_path: Path, cache: Optional[ComposeCache] = None
+) -> docker_compose.DockerCompose:
+    if cache is None:
+        content = load_yaml(compose_path)
+        config = docker_compose.DockerCompose.model_validate(content)
+
+        return config
+
+    # Skip YAML parsing and validation if the same content has been parsed before
+    raw_content = compose_path.read_bytes()
+    key = cache.make_key(raw_content)
+    cached_config = cache.get(key)
+
+    if cached_config is not None:
+        return cached_config
+
+    config = docker_compose.DockerCompose.model_validate(load_yaml(raw_content.decode()))
+    cache.set(key, config)
 
     return config
 
@@ -65,4 +196,5 @@ def command_to_args(command: Optional[Union[str, list[str]]]) -> Optional[list[s
 
 
 def as_json_object(type_: BaseModel) -> dict[str, Any]:
-    return cast(dict[str, Any], json.loads(type_.model_dump_json(by_alias=True)))
+    # Dump straight to JSON compatible primitives without the JSON string round-trip
+    return type_.model_dump(mode="json", by_alias=True)
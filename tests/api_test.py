@@ -0,0 +1,322 @@
+import asyncio
+import json
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+from click.testing import CliRunner
+from pytest_mock import MockerFixture
+
+import komposer
+from komposer import cli
+from komposer.api import render, render_async
+from komposer.core.extra_manifest import load_extra_manifest_file
+from komposer.exceptions import IngressTlsInvalidYamlError
+from komposer.types.cli import Context
+from komposer.types.docker_compose import DockerCompose
+from tests.fixtures import TEST_BRANCH_NAME, TEST_REPOSITORY_NAME, make_context
+
+COMPOSE = {
+    "services": {
+        "web": {
+            "image": "my-image",
+            "command": "ping ${KOMPOSER_SERVICE_PREFIX}-worker",
+            "ports": ["8080"],
+        },
+        "worker": {"image": "my-image"},
+    }
+}
+
+
+@pytest.mark.parametrize(
+    "compose",
+    [
+        pytest.param(COMPOSE, id="Mapping"),
+        pytest.param(DockerCompose.model_validate(COMPOSE), id="Docker Compose"),
+    ],
+)
+def test_render(temporary_path: Path, compose: dict) -> None:
+    """
+    GIVEN a context without a Docker Compose file
+        AND a Docker Compose
+    WHEN rendering the manifest
+    THEN the manifest is returned as a JSON object
+        AND the KOMPOSER_* variables are replaced
+        AND no file is written
+    """
+    # GIVEN
+    context = make_context(temporary_path=temporary_path)
+
+    # WHEN
+    actual = render(context, compose)
+
+    # THEN
+    assert actual["kind"] == "List"
+    assert [item["kind"] for item in actual["items"]] == ["Deployment", "Service"]
+
+    container = actual["items"][0]["spec"]["template"]["spec"]["containers"][0]
+
+    assert container["args"] == ["ping", "test-repository-test-branch-worker"]
+    assert list(temporary_path.iterdir()) == []
+
+
+def test_render_docker_compose_file(temporary_path: Path) -> None:
+    """
+    GIVEN a context with a Docker Compose file
+    WHEN rendering the manifest without a Docker Compose
+    THEN the Docker Compose file is parsed
+    """
+    # GIVEN
+    docker_compose_path = temporary_path / "docker-compose.yml"
+    docker_compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                web:
+                    image: my-image
+            """
+        )
+    )
+
+    context = make_context(docker_compose_path=docker_compose_path)
+
+    # WHEN
+    actual = render(context)
+
+    # THEN
+    assert [item["metadata"]["name"] for item in actual["items"]] == [
+        "test-repository-test-branch"
+    ]
+
+
+def test_render_matches_cli_json_output(
+    monkeypatch: pytest.MonkeyPatch, temporary_path: Path
+) -> None:
+    """
+    GIVEN a Docker Compose file with KOMPOSER_* variables which aren't strings in YAML
+    WHEN rendering the manifest
+    THEN the manifest is the same printed by the CLI as JSON
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_MY_NUMBER", "123")
+
+    docker_compose_path = temporary_path / "docker-compose.yml"
+    docker_compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                web:
+                    image: my-image
+                    command: ping ${KOMPOSER_MY_NUMBER}
+            """
+        )
+    )
+
+    context = make_context(docker_compose_path=docker_compose_path)
+    expected = CliRunner().invoke(
+        cli.main,
+        [
+            "-r",
+            TEST_REPOSITORY_NAME,
+            "-b",
+            TEST_BRANCH_NAME,
+            "-f",
+            str(docker_compose_path),
+            "--format",
+            "json",
+            "--no-cache",
+        ],
+    )
+
+    # WHEN
+    actual = render(context)
+
+    # THEN
+    assert expected.exit_code == 0, expected.output
+    assert actual == json.loads(expected.output)
+
+
+@pytest.mark.parametrize(
+    "is_async", [pytest.param(False, id="Sync"), pytest.param(True, id="Async")]
+)
+def test_render_does_not_write_cache(
+    cache_home: Path, temporary_path: Path, is_async: bool
+) -> None:
+    """
+    GIVEN a context with a Docker Compose file
+    WHEN rendering the manifest without a Docker Compose
+    THEN nothing is written into the cache directory
+    """
+    # GIVEN
+    docker_compose_path = temporary_path / "docker-compose.yml"
+    docker_compose_path.write_text("services:\n  web:\n    image: my-image\n")
+
+    context = make_context(docker_compose_path=docker_compose_path)
+
+    # WHEN
+    if is_async:
+        asyncio.run(render_async(context))
+    else:
+        render(context)
+
+    # THEN
+    assert list(cache_home.iterdir()) == []
+
+
+@pytest.fixture
+def files_context(temporary_path: Path) -> Context:
+    (temporary_path / "docker-compose.yml").write_text(
+        textwrap.dedent(
+            """
+            services:
+                web:
+                    image: my-image
+                    env_file: .env
+                    ports:
+                        - "8080"
+                worker:
+                    image: my-image
+                    env_file: ./.env
+            """
+        )
+    )
+    (temporary_path / ".env").write_text("MY_VARIABLE=my-value")
+    (temporary_path / "ingress_tls.yaml").write_text("- hosts: [my-host]\n  secretName: my-secret")
+    (temporary_path / "annotations.yaml").write_text("my-annotation: my-value")
+
+    extra_manifest_paths = []
+
+    for name in ["my-job", "my-other-job"]:
+        extra_manifest_path = temporary_path / f"{name}.yaml"
+        extra_manifest_path.write_text(
+            f"kind: Job\nmetadata:\n  name: {name}\n---\nkind: Secret\nmetadata:\n  name: {name}\n"
+        )
+        extra_manifest_paths.append(extra_manifest_path)
+
+    return make_context(
+        temporary_path=temporary_path,
+        ingress_for_service="web",
+        extra_manifest_paths=extra_manifest_paths,
+        ingress_tls_path=temporary_path / "ingress_tls.yaml",
+        deployment_annotations_path=temporary_path / "annotations.yaml",
+    )
+
+
+def test_render_async(files_context: Context) -> None:
+    """
+    GIVEN a context with all the input files
+    WHEN rendering the manifest asynchronously
+    THEN the manifest is the same as the one rendered synchronously
+    """
+    # WHEN
+    actual = asyncio.run(render_async(files_context))
+
+    # THEN
+    assert actual == render(files_context)
+
+
+def test_render_async_reads_files_concurrently(
+    mocker: MockerFixture, files_context: Context
+) -> None:
+    """
+    GIVEN a context with many extra manifests
+    WHEN rendering the manifest asynchronously
+    THEN the extra manifests are read concurrently
+    """
+    # GIVEN
+    barrier = threading.Barrier(len(files_context.extra_manifest_paths), timeout=5)
+
+    def load_extra_manifest_file_concurrently(path: Path) -> list[Any]:
+        # Fails if the other files are not being read at the same time
+        barrier.wait()
+
+        return load_extra_manifest_file(path)
+
+    mocker.patch(
+        "komposer.api.load_extra_manifest_file", side_effect=load_extra_manifest_file_concurrently
+    )
+
+    # WHEN
+    actual = asyncio.run(render_async(files_context))
+
+    # THEN
+    assert actual == render(files_context)
+
+
+def test_render_async_many_contexts(temporary_path: Path) -> None:
+    """
+    GIVEN many contexts
+    WHEN rendering their manifests concurrently
+    THEN each manifest is rendered from its own context
+    """
+    # GIVEN
+    contexts = [
+        make_context(temporary_path=temporary_path, branch_name=f"branch-{index}")
+        for index in range(20)
+    ]
+
+    async def render_all() -> list[dict]:
+        return await asyncio.gather(*(render_async(context, COMPOSE) for context in contexts))
+
+    # WHEN
+    actual = asyncio.run(render_all())
+
+    # THEN
+    assert actual == [render(context, COMPOSE) for context in contexts]
+
+
+def test_render_async_fails(temporary_path: Path) -> None:
+    """
+    GIVEN a context with an invalid Ingress' TLS file
+    WHEN rendering the manifest asynchronously
+    THEN raises the same exception as rendering synchronously
+    """
+    # GIVEN
+    ingress_tls_path = temporary_path / "ingress_tls.yaml"
+    ingress_tls_path.write_text("- secretName: [")
+
+    context = make_context(temporary_path=temporary_path, ingress_tls_path=ingress_tls_path)
+
+    # WHEN
+    with pytest.raises(IngressTlsInvalidYamlError):
+        asyncio.run(render_async(context, COMPOSE))
+
+
+def test_package_api() -> None:
+    """
+    GIVEN the komposer package
+    WHEN accessing the public API
+    THEN it is imported from its module
+    """
+    # THEN
+    assert komposer.render is render
+    assert komposer.render_async is render_async
+    assert komposer.DockerCompose is DockerCompose
+
+    with pytest.raises(AttributeError):
+        komposer.missing  # noqa: B018
+
+
+def test_package_import_is_lazy() -> None:
+    """
+    GIVEN a fresh Python interpreter
+    WHEN importing the komposer package
+    THEN the public API is not imported
+    """
+    # WHEN
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, komposer; print(','.join(sorted(sys.modules)))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # THEN
+    imported_modules = set(result.stdout.strip().split(","))
+
+    assert "komposer.api" not in imported_modules
+    assert "pydantic" not in imported_modules
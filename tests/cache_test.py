@@ -0,0 +1,275 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+import pytest
+from pytest_mock import MockerFixture
+
+from komposer.cache import ComposeCache, RenderCache, get_cache_path, get_code_version
+from komposer.types.cli import Context
+from komposer.types.docker_compose import DockerCompose, Service
+from tests.fixtures import make_context
+
+
+def make_compose(image: str = "my-image") -> DockerCompose:
+    return DockerCompose(
+        services={"my-service": Service(image=image, ports=["8080"], env_file=Path(".env"))}
+    )
+
+
+def test_get_cache_path(cache_home: Path) -> None:
+    """
+    GIVEN the XDG_CACHE_HOME env variable is set
+    WHEN getting the cache path
+    THEN is a komposer directory in the XDG cache home
+    """
+    # WHEN
+    actual = get_cache_path()
+
+    # THEN
+    assert actual == cache_home / "komposer"
+
+
+def test_compose_cache_make_key() -> None:
+    """
+    GIVEN two different contents
+    WHEN making the cache keys
+    THEN the keys are stable and different
+    """
+    # WHEN
+    key_1 = ComposeCache.make_key(b"services: {}")
+    key_2 = ComposeCache.make_key(b"services: {a: {}}")
+
+    # THEN
+    assert key_1 == ComposeCache.make_key(b"services: {}")
+    assert key_1 != key_2
+
+
+def test_compose_cache_make_key_changes_with_code(mocker: MockerFixture) -> None:
+    """
+    GIVEN a content
+    WHEN making the cache keys before and after a source file of Komposer changed, without
+        changing the package's version
+    THEN the keys are different
+    """
+    # GIVEN
+    m_get_file_signature = mocker.patch("komposer.utils.get_file_signature", return_value=(1, 1))
+    get_code_version.cache_clear()
+
+    # WHEN
+    key_1 = ComposeCache.make_key(b"services: {}")
+
+    m_get_file_signature.return_value = (2, 1)
+    get_code_version.cache_clear()
+
+    key_2 = ComposeCache.make_key(b"services: {}")
+
+    # THEN
+    get_code_version.cache_clear()
+
+    assert key_1 != key_2
+
+
+def test_compose_cache_roundtrip(temporary_path: Path) -> None:
+    """
+    GIVEN a compose cache
+    WHEN storing a Docker Compose model
+    THEN the same model is returned for the same key
+        AND nothing is returned for a different key
+    """
+    # GIVEN
+    cache = ComposeCache(temporary_path)
+    compose = make_compose()
+
+    # WHEN
+    cache.set("key", compose)
+
+    # THEN
+    assert cache.get("key") == compose
+    assert cache.get("other-key") is None
+
+
+def test_compose_cache_drops_corrupted_entry(temporary_path: Path) -> None:
+    """
+    GIVEN a compose cache
+        AND a corrupted entry
+    WHEN reading the entry
+    THEN nothing is returned
+        AND the entry is removed
+    """
+    # GIVEN
+    cache = ComposeCache(temporary_path)
+    entry_path = temporary_path / "key.json"
+    entry_path.write_text("{")
+
+    # WHEN
+    actual = cache.get("key")
+
+    # THEN
+    assert actual is None
+    assert not entry_path.exists()
+
+
+def test_compose_cache_evicts_least_recently_used(temporary_path: Path) -> None:
+    """
+    GIVEN a compose cache with room for two entries
+        AND two entries where the oldest has been read recently
+    WHEN storing a third entry
+    THEN the least recently used entry is evicted
+    """
+    # GIVEN
+    entry_size = len(make_compose().model_dump_json())
+    cache = ComposeCache(temporary_path, max_size=entry_size * 2)
+
+    cache.set("key-1", make_compose())
+    cache.set("key-2", make_compose())
+
+    os.utime(temporary_path / "key-1.json", (1, 1))
+    os.utime(temporary_path / "key-2.json", (2, 2))
+    cache.get("key-1")
+
+    # WHEN
+    cache.set("key-3", make_compose())
+
+    # THEN
+    assert sorted(path.name for path in temporary_path.iterdir()) == [
+        "key-1.json",
+        "key-3.json",
+    ]
+
+
+@pytest.mark.parametrize("max_size", [0, 1])
+def test_compose_cache_evicts_everything_if_too_small(temporary_path: Path, max_size: int) -> None:
+    """
+    GIVEN a compose cache too small to hold any entry
+    WHEN storing an entry
+    THEN the entry is evicted
+    """
+    # GIVEN
+    cache = ComposeCache(temporary_path, max_size=max_size)
+
+    # WHEN
+    cache.set("key", make_compose())
+
+    # THEN
+    assert cache.get("key") is None
+
+
+@pytest.fixture
+def render_context(temporary_path: Path) -> Context:
+    (temporary_path / "docker-compose.yml").write_text("services: {}")
+    (temporary_path / "extra.yml").write_text("kind: Job\nmetadata:\n  name: my-job\n")
+
+    return make_context(
+        temporary_path=temporary_path, extra_manifest_paths=[temporary_path / "extra.yml"]
+    )
+
+
+def test_render_cache_make_key(
+    monkeypatch: pytest.MonkeyPatch, temporary_path: Path, render_context: Context
+) -> None:
+    """
+    GIVEN a context
+    WHEN changing any of the inputs known before rendering
+    THEN the key changes
+    """
+    # GIVEN
+    key = RenderCache.make_key(render_context, "yaml")
+
+    # THEN
+    assert RenderCache.make_key(render_context, "yaml") == key
+    assert RenderCache.make_key(render_context, "json") != key
+    assert (
+        RenderCache.make_key(render_context.model_copy(update={"branch_name": "b"}), "yaml")
+        != key
+    )
+
+    monkeypatch.setenv("KOMPOSER_MY_VARIABLE", "my-value")
+    assert RenderCache.make_key(render_context, "yaml") != key
+    monkeypatch.delenv("KOMPOSER_MY_VARIABLE")
+
+    (temporary_path / "extra.yml").write_text("kind: Job\nmetadata:\n  name: my-other-job\n")
+    assert RenderCache.make_key(render_context, "yaml") != key
+
+
+def test_render_cache_roundtrip(temporary_path: Path) -> None:
+    """
+    GIVEN a render cache
+    WHEN storing a rendered manifest
+    THEN the same manifest is returned for the same key
+        AND nothing is returned for a different key
+    """
+    # GIVEN
+    cache = RenderCache(temporary_path / "cache")
+
+    # WHEN
+    cache.set("key", "my-manifest", [])
+
+    # THEN
+    assert cache.get("key") == "my-manifest"
+    assert cache.get("other-key") is None
+
+
+@pytest.mark.parametrize(
+    "env_file_content, variable, expected",
+    [
+        pytest.param("A=${B}", "1", "my-manifest", id="Unchanged"),
+        pytest.param("A=2", "1", None, id="Env file changed"),
+        pytest.param("A=${B}", "2", None, id="Variable changed"),
+        pytest.param("A=${B}", None, None, id="Variable unset"),
+    ],
+)
+def test_render_cache_checks_env_files(
+    monkeypatch: pytest.MonkeyPatch,
+    temporary_path: Path,
+    env_file_content: str,
+    variable: Optional[str],
+    expected: Optional[str],
+) -> None:
+    """
+    GIVEN a rendered manifest stored with its env file
+        AND the env file interpolates an environment variable
+    WHEN the env file or the environment variable changes
+    THEN nothing is returned
+    """
+    # GIVEN
+    env_file_path = temporary_path / ".env"
+    env_file_path.write_text("A=${B}")
+    monkeypatch.setenv("B", "1")
+
+    cache = RenderCache(temporary_path / "cache")
+    cache.set("key", "my-manifest", [env_file_path])
+
+    # WHEN
+    env_file_path.write_text(env_file_content)
+
+    if variable is None:
+        monkeypatch.delenv("B")
+    else:
+        monkeypatch.setenv("B", variable)
+
+    actual = cache.get("key")
+
+    # THEN
+    assert actual == expected
+
+
+def test_render_cache_drops_corrupted_entry(temporary_path: Path) -> None:
+    """
+    GIVEN a render cache
+        AND a corrupted entry
+    WHEN reading the entry
+    THEN nothing is returned
+        AND the entry is removed
+    """
+    # GIVEN
+    cache = RenderCache(temporary_path)
+    entry_path = temporary_path / "key.json"
+    entry_path.write_text('{"output": "my-manifest"}')
+
+    # WHEN
+    actual = cache.get("key")
+
+    # THEN
+    assert actual is None
+    assert not entry_path.exists()
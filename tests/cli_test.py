@@ -1,16 +1,40 @@
+import json
+import os
+import subprocess
+import sys
 import textwrap
 from collections.abc import Sequence
 from pathlib import Path
 
 import pytest
+import yaml
 from click.testing import CliRunner
 from pytest_mock import MockerFixture
 
 from komposer import cli
+from komposer.core.base import (
+    generate_manifest_from_docker_compose,
+    iter_manifest_items,
+)
+from komposer.core.diff import get_manifest_items, load_manifest_documents
 from komposer.types.cli import Context
 from komposer.utils import load_yaml
 from tests.fixtures import TEST_BRANCH_NAME, TEST_REPOSITORY_NAME, make_context
 
+# Modules which must not be imported until a command actually runs
+CLI_LAZY_MODULES = {
+    "dotenv",
+    "komposer.core.base",
+    "komposer.types.kubernetes",
+    "pydantic",
+    "stringcase",
+    "yaml",
+}
+
+# Generous to avoid flakiness on slow CI runners: importing the whole package eagerly takes
+# about 200ms locally while the CLI alone takes about 50ms
+CLI_IMPORT_TIME_BUDGET_US = 150_000
+
 
 def make_mandatory_long_args() -> list[str]:
     return ["--repository-name", TEST_REPOSITORY_NAME, "--branch-name", TEST_BRANCH_NAME]
@@ -121,7 +145,7 @@ def test_main(mocker: MockerFixture, cli_args: Sequence[str], expected: Context)
     """
     # GIVEN
     m_generate_manifest_from_docker_compose = mocker.patch(
-        "komposer.cli.generate_manifest_from_docker_compose", return_value={}
+        "komposer.core.base.generate_manifest_from_docker_compose", return_value={}
     )
 
     runner = CliRunner()
@@ -132,7 +156,7 @@ def test_main(mocker: MockerFixture, cli_args: Sequence[str], expected: Context)
     # THEN
     assert actual.exit_code == 0
 
-    m_generate_manifest_from_docker_compose.assert_called_once_with(expected)
+    m_generate_manifest_from_docker_compose.assert_called_once_with(expected, cache=mocker.ANY)
 
 
 @pytest.mark.parametrize(
@@ -252,3 +276,659 @@ def test_output_raw_manifest(
     actual = load_yaml(m_print.call_args[0][0])
 
     assert actual == expected_dict
+
+
+@pytest.mark.parametrize(
+    "jobs", [pytest.param(1, id="Sequential"), pytest.param(2, id="Parallel")]
+)
+def test_batch(temporary_path: Path, jobs: int) -> None:
+    """
+    GIVEN a Docker Compose file
+        AND a list of batch targets
+    WHEN running the batch command
+    THEN a manifest is written for each target
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service
+            """
+        )
+    )
+    targets = textwrap.dedent(
+        f"""
+        - repository_name: {TEST_REPOSITORY_NAME}
+          branch_name: branch-1
+        - repository_name: {TEST_REPOSITORY_NAME}
+          branch_name: branch-2
+          project_name: my-project
+        """
+    )
+    output_dir = temporary_path / "manifests"
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(
+        cli.main,
+        ["batch", "-f", str(compose_path), "-o", str(output_dir), "--jobs", str(jobs)],
+        input=targets,
+    )
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+
+    manifest_paths = sorted(path.name for path in output_dir.iterdir())
+
+    assert manifest_paths == [
+        f"my-project-{TEST_REPOSITORY_NAME}-branch-2.yml",
+        f"{TEST_REPOSITORY_NAME}-branch-1.yml",
+    ]
+
+    manifest = load_yaml(output_dir / f"{TEST_REPOSITORY_NAME}-branch-1.yml")
+    container = manifest["items"][0]["spec"]["template"]["spec"]["containers"][0]
+
+    assert container["args"] == ["ping", f"{TEST_REPOSITORY_NAME}-branch-1-my-service"]
+
+
+def test_render_yaml_stream(temporary_path: Path) -> None:
+    """
+    GIVEN a Docker Compose file
+        AND an extra manifest
+    WHEN rendering as a YAML stream
+    THEN each item is a YAML document
+        AND the items are the same of the Kubernetes List
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service
+                    environment:
+                        - MY_VARIABLE=my-value
+            """
+        )
+    )
+    extra_manifest_path = temporary_path / "extra.yml"
+    extra_manifest_path.write_text(
+        textwrap.dedent(
+            """
+            apiVersion: batch/v1
+            kind: Job
+            metadata:
+                name: my-job
+            spec:
+                template:
+                    spec:
+                        containers:
+                            - args: [ping, "${KOMPOSER_SERVICE_PREFIX}-my-service"]
+            """
+        )
+    )
+    args = [
+        *make_mandatory_long_args(),
+        "-f",
+        str(compose_path),
+        "--extra-manifest",
+        str(extra_manifest_path),
+    ]
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, [*args, "--format", "yaml-stream"])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert actual.output.startswith("---\n")
+
+    expected = runner.invoke(cli.main, args)
+
+    assert list(yaml.safe_load_all(actual.output)) == load_yaml(expected.output)["items"]
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [pytest.param("json", id="JSON"), pytest.param("ndjson", id="Newline delimited JSON")],
+)
+def test_render_json(
+    monkeypatch: pytest.MonkeyPatch, temporary_path: Path, output_format: str
+) -> None:
+    """
+    GIVEN a Docker Compose file
+        AND a KOMPOSER_* environment variable which needs escaping in JSON
+    WHEN rendering as JSON
+    THEN the items are the same of the YAML output
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_QUOTED", 'my "quoted" value')
+
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service ${KOMPOSER_QUOTED}
+                    environment:
+                        - MY_VARIABLE=my-value
+            """
+        )
+    )
+    args = [*make_mandatory_long_args(), "-f", str(compose_path)]
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, [*args, "--format", output_format])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+
+    expected = load_yaml(runner.invoke(cli.main, args).output)
+
+    if output_format == "json":
+        assert json.loads(actual.output) == expected
+    else:
+        assert [json.loads(line) for line in actual.output.splitlines()] == expected["items"]
+
+
+def test_render_output(temporary_path: Path) -> None:
+    """
+    GIVEN a Docker Compose file
+    WHEN rendering into an output file twice
+    THEN the file contains the manifest
+        AND the file is not written again when unchanged
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text("services:\n  my-service:\n    image: my-image\n")
+    output_path = temporary_path / "manifest.yml"
+    args = [*make_mandatory_long_args(), "-f", str(compose_path), "--output", str(output_path)]
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, args)
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert actual.output == ""
+
+    expected = runner.invoke(cli.main, args[:-2])
+
+    assert output_path.read_text() == expected.output
+
+    # WHEN
+    os.utime(output_path, ns=(0, 0))
+    actual = runner.invoke(cli.main, args)
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert output_path.stat().st_mtime_ns == 0
+
+
+def test_render_output_dir(temporary_path: Path) -> None:
+    """
+    GIVEN a Docker Compose file
+    WHEN rendering into an output directory
+    THEN each item is written into its own file
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service
+                    environment:
+                        - MY_VARIABLE=my-value
+            """
+        )
+    )
+    output_dir = temporary_path / "manifests"
+    args = [*make_mandatory_long_args(), "-f", str(compose_path)]
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, [*args, "--output-dir", str(output_dir)])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+
+    prefix = f"{TEST_REPOSITORY_NAME}-{TEST_BRANCH_NAME}"
+
+    assert sorted(path.name for path in output_dir.iterdir()) == [
+        f"configmap-{prefix}-my-service.yml",
+        f"deployment-{prefix}.yml",
+    ]
+
+    deployment = load_yaml(output_dir / f"deployment-{prefix}.yml")
+    container = deployment["spec"]["template"]["spec"]["containers"][0]
+
+    assert container["args"] == ["ping", f"{prefix}-my-service"]
+
+
+def test_render_output_and_output_dir_fails(temporary_path: Path) -> None:
+    """
+    GIVEN both the --output and --output-dir options
+    WHEN running the render command
+    THEN fails
+    """
+    # GIVEN
+    args = [
+        *make_mandatory_long_args(),
+        "--output",
+        str(temporary_path / "manifest.yml"),
+        "--output-dir",
+        str(temporary_path),
+    ]
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, args)
+
+    # THEN
+    assert actual.exit_code != 0
+    assert "mutually exclusive" in actual.output
+
+
+def test_render_profile(temporary_path: Path) -> None:
+    """
+    GIVEN a Docker Compose file
+    WHEN rendering with the --profile-output option
+    THEN the manifest is rendered
+        AND the profile of each stage is written as JSON
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text("services:\n  my-service:\n    image: my-image\n")
+    profile_path = temporary_path / "profile.json"
+    args = [*make_mandatory_long_args(), "-f", str(compose_path)]
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, [*args, "--profile-output", str(profile_path)])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert actual.output == runner.invoke(cli.main, args).output
+
+    stages = [stage["name"] for stage in json.loads(profile_path.read_text())]
+
+    assert stages == [
+        "parse",
+        "validation",
+        "config_maps",
+        "deployment",
+        "services",
+        "ingress",
+        "as_json_object",
+        "dump_yaml",
+        "env_substitution",
+    ]
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [pytest.param("yaml", id="YAML"), pytest.param("json", id="JSON")],
+)
+def test_render_cache(mocker: MockerFixture, temporary_path: Path, output_format: str) -> None:
+    """
+    GIVEN a rendered manifest
+    WHEN rendering again
+    THEN the cached output is returned without rendering the manifest
+        AND the manifest is rendered again once an input file changes
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    env_file: .env
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service
+            """
+        )
+    )
+    env_file_path = temporary_path / ".env"
+    env_file_path.write_text("MY_VARIABLE=my-value")
+    args = [*make_mandatory_long_args(), "-f", str(compose_path), "--format", output_format]
+
+    runner = CliRunner()
+    expected = runner.invoke(cli.main, args)
+
+    m_iter_manifest_items = mocker.patch(
+        "komposer.core.base.iter_manifest_items", wraps=iter_manifest_items
+    )
+
+    # WHEN
+    actual = runner.invoke(cli.main, args)
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert actual.output == expected.output
+
+    m_iter_manifest_items.assert_not_called()
+
+    # WHEN
+    env_file_path.write_text("MY_VARIABLE=my-other-value")
+
+    actual = runner.invoke(cli.main, args)
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert "my-other-value" in actual.output
+
+    m_iter_manifest_items.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [
+        pytest.param("yaml-stream", id="YAML stream"),
+        pytest.param("ndjson", id="Newline delimited JSON"),
+    ],
+)
+def test_render_cache_stream_formats(
+    mocker: MockerFixture, temporary_path: Path, cache_home: Path, output_format: str
+) -> None:
+    """
+    GIVEN a manifest rendered in a stream format
+    WHEN rendering again
+    THEN the manifest is rendered again
+        AND it's never stored into the render cache
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text("services:\n  my-service:\n    image: my-image\n")
+    args = [*make_mandatory_long_args(), "-f", str(compose_path), "--format", output_format]
+
+    runner = CliRunner()
+    expected = runner.invoke(cli.main, args)
+
+    m_iter_manifest_items = mocker.patch(
+        "komposer.core.base.iter_manifest_items", wraps=iter_manifest_items
+    )
+
+    # WHEN
+    actual = runner.invoke(cli.main, args)
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert actual.output == expected.output
+    assert not (cache_home / "komposer" / "render").exists()
+
+    m_iter_manifest_items.assert_called_once()
+
+
+def test_render_no_cache(mocker: MockerFixture, temporary_path: Path) -> None:
+    """
+    GIVEN a rendered manifest
+    WHEN rendering again with the --no-cache flag
+    THEN the manifest is rendered again
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text("services:\n  my-service:\n    image: my-image\n")
+    args = [*make_mandatory_long_args(), "-f", str(compose_path)]
+
+    runner = CliRunner()
+    expected = runner.invoke(cli.main, args)
+
+    m_generate_manifest_from_docker_compose = mocker.patch(
+        "komposer.core.base.generate_manifest_from_docker_compose",
+        wraps=generate_manifest_from_docker_compose,
+    )
+
+    # WHEN
+    actual = runner.invoke(cli.main, [*args, "--no-cache"])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert actual.output == expected.output
+
+    m_generate_manifest_from_docker_compose.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [
+        pytest.param("yaml", id="YAML"),
+        pytest.param("yaml-stream", id="YAML stream"),
+        pytest.param("json", id="JSON"),
+        pytest.param("ndjson", id="Newline delimited JSON"),
+    ],
+)
+def test_diff(temporary_path: Path, output_format: str) -> None:
+    """
+    GIVEN a previously rendered manifest
+        AND the Docker Compose file changed since
+    WHEN running the diff command
+    THEN only the added and changed items are output
+        AND the differences are reported
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                web:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-worker
+                    ports:
+                        - "8080"
+                worker:
+                    image: my-image
+                    ports:
+                        - "9090"
+            """
+        )
+    )
+    previous_path = temporary_path / "previous.yml"
+    output_path = temporary_path / "diff.yml"
+    args = [*make_mandatory_long_args(), "-f", str(compose_path)]
+
+    runner = CliRunner()
+    runner.invoke(cli.main, [*args, "--format", output_format, "--output", str(previous_path)])
+
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                web:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-worker
+                    ports:
+                        - "8080"
+                        - "8081"
+            """
+        )
+    )
+
+    # WHEN
+    actual = runner.invoke(
+        cli.main,
+        [
+            "diff",
+            "--against",
+            str(previous_path),
+            *args,
+            "--format",
+            output_format,
+            "--output",
+            str(output_path),
+        ],
+    )
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+
+    prefix = f"{TEST_REPOSITORY_NAME}-{TEST_BRANCH_NAME}"
+    items = [
+        item
+        for document in load_manifest_documents(output_path.read_text())
+        for item in (document["items"] if document["kind"] == "List" else [document])
+    ]
+
+    assert [(item["kind"], item["metadata"]["name"]) for item in items] == [
+        ("Deployment", prefix),
+        ("Service", f"{prefix}-web"),
+    ]
+
+    container = items[0]["spec"]["template"]["spec"]["containers"][0]
+
+    assert container["args"] == ["ping", f"{prefix}-worker"]
+    assert f"- Service/{prefix}-worker" in actual.output
+    assert f"~ Deployment/{prefix}" in actual.output
+    assert f"~ Service/{prefix}-web" in actual.output
+
+
+def test_render_watch(mocker: MockerFixture) -> None:
+    """
+    GIVEN the --watch flag
+    WHEN running the render command
+    THEN the manifest is watched instead of rendered once
+    """
+    # GIVEN
+    m_watch = mocker.patch("komposer.core.watch.watch")
+    m_generate_manifest_from_docker_compose = mocker.patch(
+        "komposer.core.base.generate_manifest_from_docker_compose"
+    )
+
+    runner = CliRunner()
+
+    # WHEN
+    actual = runner.invoke(cli.main, [*make_mandatory_long_args(), "--watch"])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+
+    m_watch.assert_called_once()
+    m_generate_manifest_from_docker_compose.assert_not_called()
+
+    assert m_watch.call_args[0][0] == make_context(
+        docker_compose_path=cli.DEFAULT_DOCKER_COMPOSE_FILENAME.resolve()
+    )
+
+
+def test_cli_import_time() -> None:
+    """
+    GIVEN a fresh Python interpreter
+    WHEN importing the CLI module
+    THEN the heavy dependencies are not imported
+        AND the import time is within budget
+    """
+    # WHEN
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys, komposer.cli; print(','.join(sorted(sys.modules)))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # THEN
+    imported_modules = set(result.stdout.strip().split(","))
+
+    assert imported_modules.isdisjoint(CLI_LAZY_MODULES)
+
+    import_times = (line.split("|") for line in result.stderr.splitlines())
+    cli_import_time = next(
+        int(cumulative) for _, cumulative, name in import_times if name.strip() == "komposer.cli"
+    )
+
+    assert cli_import_time < CLI_IMPORT_TIME_BUDGET_US
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [
+        pytest.param("yaml", id="YAML"),
+        pytest.param("yaml-stream", id="YAML stream"),
+        pytest.param("json", id="JSON"),
+        pytest.param("ndjson", id="Newline delimited JSON"),
+    ],
+)
+def test_diff_unchanged(
+    monkeypatch: pytest.MonkeyPatch, temporary_path: Path, output_format: str
+) -> None:
+    """
+    GIVEN a previously rendered manifest with KOMPOSER_* variables which aren't strings in YAML
+    WHEN running the diff command against it without any change
+    THEN no item is output
+        AND no difference is reported
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_MY_NUMBER", "123")
+    monkeypatch.setenv("KOMPOSER_MY_EMPTY", "")
+
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                web:
+                    image: my-image
+                    command: ping ${KOMPOSER_MY_NUMBER}
+                    environment:
+                        - MY_VARIABLE=${KOMPOSER_MY_EMPTY}
+            """
+        )
+    )
+    previous_path = temporary_path / "previous.yml"
+    args = [*make_mandatory_long_args(), "-f", str(compose_path), "--format", output_format]
+
+    runner = CliRunner()
+    runner.invoke(cli.main, [*args, "--output", str(previous_path)])
+
+    # WHEN
+    actual = runner.invoke(cli.main, ["diff", "--against", str(previous_path), *args])
+
+    # THEN
+    assert actual.exit_code == 0, actual.output
+    assert "~ " not in actual.output
+    assert get_manifest_items(load_manifest_documents(actual.output)) == []
+
+
+def test_serve_refuses_to_remove_file(temporary_path: Path) -> None:
+    """
+    GIVEN a regular file
+    WHEN running the serve command listening on its path
+    THEN a usage error is reported
+        AND the file is left untouched
+    """
+    # GIVEN
+    socket_path = temporary_path / "komposer.sock"
+    socket_path.write_text("my-content")
+
+    # WHEN
+    actual = CliRunner().invoke(cli.main, ["serve", "--socket", str(socket_path)])
+
+    # THEN
+    assert actual.exit_code == 2, actual.output
+    assert "not a socket" in actual.output
+    assert socket_path.read_text() == "my-content"
@@ -16,6 +16,15 @@ def temporary_path() -> Iterable[Path]:
         yield temp_path
 
 
+@pytest.fixture(autouse=True)
+def cache_home(monkeypatch: pytest.MonkeyPatch) -> Iterable[Path]:
+    # Never pollute the user's cache directory while testing
+    with TemporaryDirectory() as temp_dir:
+        monkeypatch.setenv("XDG_CACHE_HOME", temp_dir)
+
+        yield Path(temp_dir)
+
+
 @pytest.fixture
 def context(temporary_path: Path) -> Context:
     return make_context(temporary_path=temporary_path)
@@ -8,6 +8,7 @@ from pytest_mock import MockerFixture
 from komposer.cli import DEFAULT_INGRESS_DOMAIN
 from komposer.core.base import (
     ensure_deployment_annotations_is_valid_yaml,
+    ensure_docker_compose_is_supported,
     ensure_ingress_tls_is_valid_yaml,
     ensure_service_name_lowercase_RFC_1123,
     ensure_service_without_port_mapping,
@@ -20,6 +21,7 @@ from komposer.exceptions import (
     DeploymentAnnotationsException,
     DeploymentAnnotationsInvaliYamlError,
     DeploymentAnnotationsNotAMappingError,
+    DockerComposeNotSupportedError,
     IngressTlsException,
     IngressTlsInvalidYamlError,
     IngressTlsNotAListError,
@@ -351,7 +353,7 @@ def test_generate_manifest_from_docker_compose(
     mocker.patch("komposer.core.base.generate_config_maps", return_value=config_maps)
     mocker.patch("komposer.core.base.generate_deployment", return_value=deployment)
     mocker.patch("komposer.core.base.generate_services", return_value=services)
-    mocker.patch("komposer.core.base.load_extra_manifests", return_value=extra_manifests)
+    mocker.patch("komposer.core.base.iter_extra_manifests", return_value=extra_manifests)
 
     if context.ingress_for_service:
         mocker.patch(
@@ -543,3 +545,66 @@ def test_ensure_service_without_port_mapping_fails_if_port_mapping(ports: list[s
     # THEN
     with pytest.raises(ComposePortsMappingNotSuportedError):
         ensure_service_without_port_mapping(compose)
+
+
+def test_ensure_docker_compose_is_supported() -> None:
+    """
+    GIVEN a supported Docker Compose file
+    WHEN ensuring that the Docker Compose file is supported
+    THEN no exception is raised
+    """
+    # GIVEN
+    compose = docker_compose.DockerCompose(
+        services={
+            "service-1": docker_compose.Service(ports=["8080"]),
+            "service-2": docker_compose.Service(ports=["9000:9000"]),
+        }
+    )
+
+    # THEN
+    ensure_docker_compose_is_supported(compose)
+
+
+def test_ensure_docker_compose_is_supported_fails_with_single_error() -> None:
+    """
+    GIVEN a Docker Compose file with a single violation
+    WHEN ensuring that the Docker Compose file is supported
+    THEN the violation is raised as is
+    """
+    # GIVEN
+    compose = docker_compose.DockerCompose(
+        services={"my_service": docker_compose.Service(ports=["8080"])}
+    )
+
+    # THEN
+    with pytest.raises(InvalidServiceNameError):
+        ensure_docker_compose_is_supported(compose)
+
+
+def test_ensure_docker_compose_is_supported_fails_with_all_errors() -> None:
+    """
+    GIVEN a Docker Compose file with violations of different kinds
+    WHEN ensuring that the Docker Compose file is supported
+    THEN all the violations are raised at once
+    """
+    # GIVEN
+    compose = docker_compose.DockerCompose(
+        services={
+            "my_service": docker_compose.Service(ports=["9000:8080"]),
+            "other-service": docker_compose.Service(ports=["8080", "9001:5432"]),
+        }
+    )
+
+    # WHEN
+    with pytest.raises(DockerComposeNotSupportedError) as exc_info:
+        ensure_docker_compose_is_supported(compose)
+
+    # THEN
+    assert [type(error) for error in exc_info.value.errors] == [
+        ComposePortsNotUniqueError,
+        InvalidServiceNameError,
+        ComposePortsMappingNotSuportedError,
+        ComposePortsMappingNotSuportedError,
+    ]
+    assert "9000:8080" in str(exc_info.value)
+    assert "9001:5432" in str(exc_info.value)
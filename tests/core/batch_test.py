@@ -0,0 +1,187 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from komposer.core.base import generate_manifest_from_docker_compose
+from komposer.core.batch import (
+    generate_manifests_from_docker_compose,
+    load_shared_inputs,
+    parse_batch_targets,
+    write_manifest,
+    write_manifests_in_parallel,
+)
+from komposer.core.render import render_raw_manifest
+from komposer.exceptions import BatchTargetsInvalidError
+from komposer.types import docker_compose
+from komposer.types.cli import BatchTarget, Context
+from tests.fixtures import make_context
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        pytest.param("", [], id="No content"),
+        pytest.param("[]", [], id="Empty list"),
+        pytest.param(
+            textwrap.dedent(
+                """
+                - repository_name: my-repository
+                  branch_name: my-branch
+                - repository_name: my-repository
+                  branch_name: other-branch
+                  project_name: my-project
+                  ingress_for_service: my-service
+                """
+            ),
+            [
+                BatchTarget(repository_name="my-repository", branch_name="my-branch"),
+                BatchTarget(
+                    repository_name="my-repository",
+                    branch_name="other-branch",
+                    project_name="my-project",
+                    ingress_for_service="my-service",
+                ),
+            ],
+            id="Multiple targets",
+        ),
+    ],
+)
+def test_parse_batch_targets(source: str, expected: list[BatchTarget]) -> None:
+    """
+    GIVEN a YAML list of batch targets
+    WHEN parsing the targets
+    THEN is the expected
+    """
+    # WHEN
+    actual = parse_batch_targets(source)
+
+    # THEN
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        pytest.param("repository_name: my-repository", id="Not a list"),
+        pytest.param("- repository_name: my-repository", id="Missing branch name"),
+    ],
+)
+def test_parse_batch_targets_fails(source: str) -> None:
+    """
+    GIVEN an invalid YAML list of batch targets
+    WHEN parsing the targets
+    THEN raises an exception
+    """
+    with pytest.raises(BatchTargetsInvalidError):
+        parse_batch_targets(source)
+
+
+def test_generate_manifests_from_docker_compose(
+    mocker: MockerFixture, temporary_path: Path
+) -> None:
+    """
+    GIVEN multiple contexts sharing the same Docker Compose file
+    WHEN generating the manifests
+    THEN the Docker Compose file is parsed only once
+        AND a manifest is generated for each context
+    """
+    # GIVEN
+    compose = docker_compose.DockerCompose(services={"my-service": docker_compose.Service()})
+    contexts = [
+        make_context(temporary_path=temporary_path, branch_name="branch-1"),
+        make_context(temporary_path=temporary_path, branch_name="branch-2"),
+    ]
+
+    m_parse_docker_compose_file = mocker.patch(
+        "komposer.core.batch.parse_docker_compose_file", return_value=compose
+    )
+    m_generate_manifest_from_docker_compose = mocker.patch(
+        "komposer.core.batch.generate_manifest_from_docker_compose", return_value={}
+    )
+
+    # WHEN
+    actual = list(generate_manifests_from_docker_compose(contexts))
+
+    # THEN
+    assert actual == [(contexts[0], {}), (contexts[1], {})]
+
+    m_parse_docker_compose_file.assert_called_once_with(
+        contexts[0].docker_compose_path, cache=mocker.ANY
+    )
+    m_generate_manifest_from_docker_compose.assert_has_calls(
+        [mocker.call(contexts[0], compose), mocker.call(contexts[1], compose)]
+    )
+
+
+@pytest.fixture
+def batch_contexts(temporary_path: Path) -> list[Context]:
+    docker_compose_path = temporary_path / "docker-compose.yml"
+    docker_compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service
+            """
+        )
+    )
+    extra_manifest_path = temporary_path / "extra.yml"
+    extra_manifest_path.write_text("kind: Job\nmetadata:\n  name: my-job\n")
+
+    return [
+        make_context(
+            docker_compose_path=docker_compose_path,
+            branch_name=f"branch-{index}",
+            extra_manifest_paths=[extra_manifest_path],
+        )
+        for index in range(10)
+    ]
+
+
+def test_write_manifest(temporary_path: Path, batch_contexts: list[Context]) -> None:
+    """
+    GIVEN multiple contexts sharing the same Docker Compose file and extra manifest
+        AND their inputs loaded once
+    WHEN writing the manifests
+    THEN each manifest is the same as rendered on its own
+    """
+    # GIVEN
+    shared_inputs = load_shared_inputs(batch_contexts)
+
+    # WHEN
+    actual = [
+        write_manifest(context, temporary_path, shared_inputs) for context in batch_contexts
+    ]
+
+    # THEN
+    for context, output_path in zip(batch_contexts, actual):
+        expected = render_raw_manifest(context, generate_manifest_from_docker_compose(context))
+
+        assert output_path == temporary_path / f"{context.manifest_prefix}.yml"
+        assert output_path.read_text() == expected
+
+
+def test_write_manifests_in_parallel(temporary_path: Path, batch_contexts: list[Context]) -> None:
+    """
+    GIVEN multiple contexts
+    WHEN writing the manifests in a pool of processes
+    THEN a manifest is written for each context in the same order
+        AND each manifest is the same as rendered on its own
+    """
+    # GIVEN
+    output_dir = temporary_path / "manifests"
+    output_dir.mkdir()
+
+    # WHEN
+    actual = write_manifests_in_parallel(batch_contexts, output_dir, jobs=2)
+
+    # THEN
+    assert actual == [output_dir / f"{context.manifest_prefix}.yml" for context in batch_contexts]
+
+    for context, output_path in zip(batch_contexts, actual):
+        expected = render_raw_manifest(context, generate_manifest_from_docker_compose(context))
+
+        assert output_path.read_text() == expected
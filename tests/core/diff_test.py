@@ -0,0 +1,148 @@
+from typing import Any
+
+import pytest
+
+from komposer.core.diff import (
+    MISSING,
+    Change,
+    ManifestDiff,
+    diff_manifests,
+    format_diff,
+    get_manifest_items,
+    iter_changes,
+)
+
+
+def make_item(kind: str, name: str, **fields: Any) -> dict:
+    return {"apiVersion": "v1", "kind": kind, "metadata": {"name": name}, **fields}
+
+
+@pytest.mark.parametrize(
+    "previous, current, expected",
+    [
+        pytest.param({"a": 1}, {"a": 1}, [], id="Unchanged"),
+        pytest.param({"a": 1}, {"a": 2}, [Change("a", 1, 2)], id="Changed value"),
+        pytest.param({"a": 1}, {"a": True}, [Change("a", 1, True)], id="Changed type"),
+        pytest.param({}, {"a": 1}, [Change("a", MISSING, 1)], id="Added key"),
+        pytest.param({"a": 1}, {}, [Change("a", 1, MISSING)], id="Removed key"),
+        pytest.param(
+            {"a": {"b": [1, {"c": 2}]}},
+            {"a": {"b": [1, {"c": 3}, 4]}},
+            [Change("a.b[1].c", 2, 3), Change("a.b[2]", MISSING, 4)],
+            id="Nested",
+        ),
+        pytest.param({"a": [1]}, {"a": {"b": 1}}, [Change("a", [1], {"b": 1})], id="List to dict"),
+    ],
+)
+def test_iter_changes(previous: Any, current: Any, expected: list[Change]) -> None:
+    """
+    GIVEN two values
+    WHEN getting the changes between them
+    THEN we get the path and the values of each changed leaf
+    """
+    # WHEN
+    actual = list(iter_changes(previous, current))
+
+    # THEN
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "documents, expected",
+    [
+        pytest.param([None], [], id="Empty"),
+        pytest.param(
+            [{"apiVersion": "v1", "kind": "List", "items": [make_item("Service", "a")]}],
+            [make_item("Service", "a")],
+            id="Kubernetes List",
+        ),
+        pytest.param(
+            [make_item("Service", "a"), make_item("Deployment", "b")],
+            [make_item("Service", "a"), make_item("Deployment", "b")],
+            id="Stream of items",
+        ),
+    ],
+)
+def test_get_manifest_items(documents: list[Any], expected: list[dict]) -> None:
+    """
+    GIVEN the documents of a rendered manifest
+    WHEN getting the manifest's items
+    THEN we get the expected items
+    """
+    # WHEN
+    actual = get_manifest_items(documents)
+
+    # THEN
+    assert actual == expected
+
+
+def test_diff_manifests() -> None:
+    """
+    GIVEN a previous and a current manifests
+    WHEN comparing them
+    THEN the items are matched by kind and name
+        AND we get the added, removed and changed items
+    """
+    # GIVEN
+    previous_items = [
+        make_item("Service", "unchanged"),
+        make_item("Service", "removed"),
+        make_item("Deployment", "changed", spec={"replicas": 1}),
+        make_item("Service", "changed"),
+    ]
+    current_items = [
+        make_item("ConfigMap", "added"),
+        make_item("Deployment", "changed", spec={"replicas": 2}),
+        make_item("Service", "unchanged"),
+        make_item("Service", "changed"),
+    ]
+
+    # WHEN
+    actual = diff_manifests(previous_items, current_items)
+
+    # THEN
+    assert actual == ManifestDiff(
+        added=[make_item("ConfigMap", "added")],
+        removed=[make_item("Service", "removed")],
+        changed=[
+            (
+                make_item("Deployment", "changed", spec={"replicas": 2}),
+                [Change("spec.replicas", 1, 2)],
+            )
+        ],
+    )
+    assert actual.applied_items == [
+        make_item("ConfigMap", "added"),
+        make_item("Deployment", "changed", spec={"replicas": 2}),
+    ]
+
+
+def test_format_diff() -> None:
+    """
+    GIVEN a manifest diff
+    WHEN formatting it
+    THEN we get a line for each item and each changed field
+    """
+    # GIVEN
+    manifest_diff = ManifestDiff(
+        added=[make_item("ConfigMap", "added")],
+        removed=[make_item("Service", "removed")],
+        changed=[
+            (
+                make_item("Deployment", "changed"),
+                [Change("spec.replicas", 1, 2), Change("spec.paused", MISSING, True)],
+            )
+        ],
+    )
+
+    # WHEN
+    actual = format_diff(manifest_diff)
+
+    # THEN
+    assert actual.splitlines() == [
+        "+ ConfigMap/added",
+        "- Service/removed",
+        "~ Deployment/changed",
+        "    spec.replicas: 1 -> 2",
+        "    spec.paused: (missing) -> true",
+    ]
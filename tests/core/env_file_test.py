@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from komposer.core.config_map import generate_config_maps
+from komposer.core.deployment import generate_deployment
+from komposer.core.env_file import EnvFileRegistry
+from komposer.types import docker_compose
+from komposer.types.cli import Context
+from komposer.utils import parse_env_file
+
+
+def test_env_file_registry(mocker: MockerFixture, temporary_path: Path) -> None:
+    """
+    GIVEN an env file
+    WHEN getting the env file through different relative paths
+    THEN the file is parsed only once
+    """
+    # GIVEN
+    (temporary_path / "envs").mkdir()
+    (temporary_path / ".env").write_text("MY_VARIABLE=my-value")
+
+    m_parse_env_file = mocker.patch("komposer.core.env_file.parse_env_file", wraps=parse_env_file)
+    registry = EnvFileRegistry(temporary_path / "docker-compose.yml")
+
+    # WHEN
+    actual_1 = registry.get(Path(".env"))
+    actual_2 = registry.get(Path("envs/../.env"))
+
+    # THEN
+    assert actual_1 == actual_2 == {"MY_VARIABLE": "my-value"}
+
+    m_parse_env_file.assert_called_once_with((temporary_path / ".env").resolve())
+
+
+def test_env_file_registry_shared_by_config_maps_and_deployment(
+    mocker: MockerFixture, context: Context, temporary_path: Path
+) -> None:
+    """
+    GIVEN many services sharing the same env file
+    WHEN generating the config maps and the deployment with the same registry
+    THEN the env file is parsed only once
+    """
+    # GIVEN
+    (temporary_path / ".env").write_text("MY_VARIABLE=my-value")
+
+    compose = docker_compose.DockerCompose(
+        services={
+            f"service-{index}": docker_compose.Service(env_file=Path(".env")) for index in range(3)
+        }
+    )
+
+    m_parse_env_file = mocker.patch("komposer.core.env_file.parse_env_file", wraps=parse_env_file)
+    registry = EnvFileRegistry(context.docker_compose_path)
+
+    # WHEN
+    config_maps = list(generate_config_maps(context, compose, registry))
+    deployment = generate_deployment(context, compose.services, registry)
+
+    # THEN
+    assert len(config_maps) == 1
+    assert len(deployment.spec.template.spec.containers) == 3
+
+    m_parse_env_file.assert_called_once()
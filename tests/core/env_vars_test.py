@@ -0,0 +1,130 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pytest_mock import MockerFixture
+
+from komposer.cli import DEFAULT_INGRESS_DOMAIN
+from komposer.core.env_vars import (
+    get_komposer_env_variables,
+    replace_komposer_env_variables,
+    replace_komposer_env_variables_in_object,
+)
+from komposer.envsubst import resolve_variables
+from komposer.types.cli import Context
+from tests.fixtures import make_context
+
+
+def test_get_komposer_env_variables(context: Context) -> None:
+    """
+    GIVEN a context
+    WHEN getting the KOMPOSER_* variables
+    THEN are the expected
+    """
+    # WHEN
+    actual = get_komposer_env_variables(context)
+
+    # THEN
+    assert actual == {
+        "KOMPOSER_SERVICE_PREFIX": "test-repository-test-branch",
+        "KOMPOSER_INGRESS_DOMAIN": DEFAULT_INGRESS_DOMAIN,
+    }
+
+
+def test_replace_komposer_env_variables_does_not_touch_environment(
+    monkeypatch: pytest.MonkeyPatch, context: Context
+) -> None:
+    """
+    GIVEN a context
+        AND a KOMPOSER_* variable set in the environment
+    WHEN replacing the KOMPOSER_* variables
+    THEN the context's values take precedence over the environment
+        AND the other environment variables are still substituted
+        AND the environment is not changed
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_SERVICE_PREFIX", "from-environment")
+    monkeypatch.setenv("KOMPOSER_OTHER", "other")
+
+    environ = os.environ.copy()
+
+    # WHEN
+    actual = replace_komposer_env_variables(
+        context, "${KOMPOSER_SERVICE_PREFIX} ${KOMPOSER_OTHER}"
+    )
+
+    # THEN
+    assert actual == "test-repository-test-branch other"
+    assert os.environ == environ
+
+
+def test_replace_komposer_env_variables_is_thread_safe() -> None:
+    """
+    GIVEN many contexts
+    WHEN replacing the KOMPOSER_* variables concurrently
+    THEN each result uses its own context's values
+    """
+    # GIVEN
+    contexts = [make_context(branch_name=f"branch-{index}") for index in range(100)]
+
+    # WHEN
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        actual = list(
+            executor.map(
+                lambda context: replace_komposer_env_variables(
+                    context, "${KOMPOSER_SERVICE_PREFIX}"
+                ),
+                contexts,
+            )
+        )
+
+    # THEN
+    assert actual == [f"test-repository-branch-{index}" for index in range(100)]
+
+
+def test_replace_komposer_env_variables_in_object(context: Context) -> None:
+    """
+    GIVEN a context
+        AND a JSON object with KOMPOSER_* variables in its keys and values
+    WHEN replacing the KOMPOSER_* variables in the object
+    THEN the variables are replaced in a copy of the object
+    """
+    # GIVEN
+    data = {
+        "${KOMPOSER_SERVICE_PREFIX}-key": ["$KOMPOSER_INGRESS_DOMAIN", 1, None, True],
+        "nested": {"value": "${KOMPOSER_SERVICE_PREFIX}"},
+    }
+
+    # WHEN
+    actual = replace_komposer_env_variables_in_object(context, data)
+
+    # THEN
+    assert actual == {
+        "test-repository-test-branch-key": [DEFAULT_INGRESS_DOMAIN, 1, None, True],
+        "nested": {"value": "test-repository-test-branch"},
+    }
+    assert data["nested"] == {"value": "${KOMPOSER_SERVICE_PREFIX}"}
+
+
+def test_replace_komposer_env_variables_in_object_resolves_once(
+    mocker: MockerFixture, context: Context
+) -> None:
+    """
+    GIVEN a context
+        AND a JSON object with many strings
+    WHEN replacing the KOMPOSER_* variables in the object
+    THEN the variables are resolved only once
+    """
+    # GIVEN
+    m_resolve_variables = mocker.patch(
+        "komposer.core.env_vars.resolve_variables", wraps=resolve_variables
+    )
+    data = {f"key-{index}": "${KOMPOSER_SERVICE_PREFIX}" for index in range(10)}
+
+    # WHEN
+    actual = replace_komposer_env_variables_in_object(context, data)
+
+    # THEN
+    assert set(actual.values()) == {"test-repository-test-branch"}
+
+    m_resolve_variables.assert_called_once()
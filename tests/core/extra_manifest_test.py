@@ -4,8 +4,14 @@ from pathlib import Path
 from tempfile import mkstemp
 
 import pytest
+from pytest_mock import MockerFixture
 
-from komposer.core.extra_manifest import load_extra_manifests
+from komposer.core.extra_manifest import (
+    EXTRA_MANIFEST_MAX_WORKERS,
+    EXTRA_MANIFEST_PROCESS_POOL_MIN_SIZE,
+    EXTRA_MANIFEST_STREAM_MIN_SIZE,
+    load_extra_manifests,
+)
 from komposer.exceptions import (
     ExtraManifestException,
     ExtraManifestMissingMetadataError,
@@ -439,3 +445,103 @@ def test_load_external_manifests_fails(
     # WHEN
     with pytest.raises(expected):
         load_extra_manifests(context)
+
+
+@pytest.mark.parametrize(
+    "process_pool_min_size",
+    [
+        pytest.param(EXTRA_MANIFEST_PROCESS_POOL_MIN_SIZE, id="Thread pool"),
+        pytest.param(0, id="Process pool"),
+    ],
+)
+def test_load_external_manifests_concurrently(
+    mocker: MockerFixture, temporary_path: Path, process_pool_min_size: int
+) -> None:
+    """
+    GIVEN more extra manifest files than the loading workers
+    WHEN we load the extra manifests
+    THEN the items are in the same order of the files
+    """
+    # GIVEN
+    mocker.patch(
+        "komposer.core.extra_manifest.EXTRA_MANIFEST_PROCESS_POOL_MIN_SIZE", process_pool_min_size
+    )
+
+    names = [f"my-job-{index}" for index in range(EXTRA_MANIFEST_MAX_WORKERS * 2)]
+    extra_manifest_paths = []
+
+    for index, name in enumerate(names):
+        extra_manifest_path = temporary_path / f"extra-manifest-{index}.yaml"
+        extra_manifest_path.write_text(f"kind: Job\nmetadata:\n  name: {name}\n")
+        extra_manifest_paths.append(extra_manifest_path)
+
+    context = make_context(extra_manifest_paths=extra_manifest_paths)
+
+    # WHEN
+    extra_items = load_extra_manifests(context)
+
+    # THEN
+    assert [item["metadata"]["name"] for item in extra_items] == [
+        f"{context.manifest_prefix}-{name}" for name in names
+    ]
+
+
+@pytest.mark.parametrize(
+    "stream_min_size",
+    [
+        pytest.param(EXTRA_MANIFEST_STREAM_MIN_SIZE, id="Loaded at once"),
+        pytest.param(0, id="Streamed"),
+    ],
+)
+@pytest.mark.parametrize(
+    "extra_manifests_count",
+    [pytest.param(1, id="Single file"), pytest.param(2, id="Multiple files")],
+)
+def test_load_external_manifests_multiple_documents(
+    mocker: MockerFixture, temporary_path: Path, stream_min_size: int, extra_manifests_count: int
+) -> None:
+    """
+    GIVEN extra manifest files with multiple YAML documents
+    WHEN we load the extra manifests
+    THEN we get the items of all the documents in order
+    """
+    # GIVEN
+    mocker.patch("komposer.core.extra_manifest.EXTRA_MANIFEST_STREAM_MIN_SIZE", stream_min_size)
+
+    extra_manifest = textwrap.dedent(
+        """
+        apiVersion: v1
+        kind: ConfigMap
+        metadata:
+            name: my-config-map
+        ---
+        ---
+        apiVersion: v1
+        kind: List
+        items:
+        - apiVersion: batch/v1
+          kind: Job
+          metadata:
+            name: my-job
+        ---
+        - apiVersion: v1
+          kind: Secret
+          metadata:
+            name: my-secret
+        """
+    )
+    extra_manifest_paths = [
+        write_content_to_path(temporary_path, extra_manifest)
+        for _ in range(extra_manifests_count)
+    ]
+
+    context = make_context(extra_manifest_paths=extra_manifest_paths)
+
+    # WHEN
+    extra_items = load_extra_manifests(context)
+
+    # THEN
+    assert [item["metadata"]["name"] for item in extra_items] == [
+        f"{context.manifest_prefix}-{name}"
+        for name in ["my-config-map", "my-job", "my-secret"] * extra_manifests_count
+    ]
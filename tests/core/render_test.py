@@ -0,0 +1,105 @@
+import json
+
+import pytest
+from pytest_mock import MockerFixture
+
+from komposer.core.render import (
+    get_manifest_item_filename,
+    render_manifest_documents,
+    render_raw_manifest,
+)
+from komposer.envsubst import resolve_variables
+from komposer.types.cli import Context
+from komposer.utils import load_yaml
+from tests.fixtures import TEST_BRANCH_NAME, TEST_REPOSITORY_NAME
+
+
+def make_item(kind: str, name: str) -> dict:
+    return {"apiVersion": "v1", "kind": kind, "metadata": {"name": name}}
+
+
+@pytest.mark.parametrize(
+    "output_format",
+    [
+        pytest.param("yaml", id="YAML"),
+        pytest.param("yaml-stream", id="YAML stream"),
+        pytest.param("json", id="JSON"),
+        pytest.param("ndjson", id="Newline delimited JSON"),
+    ],
+)
+def test_render_raw_manifest(context: Context, output_format: str) -> None:
+    """
+    GIVEN a manifest with a KOMPOSER_* variable
+    WHEN rendering it
+    THEN the variable is replaced
+    """
+    # GIVEN
+    manifest = make_item("Service", "${KOMPOSER_SERVICE_PREFIX}-my-service")
+
+    # WHEN
+    actual = render_raw_manifest(context, manifest, output_format)
+
+    # THEN
+    assert load_yaml(actual)["metadata"]["name"] == (
+        f"{TEST_REPOSITORY_NAME}-{TEST_BRANCH_NAME}-my-service"
+    )
+
+
+def test_render_manifest_documents_ndjson(context: Context) -> None:
+    """
+    GIVEN some manifest items
+    WHEN rendering them as newline delimited JSON
+    THEN each item is rendered on its own line
+    """
+    # GIVEN
+    items = [make_item("Service", "my-service"), make_item("Deployment", "my-deployment")]
+
+    # WHEN
+    actual = list(render_manifest_documents(context, items, "ndjson"))
+
+    # THEN
+    assert [json.loads(document) for document in actual] == items
+    assert all(document.count("\n") == 1 for document in actual)
+
+
+@pytest.mark.parametrize(
+    "output_format, expected",
+    [
+        pytest.param("yaml", "service-my-service.yml", id="YAML"),
+        pytest.param("ndjson", "service-my-service.json", id="Newline delimited JSON"),
+    ],
+)
+def test_get_manifest_item_filename(output_format: str, expected: str) -> None:
+    """
+    GIVEN a manifest item
+    WHEN getting its filename
+    THEN the filename has the kind, the name and the extension of the output format
+    """
+    # WHEN
+    actual = get_manifest_item_filename(make_item("Service", "my-service"), output_format)
+
+    # THEN
+    assert actual == expected
+
+
+def test_render_manifest_documents_resolves_variables_once(
+    mocker: MockerFixture, context: Context
+) -> None:
+    """
+    GIVEN many manifest items
+    WHEN rendering them as a stream
+    THEN the KOMPOSER_* variables are resolved only once
+    """
+    # GIVEN
+    m_resolve_variables = mocker.patch(
+        "komposer.core.env_vars.resolve_variables", wraps=resolve_variables
+    )
+    items = [make_item("Service", f"${{KOMPOSER_SERVICE_PREFIX}}-{index}") for index in range(10)]
+
+    # WHEN
+    actual = list(render_manifest_documents(context, items, "yaml-stream"))
+
+    # THEN
+    assert len(actual) == 10
+
+    m_resolve_variables.assert_called_once()
@@ -0,0 +1,282 @@
+import os
+import textwrap
+import threading
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from komposer.core.base import generate_manifest_from_docker_compose
+from komposer.core.config_map import generate_config_map
+from komposer.core.container import generate_container
+from komposer.core.deployment import generate_deployment
+from komposer.core.extra_manifest import load_extra_manifests
+from komposer.core.ingress import generate_ingress_from_services
+from komposer.core.service import generate_services
+from komposer.core.watch import IncrementalRenderer, get_input_signature, watch
+from komposer.exceptions import DockerComposeNotSupportedError, KomposerException
+from komposer.types.cli import Context
+from tests.fixtures import make_context
+
+DOCKER_COMPOSE = textwrap.dedent(
+    """
+    services:
+        web:
+            image: my-image
+            env_file: .env
+            ports:
+                - "8080"
+        worker:
+            image: my-image
+            environment:
+                - MY_VARIABLE=my-value
+    """
+)
+
+EXTRA_MANIFEST = textwrap.dedent(
+    """
+    apiVersion: v1
+    kind: List
+    items:
+        - apiVersion: batch/v1
+          kind: Job
+          metadata:
+            name: my-job
+    """
+)
+
+
+def write(path: Path, content: str) -> None:
+    """
+    Write the file making sure its signature changes even within the mtime's resolution.
+    """
+    previous_signature = get_input_signature(path)
+
+    path.write_text(content)
+
+    if get_input_signature(path) == previous_signature:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+
+@pytest.fixture
+def watched_context(temporary_path: Path) -> Context:
+    write(temporary_path / "docker-compose.yml", DOCKER_COMPOSE)
+    write(temporary_path / ".env", "MY_ENV_FILE_VARIABLE=my-value")
+    write(temporary_path / "extra.yml", EXTRA_MANIFEST)
+
+    return make_context(
+        temporary_path=temporary_path,
+        ingress_for_service="web",
+        extra_manifest_paths=[temporary_path / "extra.yml"],
+    )
+
+
+def test_incremental_renderer_render(watched_context: Context) -> None:
+    """
+    GIVEN a context
+    WHEN rendering with the incremental renderer
+    THEN the manifest is the same as the one generated from scratch
+    """
+    # GIVEN
+    renderer = IncrementalRenderer(watched_context)
+
+    # WHEN
+    actual = renderer.render()
+
+    # THEN
+    assert actual == generate_manifest_from_docker_compose(watched_context)
+
+
+def test_incremental_renderer_input_paths(watched_context: Context, temporary_path: Path) -> None:
+    """
+    GIVEN a context
+    WHEN rendering with the incremental renderer
+    THEN the env files are part of the input files
+    """
+    # GIVEN
+    renderer = IncrementalRenderer(watched_context)
+
+    # WHEN
+    renderer.render()
+
+    # THEN
+    assert renderer.input_paths == [
+        watched_context.docker_compose_path,
+        (temporary_path / ".env").resolve(),
+        temporary_path / "extra.yml",
+    ]
+
+
+@pytest.mark.parametrize(
+    "changed_filename, content, expected_stages",
+    [
+        pytest.param(
+            ".env",
+            "MY_ENV_FILE_VARIABLE=my-other-value",
+            {"generate_config_map": 1, "generate_container": 1, "generate_deployment": 1},
+            id="Env file",
+        ),
+        pytest.param(
+            "extra.yml",
+            EXTRA_MANIFEST.replace("my-job", "my-other-job"),
+            {"load_extra_manifests": 1},
+            id="Extra manifest",
+        ),
+        pytest.param(
+            "docker-compose.yml",
+            DOCKER_COMPOSE.replace("8080", "8081"),
+            {
+                "generate_config_map": 2,
+                "generate_container": 2,
+                "generate_deployment": 1,
+                "generate_services": 1,
+                "generate_ingress_from_services": 1,
+            },
+            id="Docker Compose file",
+        ),
+    ],
+)
+def test_incremental_renderer_render_changed_file(
+    mocker: MockerFixture,
+    watched_context: Context,
+    temporary_path: Path,
+    changed_filename: str,
+    content: str,
+    expected_stages: dict[str, int],
+) -> None:
+    """
+    GIVEN a rendered manifest
+    WHEN one of the input files changes
+    THEN only the items depending on that file are regenerated, once per service using it
+        AND the manifest is the same as the one generated from scratch
+    """
+    # GIVEN
+    stage_functions = [
+        generate_config_map,
+        generate_container,
+        generate_deployment,
+        generate_services,
+        generate_ingress_from_services,
+        load_extra_manifests,
+    ]
+    mocks = {
+        function.__name__: mocker.patch(f"komposer.core.watch.{function.__name__}", wraps=function)
+        for function in stage_functions
+    }
+
+    renderer = IncrementalRenderer(watched_context)
+    renderer.render()
+
+    for m_function in mocks.values():
+        m_function.reset_mock()
+
+    # WHEN
+    write(temporary_path / changed_filename, content)
+
+    actual = renderer.render()
+
+    # THEN
+    assert {
+        name: m_function.call_count for name, m_function in mocks.items() if m_function.called
+    } == expected_stages
+    assert actual == generate_manifest_from_docker_compose(watched_context)
+
+
+def test_incremental_renderer_render_removed_service(
+    watched_context: Context, temporary_path: Path
+) -> None:
+    """
+    GIVEN a rendered manifest
+    WHEN a service is removed from the Docker Compose file
+    THEN the items of the service are removed from the manifest
+        AND the stages of the service are forgotten
+    """
+    # GIVEN
+    renderer = IncrementalRenderer(watched_context)
+    renderer.render()
+
+    # WHEN
+    write(temporary_path / "docker-compose.yml", DOCKER_COMPOSE.split("    worker:")[0])
+
+    actual = renderer.render()
+
+    # THEN
+    assert actual == generate_manifest_from_docker_compose(watched_context)
+    assert not any(name.endswith(":worker") for name in renderer._stages)
+
+
+def test_incremental_renderer_render_unchanged(
+    mocker: MockerFixture, watched_context: Context
+) -> None:
+    """
+    GIVEN a rendered manifest
+    WHEN rendering again without changes
+    THEN nothing is regenerated
+    """
+    # GIVEN
+    renderer = IncrementalRenderer(watched_context)
+    renderer.render()
+
+    m_generate_deployment = mocker.patch("komposer.core.watch.generate_deployment")
+    m_load_extra_manifests = mocker.patch("komposer.core.watch.load_extra_manifests")
+
+    # WHEN
+    renderer.render()
+
+    # THEN
+    m_generate_deployment.assert_not_called()
+    m_load_extra_manifests.assert_not_called()
+
+
+def test_watch(watched_context: Context, temporary_path: Path) -> None:
+    """
+    GIVEN a watched context
+    WHEN an input file changes with an error and then is fixed
+    THEN the error is reported
+        AND the manifest is rendered again once fixed
+    """
+    # GIVEN
+    renders: list[dict] = []
+    errors: list[Exception] = []
+    rendered = threading.Semaphore(0)
+    stop = threading.Event()
+
+    def on_render(manifest: dict) -> None:
+        renders.append(manifest)
+        rendered.release()
+
+    def on_error(error: Exception) -> None:
+        errors.append(error)
+        rendered.release()
+
+    thread = threading.Thread(
+        target=watch, args=(watched_context, on_render, on_error, 0.01, stop), daemon=True
+    )
+    thread.start()
+
+    try:
+        assert rendered.acquire(timeout=5)
+
+        # WHEN
+        # A single file changes at each step, otherwise the watcher might render in between
+        write(temporary_path / ".env", "MY_ENV_FILE_VARIABLE=my-other-value")
+        assert rendered.acquire(timeout=5)
+
+        write(temporary_path / "docker-compose.yml", DOCKER_COMPOSE.replace("8080", "8080:80"))
+        assert rendered.acquire(timeout=5)
+
+        write(temporary_path / "docker-compose.yml", DOCKER_COMPOSE)
+        assert rendered.acquire(timeout=5)
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+
+    # THEN
+    assert len(renders) == 3
+    assert len(errors) == 1
+    assert isinstance(errors[0], KomposerException)
+    assert not isinstance(errors[0], DockerComposeNotSupportedError)
+
+    assert renders[1]["items"][0]["data"] == {"MY_ENV_FILE_VARIABLE": "my-other-value"}
+    assert renders[2] == renders[1]
@@ -1,6 +1,7 @@
 import pytest
+from pytest_mock import MockerFixture
 
-from komposer.envsubst import envsubst
+from komposer.envsubst import envsubst, resolve_variables, substitute
 
 
 @pytest.mark.parametrize(
@@ -139,3 +140,117 @@ def test_simple_var_default(monkeypatch: pytest.MonkeyPatch) -> None:
     expected = test_fmt.format(default_val)
 
     assert actual == expected
+
+
+def test_envsubst_mixed_forms(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN a template with both simple and bracketed variables
+    WHEN envsubst is called
+    THEN all the variables are substituted
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_FOO", "foo")
+    monkeypatch.setenv("KOMPOSER_BAR", "bar")
+
+    # WHEN
+    actual = envsubst("$KOMPOSER_FOO-${KOMPOSER_BAR}.${KOMPOSER_BAZ:-baz}")
+
+    # THEN
+    assert actual == "foo-bar.baz"
+
+
+def test_envsubst_single_pass(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN a variable whose value contains a variable reference
+    WHEN envsubst is called
+    THEN the value is not substituted again
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_FOO", "${KOMPOSER_BAR}")
+    monkeypatch.setenv("KOMPOSER_BAR", "bar")
+
+    # WHEN
+    actual = envsubst("foo $KOMPOSER_FOO")
+
+    # THEN
+    assert actual == "foo ${KOMPOSER_BAR}"
+
+
+def test_envsubst_without_komposer_vars_skips_scan(mocker: MockerFixture) -> None:
+    """
+    GIVEN a template without Komposer vars
+    WHEN envsubst is called
+    THEN the template is returned without scanning it
+    """
+    # GIVEN
+    m_resolve_variables = mocker.patch("komposer.envsubst.resolve_variables")
+    template = "foo $FOO ${BAR} $KOMPOSER"
+
+    # WHEN
+    actual = envsubst(template)
+
+    # THEN
+    assert actual is template
+
+    m_resolve_variables.assert_not_called()
+
+
+def test_envsubst_with_variables(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN a template
+        AND variables both in the environment and in an explicit mapping
+    WHEN envsubst is called with the mapping
+    THEN the mapping takes precedence over the environment
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_FOO", "from-environment")
+    monkeypatch.setenv("KOMPOSER_BAR", "bar")
+
+    # WHEN
+    actual = envsubst("$KOMPOSER_FOO ${KOMPOSER_BAR}", {"KOMPOSER_FOO": "from-mapping"})
+
+    # THEN
+    assert actual == "from-mapping bar"
+
+
+def test_envsubst_with_escape(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN a template
+        AND variables both in the environment and in an explicit mapping
+    WHEN envsubst is called with an escape function
+    THEN the values of all the variables are escaped
+        AND the defaults are left as they are
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_FOO", "foo")
+
+    # WHEN
+    actual = envsubst(
+        "$KOMPOSER_FOO ${KOMPOSER_BAR} ${KOMPOSER_BAZ:-baz}",
+        {"KOMPOSER_BAR": "bar"},
+        escape=str.upper,
+    )
+
+    # THEN
+    assert actual == "FOO BAR baz"
+
+
+def test_substitute_with_resolved_variables(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    GIVEN a table of resolved variables
+        AND the environment changed since
+    WHEN substitute is called with the table
+    THEN only the resolved variables are used
+    """
+    # GIVEN
+    monkeypatch.setenv("KOMPOSER_FOO", "foo")
+
+    resolved_variables = resolve_variables({"KOMPOSER_BAR": "bar"})
+
+    monkeypatch.setenv("KOMPOSER_FOO", "other-foo")
+
+    # WHEN
+    actual = substitute("$KOMPOSER_FOO ${KOMPOSER_BAR}", resolved_variables)
+
+    # THEN
+    assert actual == "foo bar"
@@ -0,0 +1,131 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from komposer.core.base import generate_manifest_from_docker_compose
+from komposer.profiling import Profiler, profile_stage, profiling
+from tests.fixtures import make_context
+
+
+def test_profile_stage() -> None:
+    """
+    GIVEN a profiling context
+    WHEN profiling the same stage multiple times
+    THEN the stage is reported once with the total calls
+        AND the peak of the allocated memory
+    """
+    # WHEN
+    with profiling() as profiler:
+        for size in [1_000, 1_000_000]:
+            with profile_stage("my-stage"):
+                data = bytearray(size)
+                del data
+
+    # THEN
+    assert list(profiler.stages) == ["my-stage"]
+
+    stage = profiler.stages["my-stage"]
+
+    assert stage.calls == 2
+    assert stage.wall_time > 0
+    assert stage.peak_memory is not None
+    assert stage.peak_memory > 900_000
+
+
+def test_profiler_stage_without_memory() -> None:
+    """
+    GIVEN a profiler not tracing the memory
+    WHEN profiling a stage
+    THEN the peak of the allocated memory is not reported
+    """
+    # GIVEN
+    profiler = Profiler(trace_memory=False)
+
+    # WHEN
+    with profiler.stage("my-stage"):
+        pass
+
+    # THEN
+    assert profiler.stages["my-stage"].peak_memory is None
+    assert profiler.as_json() == [
+        {
+            "name": "my-stage",
+            "calls": 1,
+            "wall_time": profiler.stages["my-stage"].wall_time,
+            "cpu_time": profiler.stages["my-stage"].cpu_time,
+            "peak_memory": None,
+        }
+    ]
+
+
+def test_profile_stage_outside_profiling() -> None:
+    """
+    GIVEN no profiling context
+    WHEN profiling a stage
+    THEN nothing is recorded
+    """
+    # GIVEN
+    profiler = Profiler(trace_memory=False)
+
+    # WHEN
+    with profile_stage("my-stage"):
+        pass
+
+    # THEN
+    assert profiler.stages == {}
+
+
+@pytest.mark.parametrize(
+    "trace_memory",
+    [pytest.param(True, id="Tracing memory"), pytest.param(False, id="Timings only")],
+)
+def test_profiling_generate_manifest(temporary_path: Path, trace_memory: bool) -> None:
+    """
+    GIVEN a Docker Compose file
+        AND an extra manifest
+    WHEN profiling the generation of the manifest
+    THEN each stage is reported
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    ports:
+                        - "8080"
+            """
+        )
+    )
+    extra_manifest_path = temporary_path / "extra.yml"
+    extra_manifest_path.write_text("kind: Job\nmetadata:\n  name: my-job\n")
+
+    context = make_context(
+        docker_compose_path=compose_path,
+        ingress_for_service="my-service",
+        extra_manifest_paths=[extra_manifest_path, extra_manifest_path],
+    )
+
+    # WHEN
+    with profiling(trace_memory=trace_memory) as profiler:
+        generate_manifest_from_docker_compose(context)
+
+    # THEN
+    assert list(profiler.stages) == [
+        "parse",
+        "validation",
+        "config_maps",
+        "deployment",
+        "services",
+        "ingress",
+        "as_json_object",
+        "extra_manifests",
+    ]
+    assert profiler.stages["extra_manifests"].calls == 2
+    assert all(
+        (stage.peak_memory is not None) is trace_memory for stage in profiler.stages.values()
+    )
+    assert "extra_manifests" in profiler.format_table()
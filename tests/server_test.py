@@ -0,0 +1,449 @@
+import http.client
+import json
+import socket
+import stat
+import textwrap
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import pytest
+
+from komposer.server import (
+    ComposeMemo,
+    RenderHTTPServer,
+    RenderUnixHTTPServer,
+    make_context,
+    make_server,
+)
+from komposer.types.cli import DeploymentContext, IngressContext
+from komposer.utils import load_yaml
+from tests.fixtures import TEST_BRANCH_NAME, TEST_REPOSITORY_NAME
+from tests.fixtures import make_context as make_test_context
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: Path) -> None:
+        super().__init__("localhost")
+
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(self.socket_path))
+
+
+@contextmanager
+def serve_in_background(server: Union[RenderHTTPServer, RenderUnixHTTPServer]) -> Iterator[None]:
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+
+    yield
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def compose_path(temporary_path: Path) -> Path:
+    compose_path = temporary_path / "docker-compose.yml"
+    compose_path.write_text(
+        textwrap.dedent(
+            """
+            services:
+                my-service:
+                    image: my-image
+                    command: ping ${KOMPOSER_SERVICE_PREFIX}-my-service
+            """
+        )
+    )
+
+    return compose_path
+
+
+@pytest.fixture
+def tcp_server_port(temporary_path: Path) -> Iterator[int]:
+    server = make_server(host="127.0.0.1", port=0, root=temporary_path)
+
+    assert isinstance(server, RenderHTTPServer)
+
+    with serve_in_background(server):
+        yield server.server_port
+
+
+@pytest.fixture
+def unix_server_path(temporary_path: Path) -> Iterator[Path]:
+    socket_path = temporary_path / "komposer.sock"
+
+    with serve_in_background(make_server(socket_path=socket_path, root=temporary_path)):
+        yield socket_path
+
+
+def post(
+    connection: http.client.HTTPConnection,
+    path: str,
+    body: Any,
+    headers: Optional[dict[str, str]] = None,
+) -> tuple[int, str]:
+    connection.request(
+        "POST",
+        path,
+        body=json.dumps(body),
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
+    response = connection.getresponse()
+
+    return response.status, response.read().decode()
+
+
+def make_request(compose_path: Path) -> dict[str, Any]:
+    return {
+        "docker_compose_path": str(compose_path),
+        "repository_name": TEST_REPOSITORY_NAME,
+        "branch_name": TEST_BRANCH_NAME,
+    }
+
+
+def test_make_context(temporary_path: Path) -> None:
+    """
+    GIVEN a render request with only the mandatory fields
+    WHEN making the context
+    THEN the CLI's defaults are used for the other fields
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yml"
+
+    # WHEN
+    actual = make_context(make_request(compose_path))
+
+    # THEN
+    assert actual == make_test_context(docker_compose_path=compose_path)
+
+
+def test_make_context_with_nested_fields(temporary_path: Path) -> None:
+    """
+    GIVEN a render request with the ingress and deployment fields
+    WHEN making the context
+    THEN the nested fields are used
+    """
+    # GIVEN
+    request = {
+        **make_request(temporary_path / "docker-compose.yml"),
+        "ingress": {"tls_path": str(temporary_path / "tls.yml")},
+        "deployment": {"service_account_name": "my-account"},
+    }
+
+    # WHEN
+    actual = make_context(request)
+
+    # THEN
+    assert actual.ingress == IngressContext(
+        domain="svc.cluster.local", tls_path=temporary_path / "tls.yml"
+    )
+    assert actual.deployment == DeploymentContext(service_account_name="my-account")
+
+
+def test_compose_memo(temporary_path: Path, compose_path: Path) -> None:
+    """
+    GIVEN a Docker Compose file
+    WHEN getting the parsed file multiple times
+    THEN the same model is returned until the file changes
+    """
+    # GIVEN
+    memo = ComposeMemo()
+
+    # WHEN
+    actual_1 = memo.get(compose_path)
+    actual_2 = memo.get(compose_path)
+
+    compose_path.write_text("services:\n  other-service: {}\n")
+
+    actual_3 = memo.get(compose_path)
+
+    # THEN
+    assert actual_1 is actual_2
+    assert list(actual_3.services) == ["other-service"]
+
+
+def test_server_render(tcp_server_port: int, compose_path: Path) -> None:
+    """
+    GIVEN a render server listening on a TCP port
+    WHEN posting a render request
+    THEN the rendered manifest is returned
+    """
+    # GIVEN
+    connection = http.client.HTTPConnection("127.0.0.1", tcp_server_port)
+
+    # WHEN
+    status, body = post(connection, "/render", make_request(compose_path))
+
+    # THEN
+    assert status == 200
+
+    manifest = load_yaml(body)
+    container = manifest["items"][0]["spec"]["template"]["spec"]["containers"][0]
+
+    assert container["args"] == ["ping", "test-repository-test-branch-my-service"]
+
+
+def test_server_render_on_unix_socket(unix_server_path: Path, compose_path: Path) -> None:
+    """
+    GIVEN a render server listening on a Unix domain socket
+    WHEN posting a render request
+    THEN the rendered manifest is returned
+    """
+    # GIVEN
+    connection = UnixHTTPConnection(unix_server_path)
+
+    # WHEN
+    status, body = post(connection, "/render", make_request(compose_path))
+
+    # THEN
+    assert status == 200
+    assert load_yaml(body)["kind"] == "List"
+
+
+def test_make_server_removes_stale_socket(temporary_path: Path) -> None:
+    """
+    GIVEN a socket left behind by a previous server
+    WHEN making a server listening on the same path
+    THEN the stale socket is replaced
+    """
+    # GIVEN
+    socket_path = temporary_path / "komposer.sock"
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale_socket:
+        stale_socket.bind(str(socket_path))
+
+    # WHEN
+    server = make_server(socket_path=socket_path)
+
+    # THEN
+    try:
+        assert isinstance(server, RenderUnixHTTPServer)
+    finally:
+        server.server_close()
+
+
+def test_make_server_refuses_to_remove_file(temporary_path: Path) -> None:
+    """
+    GIVEN a regular file
+    WHEN making a server listening on its path
+    THEN an error is raised
+        AND the file is left untouched
+    """
+    # GIVEN
+    socket_path = temporary_path / "komposer.sock"
+    socket_path.write_text("my-content")
+
+    # WHEN
+    with pytest.raises(FileExistsError):
+        make_server(socket_path=socket_path)
+
+    # THEN
+    assert socket_path.read_text() == "my-content"
+
+
+@pytest.mark.parametrize(
+    "path, body, expected_status",
+    [
+        pytest.param("/render", [], 400, id="Not an object"),
+        pytest.param("/render", {"repository_name": "my-repository"}, 400, id="Invalid context"),
+        pytest.param(
+            "/render",
+            {
+                "docker_compose_path": "/does/not/exist.yml",
+                "repository_name": "my-repository",
+                "branch_name": "my-branch",
+            },
+            403,
+            id="Docker Compose file outside of the root",
+        ),
+        pytest.param(
+            "/render",
+            {
+                "docker_compose_path": "docker-compose.yml",
+                "repository_name": "my-repository",
+                "branch_name": "my-branch",
+                "ingress": None,
+            },
+            400,
+            id="Null ingress",
+        ),
+        pytest.param(
+            "/render",
+            {
+                "docker_compose_path": "docker-compose.yml",
+                "repository_name": "my-repository",
+                "branch_name": "my-branch",
+                "ingress": [],
+            },
+            400,
+            id="Ingress not an object",
+        ),
+        pytest.param("/unknown", {}, 404, id="Unknown path"),
+    ],
+)
+def test_server_render_fails(
+    tcp_server_port: int, path: str, body: Any, expected_status: int
+) -> None:
+    """
+    GIVEN a render server
+    WHEN posting an invalid request
+    THEN an error is returned
+        AND the server keeps serving requests
+    """
+    # GIVEN
+    connection = http.client.HTTPConnection("127.0.0.1", tcp_server_port)
+
+    # WHEN
+    status, response_body = post(connection, path, body)
+
+    # THEN
+    assert status == expected_status
+    assert "error" in json.loads(response_body)
+
+    connection.request("GET", "/health")
+
+    assert connection.getresponse().status == 200
+
+
+def test_server_render_missing_file(tcp_server_port: int, temporary_path: Path) -> None:
+    """
+    GIVEN a render server
+    WHEN posting a render request for a missing Docker Compose file within the root
+    THEN an error is returned
+    """
+    # GIVEN
+    connection = http.client.HTTPConnection("127.0.0.1", tcp_server_port)
+
+    # WHEN
+    status, _ = post(connection, "/render", make_request(temporary_path / "missing.yml"))
+
+    # THEN
+    assert status == 400
+
+
+@pytest.mark.parametrize(
+    "files, request_fields",
+    [
+        pytest.param(
+            {"docker-compose.yml": "services:\n  my-service:\n    env_file: ../outside.env\n"},
+            {},
+            id="Env file",
+        ),
+        pytest.param(
+            {},
+            {"extra_manifest_paths": ["{outside}"]},
+            id="Extra manifest",
+        ),
+        pytest.param(
+            {"link.env": None},
+            {"ingress": {"tls_path": "{root}/link.env"}},
+            id="Symbolic link",
+        ),
+    ],
+)
+def test_server_render_refuses_files_outside_of_root(
+    temporary_path: Path,
+    compose_path: Path,
+    files: dict[str, Optional[str]],
+    request_fields: dict[str, Any],
+) -> None:
+    """
+    GIVEN a render server with a root directory
+    WHEN posting a render request reading a file outside of the root
+    THEN the request is forbidden
+        AND the file's content is not returned
+    """
+    # GIVEN
+    root = temporary_path / "root"
+    root.mkdir()
+
+    outside_path = temporary_path / "outside.env"
+    outside_path.write_text("MY_SECRET=my-secret")
+
+    (root / "docker-compose.yml").write_text(compose_path.read_text())
+
+    for name, content in files.items():
+        if content is None:
+            (root / name).symlink_to(outside_path)
+        else:
+            (root / name).write_text(content)
+
+    request = json.loads(
+        json.dumps({**make_request(root / "docker-compose.yml"), **request_fields})
+        .replace("{outside}", str(outside_path))
+        .replace("{root}", str(root))
+    )
+    server = make_server(host="127.0.0.1", port=0, root=root)
+
+    assert isinstance(server, RenderHTTPServer)
+
+    # WHEN
+    with serve_in_background(server):
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        status, body = post(connection, "/render", request)
+
+    # THEN
+    assert status == 403
+    assert "my-secret" not in body
+
+
+@pytest.mark.parametrize(
+    "headers, expected_status",
+    [
+        pytest.param({"Content-Length": "not-a-number"}, 400, id="Invalid Content-Length"),
+        pytest.param({"Content-Length": "-1"}, 400, id="Negative Content-Length"),
+        pytest.param({"Content-Type": "text/plain"}, 415, id="Not JSON"),
+        pytest.param({"Host": "example.com"}, 403, id="Not a local host"),
+    ],
+)
+def test_server_render_invalid_headers(
+    tcp_server_port: int, compose_path: Path, headers: dict[str, str], expected_status: int
+) -> None:
+    """
+    GIVEN a render server
+    WHEN posting a render request with invalid headers
+    THEN an error is returned
+    """
+    # GIVEN
+    connection = http.client.HTTPConnection("127.0.0.1", tcp_server_port)
+    body = json.dumps(make_request(compose_path))
+
+    # WHEN
+    connection.putrequest("POST", "/render", skip_host="Host" in headers)
+    connection.putheader("Content-Type", headers.get("Content-Type", "application/json"))
+    connection.putheader("Content-Length", headers.get("Content-Length", str(len(body))))
+
+    if "Host" in headers:
+        connection.putheader("Host", headers["Host"])
+
+    connection.endheaders(body.encode())
+    response = connection.getresponse()
+
+    # THEN
+    assert response.status == expected_status
+    assert "error" in json.loads(response.read())
+
+
+def test_make_server_socket_mode(temporary_path: Path) -> None:
+    """
+    GIVEN a socket path
+    WHEN making a server listening on it
+    THEN only the current user can connect to the socket
+    """
+    # GIVEN
+    socket_path = temporary_path / "komposer.sock"
+
+    # WHEN
+    server = make_server(socket_path=socket_path)
+
+    # THEN
+    try:
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+    finally:
+        server.server_close()
@@ -0,0 +1,31 @@
+from pytest_mock import MockerFixture
+
+from komposer.types.docker_compose import Service
+from komposer.types.ports import Ports
+
+
+def test_service_ports_table(mocker: MockerFixture) -> None:
+    """
+    GIVEN a Docker Compose service with ports
+    WHEN accessing the ports table multiple times
+    THEN each port string is paired with its parsed ports
+        AND each port string is parsed only once
+    """
+    # GIVEN
+    service = Service(ports=["8080", "5434:5432"])
+
+    m_from_string = mocker.patch(
+        "komposer.types.docker_compose.Ports.from_string", wraps=Ports.from_string
+    )
+
+    # WHEN
+    actual_1 = service.ports_table
+    actual_2 = service.ports_table
+
+    # THEN
+    assert actual_1 is actual_2
+    assert actual_1 == (
+        ("8080", Ports(host=8080, container=8080)),
+        ("5434:5432", Ports(host=5434, container=5432)),
+    )
+    assert m_from_string.call_count == 2
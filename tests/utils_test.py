@@ -1,12 +1,48 @@
+import json
+import os
 import textwrap
+import traceback
+from collections.abc import Iterator
+from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 import pytest
+import yaml
+from pytest_mock import MockerFixture
 
+from komposer import utils
+from komposer.cache import ComposeCache
 from komposer.core.base import parse_docker_compose_file
+from komposer.types import kubernetes
 from komposer.types.docker_compose import DockerCompose, Service
-from komposer.utils import dump_yaml, to_kubernetes_name
+from komposer.utils import (
+    as_json_object,
+    dump_json,
+    dump_yaml,
+    escape_json_string,
+    load_yaml,
+    load_yaml_file,
+    to_kubernetes_name,
+    write_file_atomically,
+)
+
+YAML_LOADERS = [
+    pytest.param(yaml.SafeLoader, id="Pure Python loader"),
+    pytest.param(
+        getattr(yaml, "CSafeLoader", None),
+        id="libyaml loader",
+        marks=pytest.mark.skipif(not yaml.__with_libyaml__, reason="libyaml not available"),
+    ),
+]
+YAML_DUMPERS = [
+    pytest.param(yaml.SafeDumper, id="Pure Python dumper"),
+    pytest.param(
+        getattr(yaml, "CSafeDumper", None),
+        id="libyaml dumper",
+        marks=pytest.mark.skipif(not yaml.__with_libyaml__, reason="libyaml not available"),
+    ),
+]
 
 
 @pytest.mark.parametrize(
@@ -155,17 +191,362 @@ def test_to_kubernetes_name(string: str, expected: str) -> None:
                   second line
                 """
             ).lstrip(),
-        )
+            id="Multi-line string",
+        ),
+        pytest.param(
+            {"key": "single line", "other": ["a", 1, None]},
+            textwrap.dedent(
+                """
+                key: single line
+                other:
+                - a
+                - 1
+                - null
+                """
+            ).lstrip(),
+            id="Single line string",
+        ),
     ],
 )
-def test_dump_yaml(data: Any, expected: str) -> None:
+@pytest.mark.parametrize("yaml_dumper", YAML_DUMPERS)
+def test_dump_yaml(
+    monkeypatch: pytest.MonkeyPatch, yaml_dumper: type, data: Any, expected: str
+) -> None:
     """
     GIVEN a data structure
+        AND a YAML backend
     WHEN dumping to YAML
     THEN is the expected
     """
+    # GIVEN
+    monkeypatch.setattr("komposer.utils.YamlDumper", yaml_dumper)
+
     # WHEN
     actual = dump_yaml(data)
 
     # THEN
     assert actual == expected
+
+
+def test_parse_docker_compose_file_with_cache(mocker: MockerFixture, temporary_path: Path) -> None:
+    """
+    GIVEN a Docker Compose file
+        AND a compose cache
+    WHEN parsing the file twice
+    THEN the YAML is parsed only once
+        AND the same model is returned
+    """
+    # GIVEN
+    compose_path = temporary_path / "docker-compose.yaml"
+    compose_path.write_text("services:\n  my-service:\n    image: my-image\n")
+
+    cache = ComposeCache(temporary_path / "cache")
+    m_load_yaml = mocker.patch("komposer.utils.load_yaml", wraps=load_yaml)
+
+    # WHEN
+    actual_1 = parse_docker_compose_file(compose_path, cache=cache)
+    actual_2 = parse_docker_compose_file(compose_path, cache=cache)
+
+    # THEN
+    expected = DockerCompose(services={"my-service": Service(image="my-image")})
+
+    assert actual_1 == actual_2 == expected
+    assert m_load_yaml.call_count == 1
+
+
+@pytest.mark.parametrize("yaml_loader", YAML_LOADERS)
+def test_load_yaml(monkeypatch: pytest.MonkeyPatch, yaml_loader: type) -> None:
+    """
+    GIVEN a YAML string
+        AND a YAML backend
+    WHEN loading the YAML
+    THEN is the expected
+    """
+    # GIVEN
+    monkeypatch.setattr("komposer.utils.YamlLoader", yaml_loader)
+
+    source = textwrap.dedent(
+        """
+        key: |-
+          first line
+          second line
+        other: [a, 1, null]
+        """
+    )
+
+    # WHEN
+    actual = load_yaml(source)
+
+    # THEN
+    assert actual == {"key": "first line\nsecond line", "other": ["a", 1, None]}
+
+
+def make_full_manifest(containers_count: int = 3) -> kubernetes.List:
+    labels = {"repository": "my-repository", "branch": "my-branch"}
+    metadata = kubernetes.Metadata(name="my-repository-my-branch", labels=labels)
+    containers = [
+        kubernetes.Container(
+            image="my-image",
+            name=f"service-{index}",
+            args=["python", "run.py"],
+            env=[
+                kubernetes.EnvironmentVariable(name="DEBUG", value="1"),
+                kubernetes.ConfigMapEnvironmentVariable(
+                    name="SECRET",
+                    valueFrom=kubernetes.ConfigMapKeyRef(key="SECRET", name="env"),
+                ),
+            ],
+            ports=[kubernetes.ContainerPort(containerPort=8080 + index)],
+        )
+        for index in range(containers_count)
+    ]
+
+    return kubernetes.List(
+        items=[
+            kubernetes.ConfigMap(metadata=metadata, data={"DEBUG": "1", "EMPTY": None}),
+            kubernetes.Deployment(
+                metadata=metadata,
+                spec=kubernetes.DeploymentSpec(
+                    selector=kubernetes.Selector(matchLabels=labels),
+                    template=kubernetes.Template(
+                        metadata=kubernetes.UnnamedMetadata(labels=labels),
+                        spec=kubernetes.TemplateSpec(
+                            hostAliases=[
+                                kubernetes.HostAlias(
+                                    ip=IPv4Address("127.0.0.1"), hostnames=["service-0"]
+                                )
+                            ],
+                            containers=containers,
+                        ),
+                    ),
+                ),
+            ),
+            kubernetes.Ingress(
+                metadata=metadata,
+                spec=kubernetes.IngressSpec(
+                    rules=[
+                        kubernetes.IngressRule(
+                            host="my-host",
+                            http=kubernetes.HttpPaths(
+                                paths=[
+                                    kubernetes.HttpPath(
+                                        path=Path("/"),
+                                        pathType=kubernetes.PathType.PREFIX,
+                                        backend=kubernetes.Backend(
+                                            service=kubernetes.ServiceRef(
+                                                name="service-0",
+                                                port=kubernetes.ServiceRefPort(number=8080),
+                                            )
+                                        ),
+                                    )
+                                ]
+                            ),
+                        )
+                    ]
+                ),
+            ),
+        ]
+    )
+
+
+def test_as_json_object() -> None:
+    """
+    GIVEN a manifest with IPv4 addresses, paths and enums
+    WHEN converting to a JSON object
+    THEN is the same as round-tripping the manifest through a JSON string
+        AND only contains JSON primitives
+    """
+    # GIVEN
+    manifest = make_full_manifest()
+
+    # WHEN
+    actual = as_json_object(manifest)
+
+    # THEN
+    assert actual == json.loads(manifest.model_dump_json(by_alias=True))
+    assert json.loads(json.dumps(actual)) == actual
+
+    deployment_spec = actual["items"][1]["spec"]["template"]["spec"]
+
+    assert deployment_spec["hostAliases"][0]["ip"] == "127.0.0.1"
+    assert deployment_spec["containers"][0]["imagePullPolicy"] == "IfNotPresent"
+    assert actual["items"][2]["spec"]["rules"][0]["http"]["paths"][0]["path"] == "/"
+    assert actual["items"][2]["spec"]["rules"][0]["http"]["paths"][0]["pathType"] == "Prefix"
+
+
+def test_load_yaml_file_is_cached(mocker: MockerFixture, temporary_path: Path) -> None:
+    """
+    GIVEN a YAML file
+    WHEN loading the file multiple times
+    THEN the file is parsed only once
+        AND the file is parsed again after it changes
+    """
+    # GIVEN
+    path = temporary_path / "annotations.yaml"
+    path.write_text("key: value")
+
+    m_load_yaml = mocker.patch("komposer.utils.load_yaml", wraps=load_yaml)
+
+    # WHEN
+    actual_1 = load_yaml_file(path)
+    actual_2 = load_yaml_file(path)
+
+    path.write_text("key: other value")
+
+    actual_3 = load_yaml_file(path)
+
+    # THEN
+    assert actual_1 == actual_2 == {"key": "value"}
+    assert actual_3 == {"key": "other value"}
+    assert m_load_yaml.call_count == 2
+
+
+def test_load_yaml_file_caches_errors(mocker: MockerFixture, temporary_path: Path) -> None:
+    """
+    GIVEN an invalid YAML file
+    WHEN loading the file multiple times
+    THEN the parsing error is raised every time
+        AND the file is parsed only once
+    """
+    # GIVEN
+    path = temporary_path / "annotations.yaml"
+    path.write_text("{")
+
+    m_load_yaml = mocker.patch("komposer.utils.load_yaml", wraps=load_yaml)
+
+    # WHEN
+    errors = []
+
+    for _ in range(2):
+        with pytest.raises(yaml.YAMLError) as exc_info:
+            load_yaml_file(path)
+
+        errors.append(exc_info.value)
+
+    # THEN
+    assert m_load_yaml.call_count == 1
+    assert errors[0] is not errors[1]
+    assert type(errors[0]) is type(errors[1])
+    assert str(errors[0]) == str(errors[1])
+    assert len(traceback.extract_tb(errors[1].__traceback__)) == len(
+        traceback.extract_tb(errors[0].__traceback__)
+    )
+
+
+def test_load_yaml_file_cache_is_bounded(mocker: MockerFixture, temporary_path: Path) -> None:
+    """
+    GIVEN more YAML files than the cache can hold
+    WHEN loading all of them
+    THEN only the most recently loaded files are kept in the cache
+    """
+    # GIVEN
+    mocker.patch("komposer.utils.YAML_FILES_CACHE_MAX_SIZE", 2)
+    mocker.patch.dict("komposer.utils._yaml_files_cache", clear=True)
+
+    paths = [temporary_path / f"annotations-{index}.yaml" for index in range(3)]
+
+    for path in paths:
+        path.write_text("key: value")
+
+    # WHEN
+    for path in paths:
+        load_yaml_file(path)
+
+    # THEN
+    assert list(utils._yaml_files_cache) == paths[1:]
+
+
+@pytest.mark.parametrize(
+    "previous_content, expected_written",
+    [
+        pytest.param(None, True, id="New file"),
+        pytest.param("previous content", True, id="Changed file"),
+        pytest.param("my content", False, id="Unchanged file"),
+    ],
+)
+def test_write_file_atomically(
+    temporary_path: Path, previous_content: Optional[str], expected_written: bool
+) -> None:
+    """
+    GIVEN an output file
+    WHEN writing the file atomically
+    THEN the file is written only if its content changes
+        AND no temporary file is left behind
+    """
+    # GIVEN
+    path = temporary_path / "manifest.yml"
+
+    if previous_content is not None:
+        path.write_text(previous_content)
+        os.utime(path, ns=(0, 0))
+
+    # WHEN
+    actual = write_file_atomically(path, ["my ", "content"])
+
+    # THEN
+    assert actual is expected_written
+    assert path.read_text() == "my content"
+    assert (path.stat().st_mtime_ns != 0) is expected_written
+    assert list(temporary_path.iterdir()) == [path]
+
+
+def test_write_file_atomically_fails(temporary_path: Path) -> None:
+    """
+    GIVEN an output file
+    WHEN writing the file atomically fails
+    THEN the file is left untouched
+        AND no temporary file is left behind
+    """
+    # GIVEN
+    path = temporary_path / "manifest.yml"
+    path.write_text("previous content")
+
+    def chunks() -> Iterator[str]:
+        yield "my "
+        raise ValueError("Failed generating the content")
+
+    # WHEN
+    with pytest.raises(ValueError):
+        write_file_atomically(path, chunks())
+
+    # THEN
+    assert path.read_text() == "previous content"
+    assert list(temporary_path.iterdir()) == [path]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        pytest.param("my-value", id="Plain string"),
+        pytest.param('my "quoted" value', id="Quotes"),
+        pytest.param("my\\value\nwith new lines", id="Backslashes and new lines"),
+    ],
+)
+def test_escape_json_string(value: str) -> None:
+    """
+    GIVEN a string
+    WHEN escaping it to be embedded in a JSON string
+    THEN the JSON string decodes back to the original value
+    """
+    # WHEN
+    actual = escape_json_string(value)
+
+    # THEN
+    assert json.loads(f'"{actual}"') == value
+
+
+def test_dump_json() -> None:
+    """
+    GIVEN a manifest
+    WHEN dumping it as JSON
+    THEN is a single line JSON document of the manifest
+    """
+    # GIVEN
+    manifest = as_json_object(make_full_manifest())
+
+    # WHEN
+    actual = dump_json(manifest)
+
+    # THEN
+    assert json.loads(actual) == manifest
+    assert "\n" not in actual